@@ -43,7 +43,9 @@
         'data/followup_levels.xml',
         'data/multiple_invoice_data.xml',
         'data/recurring_entry_cron.xml',
+        'data/account_daily_balance_data.xml',
         'data/account_pdc_data.xml',
+        'data/account_asset_depreciation_run_data.xml',
         'views/account_journal_dashboard_view.xml',
         'views/reports_config_view.xml',
         'views/accounting_menu.xml',
@@ -56,6 +58,7 @@
         'wizard/asset_depreciation_confirmation_wizard_views.xml',
         'wizard/asset_modify_views.xml',
         'views/account_asset_views.xml',
+        'views/account_asset_depreciation_run_views.xml',
         'views/account_move_views.xml',
         'views/product_template_views.xml',
         'views/multiple_invoice_layout_view.xml',
@@ -21,7 +21,13 @@
 #
 #############################################################################
 from . import account_account
+from . import account_aging_engine
+from . import account_queue_mixin
 from . import account_asset
+from . import account_asset_depreciation_run
+from . import account_asset_forecast_engine
+from . import account_daily_balance
+from . import account_financial_report_engine
 from . import account_followup
 from . import account_journal
 from . import account_move
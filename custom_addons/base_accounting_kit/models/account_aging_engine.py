@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, models
+
+# Number of overdue buckets, the last one holding everything older.
+AGING_PERIODS = 5
+# Amounts a journal item can be aged on. The residual is the balance net of
+# the partial reconciliations made up to the aging date.
+AGING_AMOUNTS = {
+    'debit': 'aml.debit',
+    'credit': 'aml.credit',
+    'balance': 'aml.balance',
+    'residual': 'aml.balance + partial.amount',
+}
+
+
+class AccountAgingEngine(models.AbstractModel):
+    """Set-based aging of receivable and payable journal items.
+
+    Every open item is assigned its bucket in SQL from its due date: bucket 0
+    holds the items not due yet at the aging date, bucket n the items overdue
+    by ((n - 1) * period_length, n * period_length] days, and the last
+    bucket everything older.
+    """
+    _name = 'account.aging.engine'
+    _description = 'Aging Report Engine'
+
+    @api.model
+    def _get_aging_query(self, account_types, date, period_length=30,
+                         states=('posted',), partner_ids=None,
+                         company_ids=None, open_at_date=False,
+                         amount='balance', currency=None):
+        """
+        Build the query returning the open items with their aging bucket.
+
+        :param list account_types: Account types to age, e.g.
+                                   ['asset_receivable'].
+        :param date: Aging date, later items are ignored.
+        :param int period_length: Number of days of an overdue bucket.
+        :param states: Accepted states of the parent journal entries.
+        :param partner_ids: Partner IDs to restrict the items to.
+        :param company_ids: Company IDs, the current companies by default.
+        :param bool open_at_date: Also age the items reconciled after the
+                                  aging date, which were still open then.
+        :param str amount: Amount to age, see AGING_AMOUNTS.
+        :param currency: ``res.currency`` to convert the amounts to at the
+                         aging date, they are left in the currency of their
+                         company otherwise.
+        :return: A tuple (query, params), the query selecting id, partner_id,
+                 date, amount and bucket of each item.
+        :rtype: tuple
+        """
+        if amount not in AGING_AMOUNTS:
+            raise ValueError("Invalid aging amount: %s" % amount)
+        params = {
+            'date': date,
+            'period_length': period_length,
+            'periods': AGING_PERIODS,
+            'states': tuple(states),
+            'account_types': tuple(account_types),
+            'company_ids': tuple(company_ids or self.env.companies.ids),
+        }
+        clauses = [
+            'aml.parent_state IN %(states)s',
+            'acc.account_type IN %(account_types)s',
+            'aml.date <= %(date)s',
+            'aml.company_id IN %(company_ids)s',
+        ]
+        if partner_ids:
+            clauses.append('aml.partner_id IN %(partner_ids)s')
+            params['partner_ids'] = tuple(partner_ids)
+        if open_at_date:
+            clauses.append("""(aml.reconciled IS NOT TRUE OR EXISTS (
+                SELECT 1 FROM account_partial_reconcile apr
+                 WHERE aml.id IN (apr.debit_move_id, apr.credit_move_id)
+                   AND apr.max_date > %(date)s))""")
+        else:
+            clauses.append('aml.reconciled IS NOT TRUE')
+        joins = []
+        amount_expr = AGING_AMOUNTS[amount]
+        if amount == 'residual':
+            joins.append("""
+                LEFT JOIN LATERAL (
+                    SELECT (SELECT COALESCE(SUM(apr.amount), 0.0)
+                              FROM account_partial_reconcile apr
+                             WHERE apr.credit_move_id = aml.id
+                               AND apr.max_date <= %(date)s)
+                         - (SELECT COALESCE(SUM(apr.amount), 0.0)
+                              FROM account_partial_reconcile apr
+                             WHERE apr.debit_move_id = aml.id
+                               AND apr.max_date <= %(date)s) AS amount
+                ) partial ON TRUE""")
+        if currency:
+            rates = self._get_company_rates(params['company_ids'], currency,
+                                            date)
+            joins.append("""
+                JOIN unnest(%(rate_company_ids)s::int[],
+                            %(rates)s::numeric[]) AS rate(company_id, rate)
+                  ON rate.company_id = aml.company_id""")
+            params['rate_company_ids'] = list(rates)
+            params['rates'] = list(rates.values())
+            params['decimal_places'] = currency.decimal_places
+            amount_expr = 'ROUND((%s) * rate.rate, %%(decimal_places)s)' % \
+                amount_expr
+        query = """
+            SELECT aml.id, aml.partner_id, aml.date,
+                   %(amount)s AS amount,
+                   CASE WHEN COALESCE(aml.date_maturity, aml.date)
+                             >= %%(date)s
+                        THEN 0
+                        ELSE LEAST(%%(periods)s,
+                                   (%%(date)s - COALESCE(aml.date_maturity,
+                                                         aml.date) - 1)
+                                   / %%(period_length)s + 1)
+                   END AS bucket
+              FROM account_move_line aml
+              JOIN account_account acc ON acc.id = aml.account_id
+                   %(joins)s
+             WHERE %(where)s
+        """ % {'amount': amount_expr, 'joins': ''.join(joins),
+               'where': ' AND '.join(clauses)}
+        return query, params
+
+    @api.model
+    def _get_company_rates(self, company_ids, currency, date):
+        """
+        Return the rate converting the currency of each company to the given
+        currency, looked up once per company currency.
+
+        :param company_ids: IDs of the companies.
+        :param currency: Target ``res.currency``.
+        :param date: Conversion date.
+        :return: Mapping of company ID to conversion rate.
+        :rtype: dict
+        """
+        currency_rates = {}
+        rates = {}
+        for company in self.env['res.company'].browse(company_ids):
+            if company.currency_id not in currency_rates:
+                currency_rates[company.currency_id] = self.env[
+                    'res.currency']._get_conversion_rate(
+                    company.currency_id, currency, self.env.company, date)
+            rates[company.id] = currency_rates[company.currency_id]
+        return rates
+
+    @api.model
+    def _get_aged_lines(self, account_types, date, **options):
+        """
+        Return the open items with their aging bucket.
+
+        :param list account_types: Account types to age.
+        :param date: Aging date.
+        :param options: Keyword options of _get_aging_query.
+        :return: Rows with id, partner_id, date, amount and bucket, ordered
+                 by partner, date and id.
+        :rtype: list
+        """
+        query, params = self._get_aging_query(account_types, date, **options)
+        self.env.cr.execute(
+            query + " ORDER BY aml.partner_id, aml.date, aml.id", params)
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _get_aging_buckets(self, account_types, date, **options):
+        """
+        Aggregate the open items per partner and aging bucket in one query.
+
+        :param list account_types: Account types to age.
+        :param date: Aging date.
+        :param options: Keyword options of _get_aging_query.
+        :return: Mapping of partner ID (False for items without partner) to
+                 a dictionary with the 'buckets' totals, their 'total' and
+                 the 'line_ids' of each bucket, most recent first.
+        :rtype: dict
+        """
+        query, params = self._get_aging_query(account_types, date, **options)
+        self.env.cr.execute("""
+            SELECT aged.partner_id, aged.bucket,
+                   COALESCE(SUM(aged.amount), 0.0) AS amount,
+                   ARRAY_AGG(aged.id ORDER BY aged.date DESC, aged.id DESC)
+                       AS line_ids
+              FROM (%s) aged
+          GROUP BY aged.partner_id, aged.bucket
+        """ % query, params)
+        aging = {}
+        for row in self.env.cr.dictfetchall():
+            values = aging.setdefault(row['partner_id'] or False, {
+                'buckets': [0.0] * (AGING_PERIODS + 1),
+                'total': 0.0,
+                'line_ids': [[] for i in range(AGING_PERIODS + 1)],
+            })
+            values['buckets'][row['bucket']] = row['amount']
+            values['total'] += row['amount']
+            values['line_ids'][row['bucket']] = row['line_ids']
+        return aging
@@ -20,12 +20,25 @@
 #
 #############################################################################
 import calendar
+import logging
 from datetime import date, datetime
+from itertools import groupby
 from dateutil.relativedelta import relativedelta
-from odoo import api, fields, models, _
+from odoo import api, fields, models, modules, _
 from odoo.exceptions import UserError, ValidationError
 from odoo.tools import DEFAULT_SERVER_DATE_FORMAT as DF
-from odoo.tools import float_compare, float_is_zero
+from odoo.tools import float_compare, float_is_zero, split_every
+
+_logger = logging.getLogger(__name__)
+
+# Number of depreciation entries created and posted at once.
+DEPRECIATION_MOVE_BATCH = 500
+# Fields of the assets their depreciation board is computed from.
+DEPRECIATION_BOARD_FIELDS = {
+    'code', 'value', 'salvage_value', 'date', 'company_id', 'currency_id',
+    'method', 'method_number', 'method_period', 'method_end',
+    'method_progress_factor', 'method_time', 'prorata',
+}
 
 
 class AccountAssetCategory(models.Model):
@@ -273,9 +286,12 @@ class AccountAssetAsset(models.Model):
         self.value = self.category_id.price
 
     @api.model
-    def compute_generated_entries(self, date, asset_type=None):
+    def compute_generated_entries(self, date, asset_type=None,
+                                  auto_commit=False):
         # Entries generated : one by grouped category and one by asset
-        # from ungrouped category
+        # from ungrouped category. With auto_commit, every batch of entries
+        # is committed once created, and running again after a failure
+        # resumes with the lines still without an entry.
         created_move_ids = []
         type_domain = []
         if asset_type:
@@ -285,7 +301,8 @@ class AccountAssetAsset(models.Model):
             type_domain + [('state', '=', 'open'),
                            ('category_id.group_entries', '=', False)])
         created_move_ids += (ungrouped_assets.
-                             _compute_entries(date, group_entries=False))
+                             _compute_entries(date, group_entries=False,
+                                              auto_commit=auto_commit))
 
         for grouped_category in self.env['account.asset.category'].search(
                 type_domain + [('group_entries', '=', True)]):
@@ -294,6 +311,8 @@ class AccountAssetAsset(models.Model):
                  ('category_id', '=', grouped_category.id)])
             created_move_ids += assets._compute_entries(date,
                                                         group_entries=True)
+            if auto_commit and not modules.module.current_test:
+                self.env.cr.commit()
         return created_move_ids
 
     def _compute_board_amount(self, sequence, residual_amount, amount_to_depr,
@@ -365,18 +384,23 @@ class AccountAssetAsset(models.Model):
             undone_dotation_number += 1
         return undone_dotation_number
 
-    def compute_depreciation_board(self):
-        self.ensure_one()
-        posted_depreciation_line_ids = self.depreciation_line_ids.filtered(
-            lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
-        unposted_depreciation_line_ids = self.depreciation_line_ids.filtered(
-            lambda x: not x.move_check)
-
-        # Remove old unposted depreciation lines. We cannot use unlink()
-        # with One2many field
-        commands = [(2, line_id.id, False) for line_id in
-                    unposted_depreciation_line_ids]
+    def _get_depreciation_schedule(self, posted_depreciation_line_ids,
+                                   last_depreciation_date, date_to=None):
+        """
+        Compute the unposted depreciation lines of the asset.
 
+        :param posted_depreciation_line_ids: Posted depreciation lines of the
+                                             asset, by depreciation date.
+        :param last_depreciation_date: Date of the last depreciation entry of
+                                       the asset, see
+                                       _get_last_depreciation_date.
+        :param date_to: Date after which the schedule is cut, the whole
+                        schedule being computed when None.
+        :return: Values of the unposted lines, by sequence.
+        :rtype: list
+        """
+        self.ensure_one()
+        schedule = []
         if self.value_residual != 0.0:
             amount_to_depr = residual_amount = self.value_residual
             if self.prorata:
@@ -384,15 +408,14 @@ class AccountAssetAsset(models.Model):
                 # starting date is last entry + method perio
                 if posted_depreciation_line_ids and \
                         posted_depreciation_line_ids[-1].depreciation_date:
-                    last_depreciation_date = datetime.strptime(
-                        posted_depreciation_line_ids[-1].depreciation_date,
+                    last_depreciation_date = datetime.strptime(str(
+                        posted_depreciation_line_ids[-1].depreciation_date),
                         DF).date()
                     depreciation_date = last_depreciation_date + relativedelta(
                         months=+self.method_period)
                 else:
                     depreciation_date = datetime.strptime(
-                        str(self._get_last_depreciation_date()[self.id]),
-                        DF).date()
+                        str(last_depreciation_date), DF).date()
             else:
                 # depreciation_date = 1st of January of purchase year if
                 # annual valuation, 1st of
@@ -436,6 +459,8 @@ class AccountAssetAsset(models.Model):
 
             for x in range(len(posted_depreciation_line_ids),
                            undone_dotation_number):
+                if date_to and depreciation_date > date_to:
+                    break
                 sequence = x + 1
                 amount = self._compute_board_amount(sequence, residual_amount,
                                                     amount_to_depr,
@@ -458,9 +483,9 @@ class AccountAssetAsset(models.Model):
                     residual_amount >= 0 else 0.0,
                     'depreciated_value': self.value - (
                             self.salvage_value + residual_amount),
-                    'depreciation_date': depreciation_date.strftime(DF),
+                    'depreciation_date': depreciation_date,
                 }
-                commands.append((0, False, vals))
+                schedule.append(vals)
                 # Considering Depr. Period as months
                 depreciation_date = date(year, month, day) + relativedelta(
                     months=+self.method_period)
@@ -468,8 +493,41 @@ class AccountAssetAsset(models.Model):
                 month = depreciation_date.month
                 year = depreciation_date.year
 
-        self.write({'depreciation_line_ids': commands})
+        return schedule
+
+    def compute_depreciation_board(self):
+        """
+        Recompute the unposted depreciation lines of the assets in batch.
 
+        The schedule of each asset is compared with its unposted lines in
+        sequence order: only the lines whose values change are updated, and
+        the missing and extra lines are created and deleted, each in a single
+        operation for all the assets.
+        """
+        line_model = self.env['account.asset.depreciation.line']
+        last_dates = self._get_last_depreciation_date() if self else {}
+        to_create = []
+        to_update = []
+        to_delete = line_model
+        for asset in self:
+            posted_depreciation_line_ids = (
+                asset.depreciation_line_ids.filtered(
+                    lambda x: x.move_check).sorted(
+                    key=lambda l: l.depreciation_date))
+            unposted_depreciation_line_ids = (
+                asset.depreciation_line_ids -
+                posted_depreciation_line_ids).sorted(
+                key=lambda l: (l.sequence, l.id))
+            schedule = asset._get_depreciation_schedule(
+                posted_depreciation_line_ids, last_dates.get(asset.id))
+            for line, vals in zip(unposted_depreciation_line_ids, schedule):
+                if not line._matches_board_values(vals):
+                    to_update.append((line.id, vals))
+            to_delete |= unposted_depreciation_line_ids[len(schedule):]
+            to_create += schedule[len(unposted_depreciation_line_ids):]
+        to_delete.unlink()
+        line_model._update_board_values(to_update)
+        line_model.create(to_create)
         return True
 
     def validate(self):
@@ -633,26 +691,26 @@ class AccountAssetAsset(models.Model):
         default['name'] = self.name + _(' (copy)')
         return super(AccountAssetAsset, self).copy_data(default)
 
-    def _compute_entries(self, date, group_entries=False):
+    def _compute_entries(self, date, group_entries=False, auto_commit=False):
         depreciation_ids = self.env['account.asset.depreciation.line'].search([
             ('asset_id', 'in', self.ids), ('depreciation_date', '<=', date),
             ('move_check', '=', False)])
         if group_entries:
             return depreciation_ids.create_grouped_move()
-        return depreciation_ids.create_move()
+        return depreciation_ids.create_move(auto_commit=auto_commit)
 
-    @api.model
-    def create(self, vals):
-        asset = super(AccountAssetAsset,
-                      self.with_context(mail_create_nolog=True)).create(vals)
-        asset.sudo().compute_depreciation_board()
-        return asset
+    @api.model_create_multi
+    def create(self, vals_list):
+        assets = super(AccountAssetAsset, self.with_context(
+            mail_create_nolog=True)).create(vals_list)
+        assets.sudo().compute_depreciation_board()
+        return assets
 
     def write(self, vals):
         res = super(AccountAssetAsset, self).write(vals)
-        if 'depreciation_line_ids' not in vals and 'state' not in vals:
-            for rec in self:
-                rec.compute_depreciation_board()
+        if 'depreciation_line_ids' not in vals and 'state' not in vals and \
+                not DEPRECIATION_BOARD_FIELDS.isdisjoint(vals):
+            self.compute_depreciation_board()
         return res
 
     def open_entries(self):
@@ -707,100 +765,176 @@ class AccountAssetDepreciationLine(models.Model):
                                               line.move_id.state == 'posted')\
                 else False
 
-    def create_move(self, post_move=True):
-        created_moves = self.env['account.move']
+    def _matches_board_values(self, vals):
+        """
+        Return whether the line already holds the values computed for it by
+        the depreciation board.
+
+        :param dict vals: Values returned by
+                          ``account.asset.asset._get_depreciation_schedule``.
+        :rtype: bool
+        """
+        self.ensure_one()
+        rounding = self.asset_id.currency_id.rounding
+        return (self.sequence == vals['sequence']
+                and self.name == vals['name']
+                and self.depreciation_date == vals['depreciation_date']
+                and all(float_compare(self[field], vals[field],
+                                      precision_rounding=rounding) == 0
+                        for field in ('amount', 'remaining_value',
+                                      'depreciated_value')))
+
+    @api.model
+    def _update_board_values(self, updates):
+        """
+        Write the values computed by the depreciation board to their lines
+        in a single query.
+
+        :param list updates: (line ID, values) pairs, the values being
+                             those of _matches_board_values.
+        """
+        if not updates:
+            return
+        self.check_access_rights('write')
+        fnames = ['sequence', 'name', 'amount', 'remaining_value',
+                  'depreciated_value', 'depreciation_date']
+        self.flush_model(fnames)
+        self.env.cr.execute("""
+            UPDATE account_asset_depreciation_line line
+               SET sequence = board.sequence,
+                   name = board.name,
+                   amount = board.amount,
+                   remaining_value = board.remaining_value,
+                   depreciated_value = board.depreciated_value,
+                   depreciation_date = board.depreciation_date,
+                   write_uid = %s,
+                   write_date = now() AT TIME ZONE 'UTC'
+              FROM unnest(%s::int[], %s::int[], %s::varchar[],
+                          %s::float8[], %s::float8[], %s::float8[],
+                          %s::date[])
+                   AS board(id, sequence, name, amount, remaining_value,
+                            depreciated_value, depreciation_date)
+             WHERE line.id = board.id
+        """, [self.env.uid, [line_id for line_id, vals in updates]] + [
+            [vals[fname] for line_id, vals in updates] for fname in fnames])
+        self.invalidate_model(fnames + ['write_uid', 'write_date'])
+
+    def _get_move_date(self):
+        """Return the accounting date of the depreciation entry of the line"""
+        return (self.env.context.get('depreciation_date') or
+                self.depreciation_date or fields.Date.context_today(self))
+
+    def _iter_move_batches(self):
+        """
+        Split the lines into batches of entries created together, each
+        batch sharing a journal and an accounting date.
+
+        :return: Iterator over recordsets of at most DEPRECIATION_MOVE_BATCH
+                 lines.
+        """
+        def batch_key(line):
+            return (line.asset_id.category_id.journal_id.id,
+                    line._get_move_date())
+
+        for key, lines in groupby(self.sorted(
+                lambda line: batch_key(line) + (line.id,)), key=batch_key):
+            yield from split_every(DEPRECIATION_MOVE_BATCH,
+                                   [line.id for line in lines], self.browse)
+
+    def _prepare_move_vals(self, rates):
+        """
+        Prepare the depreciation entry of the line, with the debit and credit
+        of its journal items set from the start, so that it is balanced as
+        created.
+
+        :param dict rates: Conversion rates already fetched, keyed by
+                           currencies, company and date, filled as needed.
+        :return: Values for ``account.move.create``, linking the entry to
+                 the line.
+        :rtype: dict
+        """
+        self.ensure_one()
         prec = self.env['decimal.precision'].precision_get('Account')
+        asset = self.asset_id
+        category_id = asset.category_id
+        depreciation_date = self._get_move_date()
+        company_currency = asset.company_id.currency_id
+        current_currency = asset.currency_id
+        if current_currency == company_currency:
+            amount = company_currency.round(self.amount)
+            amount_currency = amount
+        else:
+            key = (current_currency, company_currency, asset.company_id,
+                   depreciation_date)
+            if key not in rates:
+                rates[key] = self.env['res.currency']._get_conversion_rate(
+                    *key)
+            amount = company_currency.round(self.amount * rates[key])
+            amount_currency = self.amount
+        asset_name = asset.name + ' (%s/%s)' % (
+            self.sequence, len(asset.depreciation_line_ids))
+        partner = self.env['res.partner']._find_accounting_partner(
+            asset.partner_id)
+        is_positive = float_compare(amount, 0.0, precision_digits=prec) > 0
+        line_vals = {
+            'name': asset_name,
+            'partner_id': partner.id,
+            'currency_id': current_currency.id,
+        }
+        return {
+            'ref': asset.code,
+            'date': depreciation_date,
+            'journal_id': category_id.journal_id.id,
+            'asset_depreciation_ids': [(4, self.id)],
+            'line_ids': [(0, 0, dict(
+                line_vals,
+                account_id=category_id.account_depreciation_id.id,
+                debit=0.0 if is_positive else -amount,
+                credit=amount if is_positive else 0.0,
+                amount_currency=-amount_currency,
+            )), (0, 0, dict(
+                line_vals,
+                account_id=category_id.account_depreciation_expense_id.id,
+                debit=amount if is_positive else 0.0,
+                credit=0.0 if is_positive else -amount,
+                amount_currency=amount_currency,
+            ))],
+        }
+
+    def create_move(self, post_move=True, auto_commit=False):
+        """
+        Create the depreciation entries of the lines, in batches of entries
+        of the same journal and date created at once.
+
+        :param bool post_move: Whether to post the entries of the assets
+                               whose category posts them automatically.
+        :param bool auto_commit: Whether to commit after each batch, so that
+                                 an interrupted run only has to be resumed
+                                 for the lines left without an entry.
+        :return: IDs of the created entries.
+        :rtype: list
+        """
+        created_moves = self.env['account.move']
         if self.mapped('move_id'):
             raise UserError(_(
                 'This depreciation is already linked to a journal entry! '
                 'Please post or delete it.'))
-        for line in self:
-            category_id = line.asset_id.category_id
-            depreciation_date = (self.env.context.get(
-                'depreciation_date') or line.depreciation_date or
-                                 fields.Date.context_today(
-                self))
-            company_currency = line.asset_id.company_id.currency_id
-            current_currency = line.asset_id.currency_id
-            amount = current_currency.with_context(
-                date=depreciation_date)._convert(line.amount, company_currency)
-            asset_name = line.asset_id.name + ' (%s/%s)' % (
-                line.sequence, len(line.asset_id.depreciation_line_ids))
-            partner = self.env['res.partner']._find_accounting_partner(
-                line.asset_id.partner_id)
-            move_line_1 = {
-                'name': asset_name,
-                'account_id': category_id.account_depreciation_id.id,
-                'debit': 0.0 if float_compare(amount, 0.0,
-                                              precision_digits=prec) > 0
-                else -amount,
-                'credit': amount if float_compare(amount, 0.0,
-                                                  precision_digits=prec) > 0
-                else 0.0,
-                'journal_id': category_id.journal_id.id,
-                'partner_id': partner.id,
-                # 'analytic_account_id': category_id.account_analytic_id.id if
-                # category_id.type == 'sale' else False,
-                'currency_id': company_currency != current_currency and
-                               current_currency.id or company_currency.id,
-                'amount_currency': company_currency != current_currency
-                                   and - 1.0 * line.amount or 0.0,
-            }
-            move_line_2 = {
-                'name': asset_name,
-                'account_id': category_id.account_depreciation_expense_id.id,
-                'credit': 0.0 if float_compare(amount, 0.0,
-                                               precision_digits=prec) > 0
-                else -amount,
-                'debit': amount if float_compare(amount, 0.0,
-                                                 precision_digits=prec) > 0
-                else 0.0,
-                'journal_id': category_id.journal_id.id,
-                'partner_id': partner.id,
-                # 'analytic_account_id': category_id.account_analytic_id.id
-                # if category_id.type == 'purchase' else False,
-                'currency_id': company_currency != current_currency and
-                               current_currency.id or company_currency.id,
-                'amount_currency': company_currency != current_currency and
-                                   line.amount or 0.0,
-            }
-            line_ids = [(0, 0, {
-                'account_id': category_id.account_depreciation_id.id,
-                'partner_id': partner.id,
-                'credit': amount if float_compare(amount, 0.0,
-                                                  precision_digits=prec) > 0
-                else 0.0,
-            }), (0, 0, {
-                'account_id': category_id.account_depreciation_expense_id.id,
-                'partner_id': partner.id,
-                'debit': amount if float_compare(amount, 0.0,
-                                                 precision_digits=prec) > 0
-                else 0.0,
-            })]
-            move = self.env['account.move'].create({
-                'ref': line.asset_id.code,
-                'date': depreciation_date or False,
-                'journal_id': category_id.journal_id.id,
-                'line_ids': line_ids,
-            })
-            for move_line in move.line_ids:
-                if move_line.account_id.id == move_line_1['account_id']:
-                    move_line.write({'credit': move_line_1['credit'],
-                                     'debit': move_line_1['debit']})
-                elif move_line.account_id.id == move_line_2['account_id']:
-                    move_line.write({'debit': move_line_2['debit'],
-                                     'credit': move_line_2['credit']})
-            if move.line_ids.filtered(
-                    lambda x: x.name == 'Automatic Balancing Line'):
-                move.line_ids.filtered(
-                    lambda x: x.name == 'Automatic Balancing Line').unlink()
-            line.write({'move_id': move.id, 'move_check': True})
-            created_moves |= move
-        if post_move and created_moves:
-            created_moves.filtered(lambda m: any(
-                m.asset_depreciation_ids.mapped(
-                    'asset_id.category_id.open_asset'))).post()
-        return [x.id for x in created_moves]
+        rates = {}
+        done = 0
+        for lines in self._iter_move_batches():
+            moves = self.env['account.move'].create(
+                [line._prepare_move_vals(rates) for line in lines])
+            if post_move:
+                moves.filtered(lambda m: any(
+                    m.asset_depreciation_ids.mapped(
+                        'asset_id.category_id.open_asset'))).post()
+            created_moves |= moves
+            done += len(lines)
+            if auto_commit and not modules.module.current_test:
+                self.env.cr.commit()
+                _logger.info("Created %s of %s depreciation entries",
+                             done, len(self))
+        return created_moves.ids
 
     def create_grouped_move(self, post_move=True):
         if not self.exists():
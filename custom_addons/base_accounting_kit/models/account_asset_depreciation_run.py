@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import logging
+import time
+from odoo import api, fields, models, _
+
+_logger = logging.getLogger(__name__)
+
+# Maximum number of assets of an ungrouped category per chunk.
+DEPRECIATION_RUN_CHUNK_SIZE = 500
+# Maximum number of chunks a worker processes per cron run.
+DEPRECIATION_RUN_BATCH = 20
+# Crons processing the chunks, one per cron thread of the default server
+# configuration, so that two chunks run in parallel.
+DEPRECIATION_RUN_CRONS = (
+    'base_accounting_kit.ir_cron_depreciation_run_worker_1',
+    'base_accounting_kit.ir_cron_depreciation_run_worker_2',
+)
+
+
+class AccountAssetDepreciationRun(models.Model):
+    """Depreciation entries of the running assets, generated in the
+    background.
+
+    A run is split into chunks of assets sharing a company and a category,
+    the assets of ungrouped categories being further split by ID range.
+    Chunks are processed by the depreciation run crons, or by any other
+    worker calling _process_chunks, each chunk being committed on its own,
+    so that a failing asset only fails its chunk. Failed chunks can be
+    retried once fixed, the lines already posted being skipped.
+    """
+    _name = 'account.asset.depreciation.run'
+    _description = 'Asset Depreciation Run'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', required=True, readonly=True)
+    date = fields.Date(string='Account Date', required=True, readonly=True,
+                       help='Depreciation lines up to this date are '
+                            'posted.')
+    asset_type = fields.Selection([('sale', 'Sale: Revenue Recognition'),
+                                   ('purchase', 'Purchase: Asset')],
+                                  string='Asset Type', readonly=True,
+                                  help='Type of the assets to depreciate, '
+                                       'every type when empty.')
+    user_id = fields.Many2one('res.users', string='Requested By',
+                              required=True, readonly=True,
+                              default=lambda self: self.env.user)
+    company_ids = fields.Many2many('res.company', string='Companies',
+                                   readonly=True,
+                                   default=lambda self: self.env.companies)
+    chunk_ids = fields.One2many('account.asset.depreciation.run.chunk',
+                                'run_id', string='Chunks', readonly=True)
+    state = fields.Selection([('pending', 'Pending'),
+                              ('running', 'Running'),
+                              ('done', 'Done'),
+                              ('failed', 'Failed')],
+                             string='Status', compute='_compute_state')
+    chunk_count = fields.Integer(string='Chunks', compute='_compute_state')
+    move_count = fields.Integer(string='Entries', compute='_compute_state')
+    duration = fields.Float(string='Duration (s)', compute='_compute_state',
+                            help='Seconds spent generating the entries, '
+                                 'summed over the chunks.')
+
+    @api.depends('chunk_ids.state', 'chunk_ids.move_count',
+                 'chunk_ids.duration')
+    def _compute_state(self):
+        """Compute the status and totals of the runs from their chunks. They
+        are not stored, so that workers finishing chunks of the same run
+        never update the same row."""
+        for run in self:
+            states = set(run.chunk_ids.mapped('state'))
+            if not states or states == {'done'}:
+                run.state = 'done'
+            elif states == {'pending'}:
+                run.state = 'pending'
+            elif 'pending' in states:
+                run.state = 'running'
+            else:
+                run.state = 'failed'
+            run.chunk_count = len(run.chunk_ids)
+            run.move_count = sum(run.chunk_ids.mapped('move_count'))
+            run.duration = sum(run.chunk_ids.mapped('duration'))
+
+    @api.model
+    def enqueue_run(self, date, asset_type=None):
+        """
+        Split the depreciation of the running assets into chunks and wake
+        up the depreciation workers.
+
+        :param date: Depreciation lines up to this date are posted.
+        :param str asset_type: 'sale' or 'purchase', every type when None.
+        :return: The created run.
+        """
+        self.env['account.asset.depreciation.line'].check_access_rights(
+            'create')
+        run = self.create({
+            'name': _('Depreciation up to %s', date),
+            'date': date,
+            'asset_type': asset_type,
+        })
+        run._create_chunks()
+        for cron in DEPRECIATION_RUN_CRONS:
+            self.env.ref(cron)._trigger()
+        return run
+
+    def _create_chunks(self):
+        """Split the running assets with lines to post into chunks, the
+        assets of a grouped category staying in one chunk since they share
+        a single entry"""
+        self.ensure_one()
+        type_clause = 'AND cat.type = %(asset_type)s' if self.asset_type \
+            else ''
+        self.env.cr.execute("""
+            SELECT company_id, category_id, MIN(id) AS asset_id_from,
+                   MAX(id) AS asset_id_to, COUNT(*) AS asset_count
+              FROM (
+                SELECT asset.id, asset.company_id, asset.category_id,
+                       CASE WHEN cat.group_entries THEN 0
+                            ELSE (ROW_NUMBER() OVER (
+                                      PARTITION BY asset.company_id,
+                                                   asset.category_id
+                                      ORDER BY asset.id) - 1)
+                                 / %(chunk_size)s
+                       END AS bucket
+                  FROM account_asset_asset asset
+                  JOIN account_asset_category cat
+                    ON cat.id = asset.category_id
+                 WHERE asset.state = 'open'
+                   AND asset.active
+                   AND asset.company_id = ANY(%(company_ids)s)
+                   {type_clause}
+                   AND EXISTS (
+                       SELECT 1 FROM account_asset_depreciation_line line
+                        WHERE line.asset_id = asset.id
+                          AND line.depreciation_date <= %(date)s
+                          AND line.move_id IS NULL)
+              ) assets
+          GROUP BY company_id, category_id, bucket
+          ORDER BY company_id, category_id, asset_id_from
+        """.format(type_clause=type_clause), {
+            'chunk_size': DEPRECIATION_RUN_CHUNK_SIZE,
+            'company_ids': self.company_ids.ids,
+            'asset_type': self.asset_type,
+            'date': self.date,
+        })
+        self.env['account.asset.depreciation.run.chunk'].create([
+            dict(row, run_id=self.id) for row in self.env.cr.dictfetchall()])
+
+    def action_retry(self):
+        """Queue the failed chunks of the runs again"""
+        self.chunk_ids.filtered(lambda chunk: chunk.state == 'failed').write({
+            'state': 'pending',
+            'error': False,
+        })
+        for cron in DEPRECIATION_RUN_CRONS:
+            self.env.ref(cron)._trigger()
+
+    def action_open_chunks(self):
+        """Open the chunks of the run with their timings and errors"""
+        self.ensure_one()
+        return {
+            'name': self.name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'account.asset.depreciation.run.chunk',
+            'view_mode': 'tree,form',
+            'domain': [('run_id', '=', self.id)],
+        }
+
+
+class AccountAssetDepreciationRunChunk(models.Model):
+    """Assets of a depreciation run processed in a single transaction.
+
+    Chunks are queued through ``account.queue.mixin``: a chunk whose worker
+    died is pending again, and is taken by the next worker.
+    """
+    _name = 'account.asset.depreciation.run.chunk'
+    _inherit = 'account.queue.mixin'
+    _description = 'Asset Depreciation Run Chunk'
+    _order = 'id'
+
+    run_id = fields.Many2one('account.asset.depreciation.run', string='Run',
+                             required=True, readonly=True, index=True,
+                             ondelete='cascade')
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, readonly=True)
+    category_id = fields.Many2one('account.asset.category',
+                                  string='Category', required=True,
+                                  readonly=True)
+    asset_id_from = fields.Integer(string='First Asset ID', required=True,
+                                   readonly=True)
+    asset_id_to = fields.Integer(string='Last Asset ID', required=True,
+                                 readonly=True)
+    asset_count = fields.Integer(string='Assets', readonly=True)
+    state = fields.Selection([('pending', 'Pending'),
+                              ('done', 'Done'),
+                              ('failed', 'Failed')],
+                             string='Status', required=True, readonly=True,
+                             default='pending', index=True)
+    move_count = fields.Integer(string='Entries', readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+    date_started = fields.Datetime(string='Started On', readonly=True)
+    date_finished = fields.Datetime(string='Finished On', readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True,
+                            help='Seconds spent generating the entries.')
+
+    @api.model
+    def _process_chunks(self, limit=DEPRECIATION_RUN_BATCH):
+        """
+        Process pending chunks, oldest first, committing after each of them.
+
+        :param int limit: Maximum number of chunks to process.
+        """
+        self._process_queue(limit)
+
+    def _run(self):
+        """Generate the entries of the chunk as the user who requested the
+        run, recording the outcome and timings of the chunk"""
+        self.ensure_one()
+        date_started = fields.Datetime.now()
+        start = time.time()
+        env = self.with_user(self.run_id.user_id).with_context(
+            allowed_company_ids=self.company_id.ids).env
+        try:
+            with self.env.cr.savepoint():
+                assets = env['account.asset.asset'].search([
+                    ('state', '=', 'open'),
+                    ('company_id', '=', self.company_id.id),
+                    ('category_id', '=', self.category_id.id),
+                    ('id', '>=', self.asset_id_from),
+                    ('id', '<=', self.asset_id_to),
+                ])
+                move_ids = assets._compute_entries(
+                    self.run_id.date,
+                    group_entries=self.category_id.group_entries)
+            values = {'state': 'done', 'move_count': len(move_ids)}
+        except Exception as error:
+            _logger.exception("Depreciation run chunk %s failed", self.id)
+            values = {'state': 'failed', 'error': str(error)}
+        values.update({
+            'date_started': date_started,
+            'date_finished': fields.Datetime.now(),
+            'duration': time.time() - start,
+        })
+        self.write(values)
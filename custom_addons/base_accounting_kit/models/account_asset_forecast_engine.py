@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from collections import defaultdict
+from odoo import api, fields, models
+
+# Keys the depreciation forecast can be aggregated by, with the value each
+# takes for a projected depreciation line.
+FORECAST_GROUPS = {
+    'company': lambda asset, vals: asset.company_id.id,
+    'currency': lambda asset, vals: asset.currency_id.id,
+    'month': lambda asset, vals: vals['depreciation_date'].replace(day=1),
+    'asset': lambda asset, vals: asset._origin.id,
+    'category': lambda asset, vals: asset.category_id.id,
+    'account': lambda asset, vals:
+        asset.category_id.account_depreciation_expense_id.id,
+}
+
+
+class AccountAssetForecastEngine(models.AbstractModel):
+    """Read-only projection of the depreciation of an asset portfolio.
+
+    The future depreciation lines are computed in memory with the schedule
+    of the depreciation board, optionally after overriding the depreciation
+    settings of the assets, so that what-if scenarios never rewrite a board.
+    Amounts are in the currency of each asset, so the forecast is always
+    grouped by company and currency.
+    """
+    _name = 'account.asset.forecast.engine'
+    _description = 'Asset Depreciation Forecast Engine'
+
+    @api.model
+    def get_depreciation_forecast(self, date_to, asset_ids=None,
+                                  category_ids=None, group_by=('month',),
+                                  overrides=None):
+        """
+        Project the depreciation of running assets up to a date.
+
+        :param date_to: Last date of the projection.
+        :param list asset_ids: IDs of the assets to project.
+        :param list category_ids: IDs of the categories whose running assets
+                                  are projected, when no asset is given.
+                                  Every running asset is projected when
+                                  neither is given.
+        :param group_by: Keys of FORECAST_GROUPS to aggregate by.
+        :param dict overrides: Asset field values to project with instead
+                               of the actual ones, e.g. {'method_number':
+                               10}.
+        :return: See _aggregate_forecast.
+        :rtype: list
+        """
+        domain = [('state', '=', 'open')]
+        if asset_ids:
+            domain.append(('id', 'in', asset_ids))
+        elif category_ids:
+            domain.append(('category_id', 'in', category_ids))
+        assets = self.env['account.asset.asset'].search(domain)
+        return self._aggregate_forecast(
+            self._project_assets(assets, fields.Date.to_date(date_to),
+                                 overrides=overrides), group_by)
+
+    @api.model
+    def _project_assets(self, assets, date_to, overrides=None):
+        """
+        Compute the unposted depreciation lines of assets up to a date,
+        without writing anything.
+
+        :param assets: ``account.asset.asset`` records to project.
+        :param date_to: Last date of the projection.
+        :param dict overrides: Asset field values to project with instead
+                               of the actual ones.
+        :return: Iterator over (asset, schedule) pairs, the asset being a
+                 new record holding the overrides when given, and the
+                 schedule the values of its projected lines.
+        """
+        last_dates = assets._get_last_depreciation_date() if assets else {}
+        for asset in assets:
+            posted_depreciation_line_ids = (
+                asset.depreciation_line_ids.filtered(
+                    lambda x: x.move_check).sorted(
+                    key=lambda l: l.depreciation_date))
+            if overrides:
+                asset = asset.new(overrides, origin=asset)
+            yield asset, asset._get_depreciation_schedule(
+                posted_depreciation_line_ids,
+                last_dates.get(asset._origin.id), date_to=date_to)
+
+    @api.model
+    def _aggregate_forecast(self, projection, group_by=('month',)):
+        """
+        Aggregate projected depreciation lines.
+
+        The net book value of a group is its current value, net of the
+        posted depreciation, less the projected depreciation up to the end
+        of each group, so that it is carried over the months without any
+        depreciation. Groups of assets without projected depreciation are
+        left out.
+
+        :param projection: Pairs returned by _project_assets.
+        :param group_by: Keys of FORECAST_GROUPS to aggregate by.
+        :return: One dictionary per group, by ascending keys, holding the
+                 'company' and 'currency' keys, the other group keys,
+                 'depreciation' and 'net_book_value'.
+        :rtype: list
+        """
+        for key in group_by:
+            if key not in FORECAST_GROUPS:
+                raise ValueError("Invalid forecast grouping: %s" % key)
+        # Amounts of different currencies are never summed together.
+        group_by = ['company', 'currency'] + [
+            key for key in group_by if key not in ('company', 'currency')]
+        book_keys = [key for key in group_by if key != 'month']
+        depreciation = defaultdict(float)
+        book_values = defaultdict(float)
+        for asset, schedule in projection:
+            book_values[tuple(FORECAST_GROUPS[key](asset, None)
+                              for key in book_keys)] += \
+                asset.value_residual + asset.salvage_value
+            for vals in schedule:
+                depreciation[tuple(FORECAST_GROUPS[key](asset, vals)
+                                   for key in group_by)] += vals['amount']
+        currencies = self.env['res.currency'].browse(
+            {group[1] for group in depreciation if group[1]})
+        rounding = {currency.id: currency.round for currency in currencies}
+        rounding[False] = self.env.company.currency_id.round
+        result = []
+        for group in sorted(depreciation):
+            row = dict(zip(group_by, group))
+            book_key = tuple(row[key] for key in book_keys)
+            book_values[book_key] -= depreciation[group]
+            round_amount = rounding[row['currency']]
+            row.update({
+                'depreciation': round_amount(depreciation[group]),
+                'net_book_value': round_amount(book_values[book_key]),
+            })
+            result.append(row)
+        return result
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from collections import defaultdict
+
+from odoo import api, fields, models
+from odoo.tools import sql
+
+# Journal item fields whose change moves an item to another daily balance.
+DAILY_BALANCE_LINE_FIELDS = {
+    'account_id', 'partner_id', 'journal_id', 'company_id', 'date',
+    'parent_state', 'debit', 'credit', 'balance', 'amount_currency',
+    'move_id',
+}
+# Columns of a journal item keying its daily balance, then its amounts.
+DAILY_BALANCE_KEY_COLUMNS = [
+    'company_id', 'account_id', 'partner_id', 'journal_id', 'date',
+    'parent_state',
+]
+DAILY_BALANCE_AMOUNT_COLUMNS = [
+    'debit', 'credit', 'balance', 'amount_currency',
+]
+# Journal entry fields propagated to the stored fields of its items.
+DAILY_BALANCE_MOVE_FIELDS = {
+    'state', 'date', 'journal_id', 'partner_id', 'company_id',
+}
+# Filters of account.move.line._query_get that the balances cannot answer.
+DAILY_BALANCE_LINE_FILTERS = (
+    'aged_balance', 'reconcile_date', 'account_tag_ids', 'analytic_tag_ids',
+    'analytic_account_ids', 'partner_categories',
+)
+
+
+class AccountDailyBalance(models.Model):
+    """Daily totals of the journal items per company, account, partner,
+    journal, date and entry state.
+
+    The table is append-only: every transaction changing journal items
+    inserts, right before it commits, the signed difference those items
+    make to each key. Transactions posting on the same account and day
+    therefore never update the same row and cannot conflict. Readers sum
+    the rows of a key, and the rows are merged back into one per key by
+    the autovacuum. Opening balances and period totals can then be summed
+    over a few rows per day and key instead of over every journal item
+    since the first entry.
+    """
+    _name = 'account.daily.balance'
+    _description = 'Daily Account Balance'
+    _auto = False
+    _log_access = False
+    _order = 'date, account_id'
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 readonly=True)
+    account_id = fields.Many2one('account.account', string='Account',
+                                 readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Partner',
+                                 readonly=True)
+    journal_id = fields.Many2one('account.journal', string='Journal',
+                                 readonly=True)
+    date = fields.Date(string='Date', readonly=True)
+    parent_state = fields.Selection([('draft', 'Draft'),
+                                     ('posted', 'Posted'),
+                                     ('cancel', 'Cancelled')],
+                                    string='Status', readonly=True)
+    debit = fields.Float(string='Debit', readonly=True)
+    credit = fields.Float(string='Credit', readonly=True)
+    balance = fields.Float(string='Balance', readonly=True)
+    amount_currency = fields.Float(string='Amount in Currency',
+                                   readonly=True)
+    line_count = fields.Integer(string='# of Journal Items', readonly=True)
+
+    def init(self):
+        """Create the balance table and fill it on first install"""
+        if sql.table_exists(self._cr, self._table):
+            return
+        self._cr.execute("""
+            CREATE TABLE account_daily_balance (
+                id SERIAL PRIMARY KEY,
+                company_id INTEGER NOT NULL,
+                account_id INTEGER NOT NULL,
+                partner_id INTEGER,
+                journal_id INTEGER NOT NULL,
+                date DATE NOT NULL,
+                parent_state VARCHAR NOT NULL,
+                debit NUMERIC NOT NULL DEFAULT 0.0,
+                credit NUMERIC NOT NULL DEFAULT 0.0,
+                balance NUMERIC NOT NULL DEFAULT 0.0,
+                amount_currency NUMERIC NOT NULL DEFAULT 0.0,
+                line_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX account_daily_balance_key_idx
+                ON account_daily_balance (account_id, date);
+            CREATE INDEX account_daily_balance_company_date_idx
+                ON account_daily_balance (company_id, date);
+        """)
+        self._rebuild_balances()
+
+    @api.model
+    def _rebuild_balances(self):
+        """Recompute the whole balance table from the journal items"""
+        self.env['account.move.line'].flush_model()
+        self._cr.execute("TRUNCATE account_daily_balance")
+        self._cr.execute("""
+            INSERT INTO account_daily_balance (
+                company_id, account_id, partner_id, journal_id, date,
+                parent_state, debit, credit, balance, amount_currency,
+                line_count)
+            SELECT aml.company_id, aml.account_id, aml.partner_id,
+                   aml.journal_id, aml.date, aml.parent_state,
+                   COALESCE(SUM(aml.debit), 0.0),
+                   COALESCE(SUM(aml.credit), 0.0),
+                   COALESCE(SUM(aml.balance), 0.0),
+                   COALESCE(SUM(aml.amount_currency), 0.0),
+                   COUNT(*)
+              FROM account_move_line aml
+             WHERE aml.account_id IS NOT NULL
+               AND aml.date IS NOT NULL
+               AND aml.parent_state IS NOT NULL
+          GROUP BY aml.company_id, aml.account_id, aml.partner_id,
+                   aml.journal_id, aml.date, aml.parent_state
+        """)
+
+    @api.autovacuum
+    def _gc_compact_balances(self):
+        """Merge the rows of each key into one and drop the emptied keys"""
+        self._cr.execute("""
+            WITH merged AS (
+                DELETE FROM account_daily_balance
+                 WHERE (account_id, date) IN (
+                        SELECT account_id, date
+                          FROM account_daily_balance
+                      GROUP BY account_id, date, company_id, journal_id,
+                               partner_id, parent_state
+                        HAVING COUNT(*) > 1 OR SUM(line_count) = 0)
+             RETURNING *
+            )
+            INSERT INTO account_daily_balance (
+                company_id, account_id, partner_id, journal_id, date,
+                parent_state, debit, credit, balance, amount_currency,
+                line_count)
+            SELECT company_id, account_id, partner_id, journal_id, date,
+                   parent_state, SUM(debit), SUM(credit), SUM(balance),
+                   SUM(amount_currency), SUM(line_count)
+              FROM merged
+          GROUP BY company_id, account_id, partner_id, journal_id, date,
+                   parent_state
+            HAVING SUM(line_count) <> 0
+        """)
+
+    @api.model
+    def _read_account_totals(self, account_ids):
+        """
+        Sum the debit, credit and balance of the accounts over the journal
+        items selected by the context, as account.move.line._query_get
+        would select them, from the daily balances.
+
+        :param list account_ids: Ids of ``account.account`` records.
+        :return: Mapping of account id to its amounts, for the accounts
+                 with journal items, or None when a filter of the context
+                 needs the journal items themselves.
+        :rtype: dict
+        """
+        context = self.env.context
+        if any(context.get(key) for key in DAILY_BALANCE_LINE_FILTERS):
+            return None
+        if not account_ids:
+            return {}
+        self.env['account.move.line'].check_access_rights('read')
+        wheres = ["account_id IN %s", "parent_state != 'cancel'"]
+        params = [tuple(account_ids)]
+        if context.get('date_to'):
+            wheres.append("date <= %s")
+            params.append(context['date_to'])
+        if context.get('date_from'):
+            if not context.get('strict_range'):
+                wheres.append("""(date >= %s OR account_id IN (
+                    SELECT id FROM account_account
+                     WHERE include_initial_balance))""")
+            elif context.get('initial_bal'):
+                wheres.append("date < %s")
+            else:
+                wheres.append("date >= %s")
+            params.append(context['date_from'])
+        if context.get('journal_ids'):
+            wheres.append("journal_id IN %s")
+            params.append(tuple(context['journal_ids']))
+        state = context.get('state')
+        if state and state.lower() != 'all':
+            wheres.append("parent_state = %s")
+            params.append(state)
+        if context.get('company_id'):
+            company_ids = [context['company_id']]
+        elif context.get('allowed_company_ids'):
+            company_ids = self.env.companies.ids
+        else:
+            company_ids = self.env.company.ids
+        wheres.append("company_id IN %s")
+        params.append(tuple(company_ids))
+        if context.get('account_ids'):
+            wheres.append("account_id IN %s")
+            params.append(tuple(context['account_ids'].ids))
+        if context.get('partner_ids'):
+            wheres.append("partner_id IN %s")
+            params.append(tuple(context['partner_ids'].ids))
+        self._refresh_dirty_balances()
+        self._cr.execute("""
+            SELECT account_id, COALESCE(SUM(debit), 0) AS debit,
+                   COALESCE(SUM(credit), 0) AS credit,
+                   COALESCE(SUM(debit), 0) - COALESCE(SUM(credit), 0)
+                       AS balance
+              FROM account_daily_balance
+             WHERE %s
+          GROUP BY account_id
+            HAVING SUM(line_count) <> 0
+        """ % ' AND '.join(wheres), params)
+        return {row.pop('account_id'): row
+                for row in self._cr.dictfetchall()}
+
+    @api.model
+    def _read_line_contributions(self, line_ids):
+        """
+        Return what the given journal items currently add to the balances.
+
+        :param list line_ids: Ids of ``account.move.line`` records.
+        :return: Mapping of line id to a tuple of its key columns followed
+                 by its amount columns, for the items holding a balance.
+        :rtype: dict
+        """
+        if not line_ids:
+            return {}
+        self._cr.execute("""
+            SELECT id, %s
+              FROM account_move_line
+             WHERE id = ANY(%%s)
+               AND account_id IS NOT NULL
+               AND date IS NOT NULL
+               AND parent_state IS NOT NULL
+        """ % ', '.join(DAILY_BALANCE_KEY_COLUMNS +
+                        DAILY_BALANCE_AMOUNT_COLUMNS), [list(line_ids)])
+        return {row[0]: row[1:] for row in self._cr.fetchall()}
+
+    @api.model
+    def _apply_balance_deltas(self, snapshots):
+        """
+        Insert the difference between the current contribution of the
+        given journal items and their snapshot as new balance rows.
+
+        :param dict snapshots: Mapping of line id to its contribution when
+                               first marked, as returned by
+                               _read_line_contributions, or None for items
+                               created in the transaction.
+        :return: The (account_id, date) pairs whose balances changed.
+        :rtype: set
+        """
+        if not snapshots:
+            return set()
+        self.env['account.move.line'].flush_model()
+        key_size = len(DAILY_BALANCE_KEY_COLUMNS)
+        deltas = defaultdict(lambda: [0] * (key_size + 1))
+        current = self._read_line_contributions(snapshots)
+        for sign, contributions in ((1, current.values()),
+                                    (-1, snapshots.values())):
+            for contribution in contributions:
+                if not contribution:
+                    continue
+                delta = deltas[contribution[:key_size]]
+                for index, amount in enumerate(contribution[key_size:]):
+                    delta[index] += sign * amount
+                delta[-1] += sign
+        rows = [key + tuple(delta) for key, delta in deltas.items()
+                if any(delta)]
+        if not rows:
+            return set()
+        self._cr.execute("""
+            INSERT INTO account_daily_balance (
+                company_id, account_id, partner_id, journal_id, date,
+                parent_state, debit, credit, balance, amount_currency,
+                line_count)
+            SELECT * FROM unnest(%s::int[], %s::int[], %s::int[], %s::int[],
+                                 %s::date[], %s::varchar[], %s::numeric[],
+                                 %s::numeric[], %s::numeric[],
+                                 %s::numeric[], %s::int[])
+        """, [list(column) for column in zip(*rows)])
+        return {(row[1], row[4]) for row in rows}
+
+    @api.model
+    def _mark_lines_dirty(self, lines, created=False):
+        """
+        Snapshot what the given journal items add to the balances, the
+        first time they are marked in the current transaction, so that
+        the difference they made is inserted when it commits.
+
+        :param lines: Recordset of ``account.move.line``.
+        :param bool created: Whether the items were just created, and so
+                             added nothing before this transaction.
+        """
+        data = self.env.cr.precommit.data
+        if self._name not in data:
+            data[self._name] = {}
+            self.env.cr.precommit.add(self._refresh_dirty_balances)
+        snapshots = data[self._name]
+        line_ids = [line_id for line_id in lines._ids
+                    if isinstance(line_id, int) and line_id not in snapshots]
+        if created:
+            snapshots.update(dict.fromkeys(line_ids))
+            return
+        contributions = self._read_line_contributions(line_ids)
+        snapshots.update(
+            (line_id, contributions.get(line_id)) for line_id in line_ids)
+
+    @api.model
+    def _refresh_dirty_balances(self):
+        """Insert the balance differences of the items marked dirty"""
+        self._apply_balance_deltas(self.env.cr.precommit.data.pop(self._name,
+                                                                  {}))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, models
+
+# Amounts aggregated per account for the financial reports.
+FINANCIAL_REPORT_AMOUNTS = ('debit', 'credit', 'balance')
+
+
+class AccountFinancialReportEngine(models.AbstractModel):
+    """Shared evaluation helpers of the ``account.financial.report`` trees.
+
+    A report tree is evaluated as a graph: the nodes reachable from the
+    printed reports are collected once, the accounts of every leaf node are
+    resolved with a single account search, and the balances of all those
+    accounts are read with one grouped query per period. Each node is then
+    computed once from the balances and from the nodes it depends on.
+    """
+    _name = 'account.financial.report.engine'
+    _description = 'Financial Report Engine'
+
+    @api.model
+    def _get_report_closure(self, reports):
+        """
+        Return the reports together with every report they depend on,
+        through their children or their linked report.
+
+        :param reports: ``account.financial.report`` records.
+        :return: ``account.financial.report`` records.
+        """
+        closure = reports.browse()
+        pending = reports
+        while pending:
+            closure |= pending
+            pending = (pending.children_ids |
+                       pending.account_report_id) - closure
+        return closure
+
+    @api.model
+    def _get_type_accounts(self, account_types):
+        """
+        Resolve the accounts of several account types with one search.
+
+        :param account_types: Iterable of account types.
+        :return: Mapping of account type to its ``account.account`` records.
+        :rtype: dict
+        """
+        account_types = set(account_types)
+        type_accounts = {
+            account_type: self.env['account.account']
+            for account_type in account_types
+        }
+        if account_types:
+            for account in self.env['account.account'].search(
+                    [('account_type', 'in', list(account_types))]):
+                type_accounts[account.account_type] |= account
+        return type_accounts
+
+    @api.model
+    def _get_account_balances(self, accounts):
+        """
+        Compute the debit, credit and balance of the accounts in a single
+        grouped query, over the journal items selected by the context (see
+        ``account.move.line._query_get``). The daily balances are summed
+        instead of the journal items unless a filter of the context needs
+        the items themselves.
+
+        :param accounts: ``account.account`` records.
+        :return: Mapping of account ID to its amounts, zero for the accounts
+                 without journal items.
+        :rtype: dict
+        """
+        res = {
+            account_id: dict.fromkeys(FINANCIAL_REPORT_AMOUNTS, 0.0)
+            for account_id in accounts.ids
+        }
+        if not accounts:
+            return res
+        totals = self.env['account.daily.balance']._read_account_totals(
+            accounts.ids)
+        if totals is not None:
+            res.update(totals)
+            return res
+        tables, where_clause, where_params = self.env[
+            'account.move.line']._query_get()
+        tables = tables.replace('"', '') if tables else "account_move_line"
+        wheres = [""]
+        if where_clause.strip():
+            wheres.append(where_clause.strip())
+        request = (
+            "SELECT account_id as id, "
+            "COALESCE(SUM(debit), 0) as debit, "
+            "COALESCE(SUM(credit), 0) as credit, "
+            "COALESCE(SUM(debit), 0) - COALESCE(SUM(credit), 0) as balance "
+            "FROM " + tables + " WHERE account_id IN %s " +
+            " AND ".join(wheres) + " GROUP BY account_id")
+        self.env.cr.execute(request, (tuple(accounts.ids),) + tuple(
+            where_params))
+        for row in self.env.cr.dictfetchall():
+            res[row.pop('id')] = row
+        return res
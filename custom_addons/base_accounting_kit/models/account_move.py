@@ -25,6 +25,8 @@ from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 from odoo.tools import DEFAULT_SERVER_DATE_FORMAT as DF
+from .account_daily_balance import DAILY_BALANCE_LINE_FIELDS, \
+    DAILY_BALANCE_MOVE_FIELDS
 
 
 class AccountMove(models.Model):
@@ -37,6 +39,14 @@ class AccountMove(models.Model):
         'move_id',
         string='Assets Depreciation Lines')
 
+    def write(self, vals):
+        """Refresh the daily balances of the journal items when the state,
+        date or journal of their entry changes"""
+        if not DAILY_BALANCE_MOVE_FIELDS.isdisjoint(vals):
+            self.env['account.daily.balance']._mark_lines_dirty(
+                self.line_ids)
+        return super(AccountMove, self).write(vals)
+
     def button_cancel(self):
         """Button action to cancel the transfer"""
         for move in self:
@@ -70,15 +80,14 @@ class AccountMove(models.Model):
     def action_post(self):
         """Action used to post invoice"""
         result = super(AccountMove, self).action_post()
-        for inv in self:
-            context = dict(self.env.context)
-            # Within the context of an invoice,
-            # this default value is for the type of the invoice, not the type
-            # of the asset. This has to be cleaned from the context before
-            # creating the asset,otherwise it tries to create the asset with
-            # the type of the invoice.
-            context.pop('default_type', None)
-            inv.invoice_line_ids.with_context(context).asset_create()
+        context = dict(self.env.context)
+        # Within the context of an invoice,
+        # this default value is for the type of the invoice, not the type
+        # of the asset. This has to be cleaned from the context before
+        # creating the asset,otherwise it tries to create the asset with
+        # the type of the invoice.
+        context.pop('default_type', None)
+        self.invoice_line_ids.with_context(context).asset_create()
         return result
 
 
@@ -98,6 +107,25 @@ class AccountInvoiceLine(models.Model):
                              readonly=True, digits='Account',
                              store=True)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Refresh the daily balances of the created journal items"""
+        lines = super(AccountInvoiceLine, self).create(vals_list)
+        self.env['account.daily.balance']._mark_lines_dirty(lines,
+                                                            created=True)
+        return lines
+
+    def write(self, vals):
+        """Refresh the daily balances the journal items leave and join"""
+        if not DAILY_BALANCE_LINE_FIELDS.isdisjoint(vals):
+            self.env['account.daily.balance']._mark_lines_dirty(self)
+        return super(AccountInvoiceLine, self).write(vals)
+
+    def unlink(self):
+        """Refresh the daily balances of the deleted journal items"""
+        self.env['account.daily.balance']._mark_lines_dirty(self)
+        return super(AccountInvoiceLine, self).unlink()
+
     @api.depends('asset_category_id', 'move_id.invoice_date')
     def _get_asset_date(self):
         """Returns the asset_start_date and the asset_end_date of the Asset"""
@@ -123,27 +151,35 @@ class AccountInvoiceLine(models.Model):
                     record.asset_end_date = end_date.strftime(DF)
 
     def asset_create(self):
-        """Create function for the asset and its associated properties"""
-        for record in self:
-            if record.asset_category_id:
-                vals = {
-                    'name': record.name,
-                    'code': record.move_id.name or False,
-                    'category_id': record.asset_category_id.id,
-                    'value': record.price_subtotal,
-                    'partner_id': record.partner_id.id,
-                    'company_id': record.move_id.company_id.id,
-                    'currency_id': record.move_id.company_currency_id.id,
-                    'date': record.move_id.invoice_date,
-                    'invoice_id': record.move_id.id,
-                }
-                changed_vals = record.env[
-                    'account.asset.asset'].onchange_category_id_values(
-                    vals['category_id'])
-                vals.update(changed_vals['value'])
-                asset = record.env['account.asset.asset'].create(vals)
-                if record.asset_category_id.open_asset:
-                    asset.validate()
+        """Create the assets of the lines with an asset category at once,
+        the defaults of each category being resolved only once, and confirm
+        those of the categories confirming their assets automatically"""
+        asset_model = self.env['account.asset.asset']
+        category_values = {}
+        vals_list = []
+        for record in self.filtered('asset_category_id'):
+            category = record.asset_category_id
+            if category not in category_values:
+                category_values[category] = \
+                    asset_model.onchange_category_id_values(
+                        category.id)['value']
+            vals = {
+                'name': record.name,
+                'code': record.move_id.name or False,
+                'category_id': category.id,
+                'value': record.price_subtotal,
+                'partner_id': record.partner_id.id,
+                'company_id': record.move_id.company_id.id,
+                'currency_id': record.move_id.company_currency_id.id,
+                'date': record.move_id.invoice_date,
+                'invoice_id': record.move_id.id,
+            }
+            vals.update(category_values[category])
+            vals_list.append(vals)
+        if vals_list:
+            assets = asset_model.create(vals_list)
+            assets.filtered(
+                lambda asset: asset.category_id.open_asset).validate()
         return True
 
     @api.depends('asset_category_id')
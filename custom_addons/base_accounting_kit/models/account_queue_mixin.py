@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, models
+
+
+class AccountQueueMixin(models.AbstractModel):
+    """Queue of records processed in the background, one per transaction.
+
+    The records of the inheriting model need a 'state' column, the queued
+    ones being 'pending', and a '_run' method processing one record and
+    moving it out of the pending state. A worker locks the oldest pending
+    record and keeps it locked while running it, the record only leaving the
+    pending state when its outcome is committed. The record of a worker that
+    died is therefore pending again, and is taken by the next worker, while
+    records locked by another worker are skipped so that several workers can
+    process the queue at the same time.
+    """
+    _name = 'account.queue.mixin'
+    _description = 'Background Processing Queue'
+
+    @api.model
+    def _process_queue(self, limit):
+        """
+        Run pending records, oldest first, committing after each of them.
+
+        :param int limit: Maximum number of records to run.
+        """
+        for _ in range(limit):
+            record = self._acquire_pending()
+            if not record:
+                break
+            record._run()
+            self.env.cr.commit()
+
+    @api.model
+    def _acquire_pending(self):
+        """
+        Lock the oldest pending record until the end of the transaction.
+
+        :return: The acquired record, empty when none is pending.
+        """
+        self.env.cr.execute("""
+            SELECT id FROM %s
+             WHERE state = 'pending'
+          ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """ % self._table)
+        row = self.env.cr.fetchone()
+        return self.sudo().browse(row[0] if row else [])
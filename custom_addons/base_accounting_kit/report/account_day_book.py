@@ -20,64 +20,96 @@
 #
 #############################################################################
 import time
-from datetime import timedelta, datetime
+from itertools import groupby
 
 from odoo import models, api, _
 from odoo.exceptions import UserError
 
+# Number of journal items fetched per query when printing the day book.
+DAY_BOOK_BATCH = 2000
+
 
 class DayBookPdfReport(models.AbstractModel):
     _name = 'report.base_accounting_kit.day_book_report_template'
     _description = 'Day Book Report'
 
-    def _get_account_move_entry(self, accounts, form_data, pass_date):
-        cr = self.env.cr
-        move_line = self.env['account.move.line']
-        tables, where_clause, where_params = move_line._query_get()
-        wheres = [""]
-        if where_clause.strip():
-            wheres.append(where_clause.strip())
+    def _get_move_lines(self, accounts, form_data, after=None,
+                        limit=DAY_BOOK_BATCH):
+        """
+        Fetch one page of the journal items of the day book window, ordered
+        by date and id. Pages are read with a keyset on (date, id), so the
+        whole window is read in order without re-scanning earlier pages.
+
+        :param accounts: Accounts of the journal items.
+        :param dict form_data: Options of the day book wizard.
+        :param after: Key (date, id) of the last item already fetched.
+        :param int limit: Maximum number of items to return.
+        :return: The rows of the journal items, with their balance.
+        :rtype: list
+        """
+        self.env['account.move.line'].check_access_rights('read')
         if form_data['target_move'] == 'posted':
             target_move = "AND m.state = 'posted'"
         else:
             target_move = ''
         sql = ('''
-                SELECT l.id AS lid, acc.name as accname, l.account_id AS 
-                account_id, l.date AS ldate, j.code AS lcode, l.currency_id, 
+                SELECT l.id AS lid, acc.name as accname, l.account_id AS
+                account_id, l.date AS ldate, j.code AS lcode, l.currency_id,
                 l.amount_currency, l.ref AS lref, l.name AS lname,
-                 COALESCE(l.debit,0) AS debit, COALESCE(l.credit,0) AS credit, 
-                COALESCE(SUM(l.debit),0) - COALESCE(SUM(l.credit), 0) AS 
-                balance,
-                m.name AS move_name, c.symbol AS currency_code, p.name 
+                COALESCE(l.debit,0) AS debit, COALESCE(l.credit,0) AS credit,
+                COALESCE(l.debit,0) - COALESCE(l.credit,0) AS balance,
+                m.name AS move_name, c.symbol AS currency_code, p.name
                 AS partner_name
                 FROM account_move_line l
                 JOIN account_move m ON (l.move_id=m.id)
                 LEFT JOIN res_currency c ON (l.currency_id=c.id)
                 LEFT JOIN res_partner p ON (l.partner_id=p.id)
                 JOIN account_journal j ON (l.journal_id=j.id)
-                JOIN account_account acc ON (l.account_id = acc.id) 
+                JOIN account_account acc ON (l.account_id = acc.id)
                 WHERE l.account_id IN %s AND l.journal_id IN %s '''
-               + target_move + ''' AND l.date = %s
-                GROUP BY l.id, l.account_id, l.date,
-                     j.code, l.currency_id, l.amount_currency, l.ref, 
-                     l.name, m.name, c.symbol, p.name , acc.name
-                     ORDER BY l.date DESC
+               + target_move + ''' AND l.date BETWEEN %s AND %s
+                AND (l.date, l.id) > (%s, %s)
+                ORDER BY l.date, l.id
+                LIMIT %s
         ''')
-        params = (
-        tuple(accounts.ids), tuple(form_data['journal_ids']), pass_date)
-        cr.execute(sql, params)
-        data = cr.dictfetchall()
-        res = {}
-        debit = credit = balance = 0.00
-        for line in data:
-            debit += line['debit']
-            credit += line['credit']
-            balance += line['balance']
-        res['debit'] = debit
-        res['credit'] = credit
-        res['balance'] = balance
-        res['lines'] = data
-        return res
+        after = after or (form_data['date_from'], 0)
+        params = (tuple(accounts.ids), tuple(form_data['journal_ids']),
+                  form_data['date_from'], form_data['date_to']) + tuple(
+            after) + (limit,)
+        self.env.cr.execute(sql, params)
+        return self.env.cr.dictfetchall()
+
+    def _iter_move_lines(self, accounts, form_data):
+        """Yield the journal items of the day book window in date order,
+        one page of rows being held at a time"""
+        after = None
+        while True:
+            rows = self._get_move_lines(accounts, form_data, after=after)
+            yield from rows
+            if len(rows) < DAY_BOOK_BATCH:
+                return
+            after = (rows[-1]['ldate'], rows[-1]['lid'])
+
+    def _iter_day_sections(self, accounts, form_data):
+        """
+        Split the journal items of the window into one section per day,
+        accumulating the debit, credit and balance of each day as its items
+        are read. Days without items are skipped.
+
+        :param accounts: Accounts of the journal items.
+        :param dict form_data: Options of the day book wizard.
+        :return: Generator of the day sections, in date order.
+        """
+        for day, lines in groupby(self._iter_move_lines(accounts, form_data),
+                                  key=lambda line: line['ldate']):
+            section = {'date': day, 'debit': 0.0, 'credit': 0.0,
+                       'balance': 0.0, 'child_lines': []}
+            for line in lines:
+                section['debit'] += line['debit']
+                section['credit'] += line['credit']
+                section['balance'] += line['balance']
+                section['child_lines'].append(line)
+            yield section
 
     @api.model
     def _get_report_values(self, docids, data=None):
@@ -98,28 +130,10 @@ class DayBookPdfReport(models.AbstractModel):
             [('id', 'in', active_acc)]) if data['form']['account_ids'] else \
             self.env['account.account'].search([])
 
-        date_start = datetime.strptime(form_data['date_from'],
-                                       '%Y-%m-%d').date()
-        date_end = datetime.strptime(form_data['date_to'],
-                                     '%Y-%m-%d').date()
-        days = date_end - date_start
-        dates = []
-        record = []
-        for i in range(days.days + 1):
-            dates.append(date_start + timedelta(days=i))
-        for head in dates:
-            pass_date = str(head)
-            accounts_res = self.with_context(
-                data['form'].get('used_context', {}))._get_account_move_entry(
-                accounts, form_data, pass_date)
-            if accounts_res['lines']:
-                record.append({
-                    'date': head,
-                    'debit': accounts_res['debit'],
-                    'credit': accounts_res['credit'],
-                    'balance': accounts_res['balance'],
-                    'child_lines': accounts_res['lines']
-                })
+        # Rendered as the template iterates, one day section at a time
+        record = self.with_context(
+            data['form'].get('used_context', {}))._iter_day_sections(
+            accounts, form_data)
         return {
             'doc_ids': docids,
             'doc_model': model,
@@ -30,90 +30,73 @@ class ReportFinancial(models.AbstractModel):
     _name = 'report.base_accounting_kit.report_cash_flow'
     _description = 'Cash Flow Report'
 
-    def _compute_account_balance(self, accounts):
-        mapping = {
-            'balance': "COALESCE(SUM(debit),0)"
-                       " - COALESCE(SUM(credit), 0) as balance",
-            'debit': "COALESCE(SUM(debit), 0) as debit",
-            'credit': "COALESCE(SUM(credit), 0) as credit",
-        }
-        res = {}
-        for account in accounts:
-            res[account.id] = dict.fromkeys(mapping, 0.0)
-        if accounts:
-            tables, where_clause, where_params = self.env[
-                'account.move.line']._query_get()
-            tables = tables.replace('"', '') if tables else "account_move_line"
-            wheres = [""]
-            if where_clause.strip():
-                wheres.append(where_clause.strip())
-            filters = " AND ".join(wheres)
-            request = "SELECT account_id as id, " + ', '.join(
-                mapping.values()) + \
-                      " FROM " + tables + \
-                      " WHERE account_id IN %s " \
-                      + filters + \
-                      " GROUP BY account_id"
-            params = (tuple(accounts._ids),) + tuple(where_params)
-            self.env.cr.execute(request, params)
-            for row in self.env.cr.dictfetchall():
-                res[row['id']] = row
-        return res
+    def _get_report_accounts(self, reports):
+        """Return the accounts summed by every report the given reports
+        depend on, keyed by report ID. The accounts of all the account
+        types are searched at once."""
+        engine = self.env['account.financial.report.engine']
+        closure = engine._get_report_closure(reports | reports.filtered(
+            lambda report: report.type == 'accounts').parent_id)
+        type_accounts = engine._get_type_accounts(
+            report.account_type_ids for report in closure
+            if report.type == 'account_type')
+        report_accounts = {}
+        for report in closure:
+            if report.type == 'account_type':
+                report_accounts[report.id] = type_accounts[
+                    report.account_type_ids]
+            elif report.type == 'account_report' and \
+                    report.account_report_id or report.type == 'sum':
+                report_accounts[report.id] = report.account_ids
+        return report_accounts
 
-    def _compute_report_balance(self, reports):
+    def _compute_report_balance(self, reports, report_accounts=None):
+        """Return the credit, debit and balance of every report, keyed by
+        report ID. The balances of all the accounts are read in one query,
+        then every report is computed once, after the reports it depends
+        on."""
+        if report_accounts is None:
+            report_accounts = self._get_report_accounts(reports)
+        balances = self.env[
+            'account.financial.report.engine']._get_account_balances(
+            self.env['account.account'].union(*report_accounts.values()))
+        cash_in = (self.env.ref('base_accounting_kit.cash_in_from_operation0')
+                   | self.env.ref('base_accounting_kit.cash_in_financial0')
+                   | self.env.ref('base_accounting_kit.cash_in_investing0'))
+        cash_out = (self.env.ref('base_accounting_kit.cash_out_operation1')
+                    | self.env.ref('base_accounting_kit.cash_out_financial1')
+                    | self.env.ref('base_accounting_kit.cash_out_investing1'))
         res = {}
         fields = ['credit', 'debit', 'balance']
-        for report in reports:
+
+        def evaluate(report):
             if report.id in res:
-                continue
-            res[report.id] = dict((fn, 0.0) for fn in fields)
+                return res[report.id]
+            values = res[report.id] = dict((fn, 0.0) for fn in fields)
             if report.type == 'accounts':
                 # it's the sum of credit or debit
-                res2 = self._compute_report_balance(report.parent_id)
-                for key, value in res2.items():
-                    cash_in_operation = self.env.ref(
-                        'base_accounting_kit.cash_in_from_operation0')
-                    cash_out_operation = self.env.ref(
-                        'base_accounting_kit.cash_out_operation1')
-                    cash_in_financial = self.env.ref(
-                        'base_accounting_kit.cash_in_financial0')
-                    cash_out_financial = self.env.ref(
-                        'base_accounting_kit.cash_out_financial1')
-                    cash_in_investing = self.env.ref(
-                        'base_accounting_kit.cash_in_investing0')
-                    cash_out_investing = self.env.ref(
-                        'base_accounting_kit.cash_out_investing1')
-                    if (report == cash_in_operation or report ==
-                            cash_in_financial or report == cash_in_investing):
-                        res[report.id]['debit'] += value['debit']
-                        res[report.id]['balance'] += value['debit']
-                    elif (report == cash_out_operation or report ==
-                          cash_out_financial or report == cash_out_investing):
-                        res[report.id]['credit'] += value['credit']
-                        res[report.id]['balance'] += -(value['credit'])
-            elif report.type == 'account_type':
-                # it's the sum the leaf accounts with such an account type
-                accounts = self.env['account.account'].search(
-                    [('account_type', 'in', report.account_type_ids)])
-                res[report.id]['account'] = self._compute_account_balance(
-                    accounts)
-                for value in res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
-            elif report.type == 'account_report' and report.account_report_id:
-                # it's the amount of the linked
-                res[report.id]['account'] = self._compute_account_balance(
-                    report.account_ids)
-                for value in res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
-            elif report.type == 'sum':
-                # it's the sum of the linked accounts
-                res[report.id]['account'] = self._compute_account_balance(
-                    report.account_ids)
-                for values in res[report.id]['account'].values():
+                if report.parent_id:
+                    value = evaluate(report.parent_id)
+                    if report in cash_in:
+                        values['debit'] += value['debit']
+                        values['balance'] += value['debit']
+                    elif report in cash_out:
+                        values['credit'] += value['credit']
+                        values['balance'] += -(value['credit'])
+            elif report.id in report_accounts:
+                # it's the sum the leaf accounts with such an account type,
+                # or of the linked accounts
+                values['account'] = {
+                    account_id: dict(balances[account_id])
+                    for account_id in report_accounts[report.id].ids
+                }
+                for value in values['account'].values():
                     for field in fields:
-                        res[report.id][field] += values.get(field)
+                        values[field] += value.get(field)
+            return values
+
+        for report in reports:
+            evaluate(report)
         return res
 
     def get_account_lines(self, data):
@@ -121,12 +104,14 @@ class ReportFinancial(models.AbstractModel):
         account_report = self.env['account.financial.report'].search(
             [('id', '=', data['account_report_id'][0])])
         child_reports = account_report._get_children_by_order()
+        report_accounts = self._get_report_accounts(child_reports)
         res = self.with_context(
-            data.get('used_context'))._compute_report_balance(child_reports)
+            data.get('used_context'))._compute_report_balance(
+            child_reports, report_accounts)
         if data['enable_filter']:
             comparison_res = self.with_context(
                 data.get('comparison_context'))._compute_report_balance(
-                child_reports)
+                child_reports, report_accounts)
             for report_id, value in comparison_res.items():
                 res[report_id]['comp_bal'] = value['balance']
                 report_acc = res[report_id].get('account')
@@ -54,7 +54,20 @@ class ReportGeneralLedger(models.AbstractModel):
         move_lines = {x: [] for x in accounts.ids}
 
         # Prepare initial sql query and Get the initial move lines
+        init_totals = None
         if init_balance:
+            init_totals = self.env['account.daily.balance'].with_context(
+                date_from=self.env.context.get('date_from'), date_to=False,
+                initial_bal=True)._read_account_totals(accounts.ids)
+        if init_totals is not None:
+            for account_id, totals in init_totals.items():
+                move_lines[account_id].append(dict(
+                    totals, lid=0, ldate='', lcode='', amount_currency=0.0,
+                    lref='', lname='Initial Balance', lpartner_id='',
+                    move_name='', mmove_id='', currency_code='',
+                    currency_id=None, invoice_id='', invoice_type='',
+                    invoice_number='', partner_name=''))
+        elif init_balance:
             init_tables, init_where_clause, init_where_params = (
                 MoveLine.with_context(
                 date_from=self.env.context.get('date_from'), date_to=False,
@@ -123,12 +136,17 @@ class ReportGeneralLedger(models.AbstractModel):
         params = (tuple(accounts.ids),) + tuple(where_params)
         cr.execute(sql, params)
 
+        # Carry the running balance of each account forward in one pass,
+        # starting from its initial balance
+        running_balances = {
+            account_id: sum(line['debit'] - line['credit'] for line in lines)
+            for account_id, lines in move_lines.items()
+        }
         for row in cr.dictfetchall():
-            balance = 0
-            for line in move_lines.get(row['account_id']):
-                balance += line['debit'] - line['credit']
-            row['balance'] += balance
-            move_lines[row.pop('account_id')].append(row)
+            account_id = row.pop('account_id')
+            running_balances[account_id] += row['balance']
+            row['balance'] = running_balances[account_id]
+            move_lines[account_id].append(row)
 
         # Calculate the debit, credit and balance for Accounts
         account_res = []
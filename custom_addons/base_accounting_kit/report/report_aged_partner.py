@@ -21,7 +21,6 @@
 #############################################################################
 import time
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
 from odoo import api, models, _
 from odoo.exceptions import UserError
 from odoo.tools import float_is_zero
@@ -47,186 +46,62 @@ class ReportAgedPartnerBalance(models.AbstractModel):
         # 61 - 90  : 2018-12-09 - 2018-11-10
         # 91 - 120 : 2018-11-09 - 2018-10-11
         # +120     : 2018-10-10
-        periods = {}
-        start = datetime.strptime(date_from, "%Y-%m-%d")
-        date_from = datetime.strptime(date_from, "%Y-%m-%d").date()
-        for i in range(5)[::-1]:
-            stop = start - relativedelta(days=period_length)
-            period_name = str((5 - (i + 1)) * period_length + 1) + '-' + str(
-                (5 - i) * period_length)
-            period_stop = (start - relativedelta(days=1)).strftime('%Y-%m-%d')
-            if i == 0:
-                period_name = '+' + str(4 * period_length)
-            periods[str(i)] = {
-                'name': period_name,
-                'stop': period_stop,
-                'start': (i != 0 and stop.strftime('%Y-%m-%d') or False),
-            }
-            start = stop
         res = []
         total = []
-        cr = self.env.cr
+        date_from = datetime.strptime(date_from, "%Y-%m-%d").date()
         user_company = self.env.company
         user_currency = user_company.currency_id
-        ResCurrency = self.env['res.currency'].with_context(date=date_from)
         company_ids = self._context.get('company_ids') or [user_company.id]
         move_state = ['draft', 'posted']
         if target_move == 'posted':
             move_state = ['posted']
-        arg_list = (tuple(move_state), tuple(account_type))
-        # build the reconciliation clause to see what partner needs to be printed
-        reconciliation_clause = '(l.reconciled IS FALSE)'
-        cr.execute(
-            'SELECT debit_move_id, credit_move_id FROM account_partial_reconcile'
-            ' where max_date > %s',
-            (date_from,))
-        reconciled_after_date = []
-        for row in cr.fetchall():
-            reconciled_after_date += [row[0], row[1]]
-        if reconciled_after_date:
-            reconciliation_clause = '(l.reconciled IS FALSE OR l.id IN %s)'
-            arg_list += (tuple(reconciled_after_date),)
-        arg_list += (date_from, tuple(company_ids))
-        query = '''
-            SELECT DISTINCT l.partner_id, UPPER(res_partner.name)
-            FROM account_move_line AS l left join res_partner on l.partner_id =
-             res_partner.id, account_account, account_move am
-            WHERE (l.account_id = account_account.id)
-                AND (l.move_id = am.id)
-                AND (am.state IN %s)
-                AND (account_account.account_type IN %s)
-                AND ''' + reconciliation_clause + '''
-                AND (l.date <= %s)
-                AND l.company_id IN %s
-            ORDER BY UPPER(res_partner.name)'''
-        cr.execute(query, arg_list)
-        partners = cr.dictfetchall()
+        # Age every open item in one query, each one carrying its bucket:
+        # 0 for the items not due yet, n for the n-th period of the report.
+        # The amount is the residual at date_from, net of the partial
+        # reconciliations made until then and converted to the currency of
+        # the user company.
+        aged_lines = self.env['account.aging.engine']._get_aged_lines(
+            account_type, date_from, period_length=period_length,
+            states=move_state, company_ids=company_ids, open_at_date=True,
+            amount='residual', currency=user_currency)
         # put a total of 0
         for i in range(7):
             total.append(0)
-        # Build a string like (1,2,3) for easy use in SQL query
-        partner_ids = [partner['partner_id'] for partner in partners if
-                       partner['partner_id']]
+        partner_records = self.env['res.partner'].browse(
+            {row['partner_id'] for row in aged_lines if row['partner_id']})
+        if not partner_records:
+            return [], [], {}
+        partners = [{'partner_id': partner.id} for partner in
+                    partner_records.sorted(lambda p: (p.name or '').upper())]
+        if any(not row['partner_id'] for row in aged_lines):
+            partners.append({'partner_id': None})
         lines = dict(
             (partner['partner_id'] or False, []) for partner in partners)
-        if not partner_ids:
-            return [], [], {}
         # This dictionary will store the not due amount of all partners
         undue_amounts = {}
-        query = '''SELECT l.id
-                FROM account_move_line AS l, account_account, account_move am
-                WHERE (l.account_id = account_account.id) AND (l.move_id = am.id)
-                    AND (am.state IN %s)
-                    AND (account_account.account_type IN %s)
-                    AND (COALESCE(l.date_maturity,l.date) >= %s)\
-                    AND ((l.partner_id IN %s) OR (l.partner_id IS NULL))
-                AND (l.date <= %s)
-                AND l.company_id IN %s'''
-        cr.execute(query, (
-            tuple(move_state), tuple(account_type), date_from,
-            tuple(partner_ids), date_from, tuple(company_ids)))
-        aml_ids = cr.fetchall()
-        aml_ids = aml_ids and [x[0] for x in aml_ids] or []
-        for line in self.env['account.move.line'].browse(aml_ids):
-            partner_id = line.partner_id.id or False
-            if partner_id not in undue_amounts:
-                undue_amounts[partner_id] = 0.0
-            line_amount = ResCurrency._convert(line.balance, user_currency,
-                                               line.company_id, date_from)
-            if user_currency.is_zero(line_amount):
-                continue
-            for partial_line in line.matched_debit_ids:
-                if partial_line.max_date <= date_from:
-                    line_amount += ResCurrency._convert(
-                        from_amount=partial_line.amount,
-                        to_currency=user_currency,
-                        company=partial_line.company_id,
-                        date=date_from
-                    )
-            for partial_line in line.matched_credit_ids:
-                if partial_line.max_date <= date_from:
-                    line_amount -= ResCurrency._convert(
-                        from_amount=partial_line.amount,
-                        to_currency=user_currency,
-                        company=partial_line.company_id,
-                        date=date_from
-                    )
-            if not self.env.company.currency_id.is_zero(line_amount):
-                undue_amounts[partner_id] += line_amount
+        # history[i] = {'<partner_id>': <partner_debit-credit>}, for the
+        # period i of the report
+        history = [{} for i in range(5)]
+        move_lines = self.env['account.move.line'].browse(
+            [row['id'] for row in aged_lines])
+        for row, line in zip(aged_lines, move_lines):
+            partner_id = row['partner_id'] or False
+            if row['bucket']:
+                partners_amount = history[5 - row['bucket']]
+                period = 6 - row['bucket']
+            else:
+                partners_amount = undue_amounts
+                period = 6
+            if partner_id not in partners_amount:
+                partners_amount[partner_id] = 0.0
+            line_amount = row['amount']
+            if not user_currency.is_zero(line_amount):
+                partners_amount[partner_id] += line_amount
                 lines[partner_id].append({
                     'line': line,
                     'amount': line_amount,
-                    'period': 6,
+                    'period': period,
                 })
-        # Use one query per period and store results in history (a list variable)
-        # Each history will contain: history[1] = {'<partner_id>': <partner_debit-credit>}
-        history = []
-        for i in range(5):
-            args_list = (
-            tuple(move_state), tuple(account_type), tuple(partner_ids),)
-            dates_query = '(COALESCE(l.date_maturity,l.date)'
-            if periods[str(i)]['start'] and periods[str(i)]['stop']:
-                dates_query += ' BETWEEN %s AND %s)'
-                args_list += (
-                periods[str(i)]['start'], periods[str(i)]['stop'])
-            elif periods[str(i)]['start']:
-                dates_query += ' >= %s)'
-                args_list += (periods[str(i)]['start'],)
-            else:
-                dates_query += ' <= %s)'
-                args_list += (periods[str(i)]['stop'],)
-            args_list += (date_from, tuple(company_ids))
-            query = '''SELECT l.id
-                    FROM account_move_line AS l, account_account, account_move am
-                    WHERE (l.account_id = account_account.id) AND 
-                    (l.move_id = am.id)
-                        AND (am.state IN %s)
-                        AND (account_account.account_type IN %s)
-                        AND ((l.partner_id IN %s) OR (l.partner_id IS NULL))
-                        AND ''' + dates_query + '''
-                    AND (l.date <= %s)
-                    AND l.company_id IN %s'''
-            cr.execute(query, args_list)
-            partners_amount = {}
-            aml_ids = cr.fetchall()
-            aml_ids = aml_ids and [x[0] for x in aml_ids] or []
-            for line in self.env['account.move.line'].browse(aml_ids):
-                partner_id = line.partner_id.id or False
-                if partner_id not in partners_amount:
-                    partners_amount[partner_id] = 0.0
-                line_amount = ResCurrency._convert(
-                    from_amount=line.balance,
-                    to_currency=user_currency,
-                    company=line.company_id,
-                    date=date_from
-                )
-                if user_currency.is_zero(line_amount):
-                    continue
-                for partial_line in line.matched_debit_ids:
-                    if partial_line.max_date <= date_from:
-                        line_amount += ResCurrency._convert(
-                            from_amount=partial_line.amount,
-                            to_currency=user_currency,
-                            company=partial_line.company_id,
-                            date=date_from
-                        )
-                for partial_line in line.matched_credit_ids:
-                    if partial_line.max_date <= date_from:
-                        line_amount -= ResCurrency._convert(
-                            from_amount=partial_line.amount,
-                            to_currency=user_currency,
-                            company=partial_line.company_id,
-                            date=date_from
-                        )
-                if not self.env.company.currency_id.is_zero(
-                        line_amount):
-                    partners_amount[partner_id] += line_amount
-                    lines[partner_id].append({
-                        'line': line,
-                        'amount': line_amount,
-                        'period': i + 1,
-                    })
-            history.append(partners_amount)
         for partner in partners:
             if partner['partner_id'] is None:
                 partner['partner_id'] = False
@@ -259,8 +134,9 @@ class ReportAgedPartnerBalance(models.AbstractModel):
             total[(i + 1)] += values['total']
             values['partner_id'] = partner['partner_id']
             if partner['partner_id']:
-                browsed_partner = self.env['res.partner'].browse(
-                    partner['partner_id'])
+                browsed_partner = partner_records.browse(
+                    partner['partner_id']).with_prefetch(
+                    partner_records._prefetch_ids)
                 values['name'] = browsed_partner.name and len(
                     browsed_partner.name) >= 45 and browsed_partner.name[
                                                     0:40] + '...' or browsed_partner.name
@@ -19,6 +19,8 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+from collections import defaultdict
+
 from odoo import api, fields, models
 
 
@@ -59,14 +61,24 @@ class AccountFinancialReport(models.Model):
 
     def _get_children_by_order(self):
         """returns a recordset of all the children computed recursively,
-         and sorted by sequence. Ready for the printing"""
-        res = self
-        children = self.search([('parent_id', 'in', self.ids)],
-                               order='sequence ASC')
-        if children:
-            for child in children:
-                res += child._get_children_by_order()
-        return res
+         and sorted by sequence. Ready for the printing.
+         The reports are loaded once and walked through an adjacency map
+         of their children, instead of searching the children of every
+         report."""
+        children = defaultdict(list)
+        reports = self.search([], order='sequence ASC, id ASC')
+        for report in reports:
+            children[report.parent_id.id].append(report.id)
+
+        def walk(report_ids):
+            for report_id in report_ids:
+                res.append(report_id)
+                walk(children[report_id])
+
+        res = list(self.ids)
+        walk(report.id for report in reports
+             if report.parent_id.id in self.ids)
+        return self.browse(res)
 
     name = fields.Char('Report Name', required=True, translate=True)
     parent_id = fields.Many2one('account.financial.report',
@@ -37,7 +37,8 @@ class AssetDepreciationConfirmationWizard(models.TransientModel):
         created_move_ids = (self.env['account.asset.asset'].
                             compute_generated_entries(self.date,
                                                       asset_type=context.get(
-                                                          'asset_type')))
+                                                          'asset_type'),
+                                                      auto_commit=True))
         return {
             'name': _('Created Asset Moves') if context.get('asset_type') ==
                                                 'purchase' else _(
@@ -49,3 +50,17 @@ class AssetDepreciationConfirmationWizard(models.TransientModel):
                 str(id) for id in created_move_ids) + "])]",
             'type': 'ir.actions.act_window',
         }
+
+    def asset_compute_background(self):
+        """Generate the entries in a depreciation run processed by the
+        background workers, and open the run"""
+        self.ensure_one()
+        run = self.env['account.asset.depreciation.run'].enqueue_run(
+            self.date, asset_type=self._context.get('asset_type'))
+        return {
+            'name': _('Depreciation Run'),
+            'view_mode': 'form',
+            'res_model': 'account.asset.depreciation.run',
+            'res_id': run.id,
+            'type': 'ir.actions.act_window',
+        }
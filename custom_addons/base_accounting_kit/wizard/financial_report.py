@@ -20,8 +20,18 @@
 #
 #############################################################################
 import re
+from collections import defaultdict
 from odoo import api, models, fields
 
+# Account types summed by the 'account_type' reports with these names.
+REPORT_NAME_ACCOUNT_TYPES = {
+    'Expenses': ['expense', 'expense_depreciation', 'expense_direct_cost'],
+    'Liability': ['liability_payable', 'equity', 'liability_current',
+                  'liability_non_current'],
+    'Assets': ['asset_receivable', 'asset_cash', 'asset_current',
+               'asset_non_current', 'asset_prepayments', 'asset_fixed'],
+}
+
 
 class FinancialReport(models.TransientModel):
     _name = "financial.report"
@@ -144,109 +154,79 @@ class FinancialReport(models.TransientModel):
             'base_accounting_kit.financial_report_pdf').report_action(self,
                                                                       data)
 
-    def _compute_account_balance(self, accounts):
-        """ compute the balance, debit
-        and credit for the provided accounts
-        """
-        mapping = {
-            'balance':
-                "COALESCE(SUM(debit),0) - COALESCE(SUM(credit), 0)"
-                " as balance",
-            'debit': "COALESCE(SUM(debit), 0) as debit",
-            'credit': "COALESCE(SUM(credit), 0) as credit",
+    def _get_report_accounts(self, reports):
+        """returns a dictionary with key=the ID of every record of type
+        'accounts' or 'account_type' the reports depend on and value=its
+        accounts. The accounts of all the account types are searched at
+        once."""
+        engine = self.env['account.financial.report.engine']
+        closure = engine._get_report_closure(reports)
+        report_types = {
+            report.id: REPORT_NAME_ACCOUNT_TYPES.get(
+                report.name, [report.account_type_ids])
+            for report in closure if report.type == 'account_type'
         }
-        res = {}
-        for account in accounts:
-            res[account.id] = dict((fn, 0.0)
-                                   for fn in mapping.keys())
-        if accounts:
-            tables, where_clause, where_params = (
-                self.env['account.move.line']._query_get())
-            tables = tables.replace(
-                '"', '') if tables else "account_move_line"
-            wheres = [""]
-            if where_clause.strip():
-                wheres.append(where_clause.strip())
-            filters = " AND ".join(wheres)
-            request = ("SELECT account_id as id, " +
-                       ', '.join(mapping.values()) +
-                       " FROM " + tables +
-                       " WHERE account_id IN %s " +
-                       filters +
-                       " GROUP BY account_id")
-            params = (tuple(accounts._ids),) + tuple(where_params)
-            self.env.cr.execute(request, params)
-            for row in self.env.cr.dictfetchall():
-                res[row['id']] = row
-        return res
+        type_accounts = engine._get_type_accounts(
+            account_type for account_types in report_types.values()
+            for account_type in account_types)
+        report_accounts = {}
+        for report in closure:
+            if report.type == 'accounts':
+                report_accounts[report.id] = report.account_ids
+            elif report.type == 'account_type':
+                report_accounts[report.id] = self.env[
+                    'account.account'].union(*(
+                        type_accounts[account_type]
+                        for account_type in report_types[report.id]))
+        return report_accounts
 
-    def _compute_report_balance(self, reports):
+    def _compute_report_balance(self, reports, report_accounts=None):
         """returns a dictionary with key=the ID of a record and
          value=the credit, debit and balance amount
-        computed for this record. If the record is of type :
-        'accounts' : it's the sum of the linked accounts
-        'account_type' : it's the sum of leaf accounts with
+        computed for this record. If the record is of type :
+        'accounts' : it's the sum of the linked accounts
+        'account_type' : it's the sum of leaf accounts with
          such an account_type
-        'account_report' : it's the amount of the related report
-        'sum' : it's the sum of the children of this record
-         (aka a 'view' record)"""
+        'account_report' : it's the amount of the related report
+        'sum' : it's the sum of the children of this record
+         (aka a 'view' record)
+        The balances of all the leaf accounts are read in one query, then
+        every record is computed once, after the records it depends on."""
+        if report_accounts is None:
+            report_accounts = self._get_report_accounts(reports)
+        balances = self.env[
+            'account.financial.report.engine']._get_account_balances(
+            self.env['account.account'].union(*report_accounts.values()))
         res = {}
         fields = ['credit', 'debit', 'balance']
-        for report in reports:
+
+        def evaluate(report):
             if report.id in res:
-                continue
-            res[report.id] = dict((fn, 0.0) for fn in fields)
-            if report.type == 'accounts':
+                return res[report.id]
+            values = res[report.id] = dict((fn, 0.0) for fn in fields)
+            if report.id in report_accounts:
                 # it's the sum of the linked accounts
-                res[report.id]['account'] = self._compute_account_balance(
-                    report.account_ids
-                )
-                for value in \
-                        res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
-            elif report.type == 'account_type':
-                # it's the sum the leaf accounts
-                #  with such an account type
-                accounts = self.env['account.account'].search([
-                    ('account_type', '=', report.account_type_ids)
-                ])
-                if report.name == "Expenses":
-                    accounts = self.env['account.account'].search([
-                        ('account_type', 'in', ["expense",
-                                                "expense_depreciation",
-                                                "expense_direct_cost"])
-                    ])
-                if report.name == "Liability":
-                    accounts = self.env['account.account'].search([
-                        ('account_type', 'in',
-                         ["liability_payable", "equity", "liability_current",
-                          "liability_non_current"])
-                    ])
-                if report.name == "Assets":
-                    accounts = self.env['account.account'].search([
-                        ('account_type', 'in',
-                         ["asset_receivable", "asset_cash", "asset_current",
-                          "asset_non_current", "asset_prepayments",
-                          "asset_fixed"])
-                    ])
-                res[report.id]['account'] = self._compute_account_balance(
-                    accounts)
-                for value in res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
+                values['account'] = {
+                    account_id: dict(balances[account_id])
+                    for account_id in report_accounts[report.id].ids
+                }
+                dependencies = values['account'].values()
             elif report.type == 'account_report' and report.account_report_id:
                 # it's the amount of the linked report
-                res2 = self._compute_report_balance(report.account_report_id)
-                for key, value in res2.items():
-                    for field in fields:
-                        res[report.id][field] += value[field]
+                dependencies = [evaluate(report.account_report_id)]
             elif report.type == 'sum':
                 # it's the sum of the children of this account.report
-                res2 = self._compute_report_balance(report.children_ids)
-                for key, value in res2.items():
-                    for field in fields:
-                        res[report.id][field] += value[field]
+                dependencies = [evaluate(child)
+                                for child in report.children_ids]
+            else:
+                dependencies = []
+            for value in dependencies:
+                for field in fields:
+                    values[field] += value[field]
+            return values
+
+        for report in reports:
+            evaluate(report)
         return res
 
     def get_account_lines(self, data):
@@ -255,10 +235,13 @@ class FinancialReport(models.TransientModel):
             ('id', '=', data['account_report_id'][0])
         ])
         child_reports = account_report._get_children_by_order()
+        report_accounts = self._get_report_accounts(child_reports)
         res = self.with_context(
-            data.get('used_context'))._compute_report_balance(child_reports)
+            data.get('used_context'))._compute_report_balance(
+            child_reports, report_accounts)
         if data['enable_filter']:
-            comparison_res = self._compute_report_balance(child_reports)
+            comparison_res = self._compute_report_balance(child_reports,
+                                                          report_accounts)
             for report_id, value in comparison_res.items():
                 res[report_id]['comp_bal'] = value['balance']
                 report_acc = res[report_id].get('account')
@@ -357,49 +340,43 @@ class FinancialReport(models.TransientModel):
         return lines
 
     def find_journal_items(self, report_lines, form):
+        """Return the journal items of the account lines of the report.
+        The items of all the accounts are fetched in one query."""
         cr = self.env.cr
         journal_items = []
+        account_ids = {i['account'] for i in report_lines
+                       if i['type'] == 'account'}
+        if not account_ids:
+            return journal_items
+        search_query = ("select aml.id, am.id as j_id, "
+                        "aml.account_id, aml.date, aml.name as "
+                        "label, am.name, (aml.debit-aml.credit) as "
+                        "balance, aml.debit, aml.credit, "
+                        "aml.partner_id "
+                        "from account_move_line aml "
+                        "join account_move am on (aml.move_id=am.id) "
+                        "where aml.account_id in %s")
+        vals = [tuple(account_ids)]
+        if form['target_move'] == 'posted':
+            search_query += " and am.state=%s"
+            vals.append(form['target_move'])
+        if form['date_from']:
+            search_query += " and aml.date>=%s"
+            vals.append(form['date_from'])
+        if form['date_to']:
+            search_query += " and aml.date<=%s"
+            vals.append(form['date_to'])
+        search_query += " order by aml.account_id, aml.date, aml.id"
+        cr.execute(search_query, tuple(vals))
+        account_items = defaultdict(list)
+        for item in cr.dictfetchall():
+            account_items[item['account_id']].append(item)
         for i in report_lines:
             if i['type'] == 'account':
-                account = i['account']
-                if form['target_move'] == 'posted':
-                    search_query = ("select aml.id, am.id as j_id, "
-                                    "aml.account_id, aml.date, aml.name as "
-                                    "label, am.name, (aml.debit-aml.credit) as "
-                                    "balance, aml.debit, aml.credit, "
-                                    "aml.partner_id  from "
-                                    "account_move_line aml "
-                                    "join account_move am on (aml.move_id=am.id"
-                                    " and am.state=%s) where aml.account_id=%s")
-                    vals = [form['target_move']]
-                else:
-                    search_query = ("select aml.id, am.id as j_id, "
-                                    "aml.account_id, aml.date, aml.name as "
-                                    "label, am.name, (aml.debit-aml.credit) as "
-                                    "balance, aml.debit, aml.credit, "
-                                    "aml.partner_id from account_move_line aml"
-                                    " join account_move am on "
-                                    "(aml.move_id=am.id) where "
-                                    "aml.account_id=%s")
-                    vals = []
-                if form['date_from'] and form['date_to']:
-                    search_query += " and aml.date>=%s and aml.date<=%s"
-                    vals += [account, form['date_from'], form['date_to']]
-                elif form['date_from']:
-                    search_query += " and aml.date>=%s"
-                    vals += [account, form['date_from']]
-                elif form['date_to']:
-                    search_query += " and aml.date<=%s"
-                    vals += [account, form['date_to']]
-                else:
-                    vals += [account]
-                cr.execute(search_query, tuple(vals))
-                items = cr.dictfetchall()
-                for j in items:
-                    temp = j['id']
+                for item in account_items[i['account']]:
+                    j = dict(item)
                     j['id'] = re.sub('[^0-9a-zA-Z]+', '',
-                                     i['name']) + str(
-                        temp)
+                                     i['name']) + str(item['id'])
                     j['p_id'] = str(i['a_id'])
                     j['type'] = 'journal_item'
                     journal_items.append(j)
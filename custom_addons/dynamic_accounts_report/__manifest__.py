@@ -35,7 +35,10 @@
     'depends': ['base_accounting_kit'],
     'data': [
         'security/ir.model.access.csv',
+        'security/account_report_job_security.xml',
+        'data/account_report_job_data.xml',
         'views/accounting_report_views.xml',
+        'views/account_report_job_views.xml',
         'report/trial_balance.xml',
         'report/general_ledger_templates.xml',
         'report/financial_report_template.xml',
@@ -60,6 +63,7 @@
             'dynamic_accounts_report/static/src/xml/aged_receivable_report_views.xml',
             'dynamic_accounts_report/static/src/xml/tax_report_views.xml',
             'dynamic_accounts_report/static/src/css/accounts_report.css',
+            'dynamic_accounts_report/static/src/js/report_job.js',
             'dynamic_accounts_report/static/src/js/general_ledger.js',
             'dynamic_accounts_report/static/src/js/trial_balance.js',
             'dynamic_accounts_report/static/src/js/cash_flow.js',
@@ -20,11 +20,18 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ################################################################################
+from . import account_ledger_engine
+from . import account_report_xlsx
+from . import account_report_job
+from . import account_report_cache
+from . import account_daily_balance
+from . import account_move_line
 from . import account_general_ledger
 from . import account_partner_ledger
 from . import account_trial_balance
 from . import aged_payable_report
 from . import aged_receivable_report
+from . import account_liquidity_book
 from . import bank_book_report
 from . import cash_book_report
 from . import dynamic_balance_sheet_report
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>).
+#    Author: Ammu Raj (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+from odoo import api, models
+
+
+class AccountDailyBalance(models.Model):
+    """Outdate the cached report results along with the daily balances"""
+    _inherit = 'account.daily.balance'
+
+    @api.model
+    def _apply_balance_deltas(self, snapshots):
+        """
+        Insert the balance differences of the given journal items and log
+        the days they changed for the report result cache.
+
+        :param dict snapshots: See base _apply_balance_deltas.
+        :return: The (account_id, date) pairs whose balances changed.
+        :rtype: set
+        """
+        keys = super()._apply_balance_deltas(snapshots)
+        self.env['account.report.cache']._log_changes(keys)
+        return keys
@@ -19,14 +19,8 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ################################################################################
-import io
 import json
-import calendar
-from dateutil.relativedelta import relativedelta
-import xlsxwriter
 from odoo import api, fields, models
-from datetime import datetime
-from odoo.tools import date_utils
 
 
 class AccountGeneralLedger(models.TransientModel):
@@ -37,7 +31,10 @@ class AccountGeneralLedger(models.TransientModel):
     @api.model
     def view_report(self, option, tag):
         """
-        Retrieve partner ledger report data based on options and tags.
+        Retrieve the general ledger account headers based on options and tags.
+
+        Only the per-account totals are returned, the journal items of an
+        account are loaded on demand through get_account_lines.
 
         :param option: The options to filter the report data.
         :type option: str
@@ -45,44 +42,17 @@ class AccountGeneralLedger(models.TransientModel):
         :param tag: The tag to filter the report data.
         :type tag: str
 
-        :return: A dictionary containing the partner ledger report data.
+        :return: A dictionary containing the general ledger report data.
         :rtype: dict
         """
-        account_dict = {}
-        account_totals = {}
-        move_line_ids = self.env['account.move.line'].search(
-            [('parent_state', '=', 'posted')])
-        account_ids = move_line_ids.mapped('account_id')
-        account_dict['journal_ids'] = self.env['account.journal'].search_read(
-            [], ['name'])
-        account_dict['analytic_ids'] = self.env[
-            'account.analytic.account'].search_read(
-            [], ['name'])
-        for account in account_ids:
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.account_id == account)
-            move_line_list = []
-            for move_line in move_line_id:
-                move_line_data = move_line.read(
-                    ['date', 'name', 'move_name', 'debit', 'credit',
-                     'partner_id', 'account_id', 'journal_id', 'move_id',
-                     'analytic_line_ids'])
-                move_line_list.append(move_line_data)
-            account_dict[account.display_name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            account_totals[account.display_name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
-                'currency_id': currency_id,
-                'account_id': account.id}
-            account_dict['account_totals'] = account_totals
-        return account_dict
+        return self._get_ledger_data(
+            self.env['account.ledger.engine']._compile_filters())
 
     @api.model
     def get_filter_values(self, journal_id, date_range, options, analytic,
                           method):
         """
-        Retrieve filtered values for the partner ledger report.
+        Retrieve filtered account headers for the general ledger report.
 
         :param journal_id: The journal IDs to filter the report data.
         :type journal_id: list
@@ -99,111 +69,135 @@ class AccountGeneralLedger(models.TransientModel):
         :param analytic: The analytic IDs to filter the report data.
         :type analytic: list
 
-        :return: A dictionary containing the filtered values for the partner
+        :return: A dictionary containing the filtered values for the general
         ledger report.
         :rtype: dict
         """
-        account_dict = {}
+        return self._get_ledger_data(self._get_ledger_filters(
+            journal_id, date_range, options, analytic, method))
+
+    @api.model
+    def get_account_lines(self, account_id, journal_id, date_range, options,
+                          analytic, method, after=False):
+        """
+        Retrieve one page of journal items of an account, used when the
+        account is unfolded in the report.
+
+        :param int account_id: The account to load the journal items of.
+        :param after: Key [date, id] of the last journal item already
+                      loaded, False for the first page.
+        :return: A dictionary with the 'lines' of the page and the
+                 'next_key' to request the following one, False when the
+                 account has no more journal items.
+        :rtype: dict
+        """
+        engine = self.env['account.ledger.engine']
+        where_clause, where_params = engine._get_filter_clause(
+            self._get_ledger_filters(journal_id, date_range, options,
+                                     analytic, method))
+        rows, next_key = engine._get_group_page(
+            'account_id', account_id, where_clause, where_params, after=after)
+        lines = engine._format_lines(rows, self._get_line_fields())
+        return {'lines': [[line] for line in lines], 'next_key': next_key}
+
+    @api.model
+    def get_report_data(self, journal_id, date_range, options, analytic,
+                        method):
+        """
+        Retrieve the general ledger with the journal items of every account,
+        as needed to print the report.
+
+        :return: A dictionary in the format of get_filter_values, with the
+                 journal items of each account filled in.
+        :rtype: dict
+        """
+        filters = self._get_ledger_filters(journal_id, date_range, options,
+                                           analytic, method)
+        return self._get_ledger_data(filters, with_lines=True)
+
+    @api.model
+    def _get_ledger_filters(self, journal_id, date_range, options, analytic,
+                            method):
+        """
+        Compile the filters of the general ledger widget for the ledger
+        engine.
+
+        :rtype: ReportFilters
+        """
+        return self.env['account.ledger.engine']._compile_filters(
+            date_range=date_range, options=options, method=method,
+            journal_ids=journal_id, analytic_ids=analytic)
+
+    @api.model
+    def _get_line_fields(self):
+        """Return the journal item fields displayed by the general ledger."""
+        return ['date', 'name', 'move_name', 'debit', 'credit', 'partner_id',
+                'account_id', 'journal_id', 'move_id', 'analytic_line_ids']
+
+    @api.model
+    def _get_ledger_data(self, filters, with_lines=False):
+        """
+        Build the general ledger payload with the ledger engine.
+
+        Account totals come from one grouped query. When requested, the
+        journal items of all accounts come from one ordered query, instead of
+        filtering the whole ledger once per account.
+
+        :param ReportFilters filters: Filters compiled by
+                                      ``account.ledger.engine``.
+        :param bool with_lines: Whether to fill in the journal items of every
+                                account, otherwise their lists are empty.
+        :return: A dictionary with the journal items of each account keyed by
+                 account display name, plus 'account_totals', 'journal_ids'
+                 and 'analytic_ids'.
+        :rtype: dict
+        """
+        engine = self.env['account.ledger.engine']
+        where_clause, where_params = engine._get_filter_clause(filters)
+        totals = engine._get_group_totals(
+            'account_id', where_clause, where_params,
+            table=engine._get_totals_table(filters))
+        account_names = engine._get_display_names(
+            'account.account', (total['group_id'] for total in totals))
+        account_dict = {
+            'journal_ids': self.env['account.journal'].search_read(
+                [], ['name']),
+            'analytic_ids': self.env[
+                'account.analytic.account'].search_read([], ['name']),
+        }
         account_totals = {}
-        today = fields.Date.today()
-        quarter_start, quarter_end = date_utils.get_quarter(today)
-        previous_quarter_start = quarter_start - relativedelta(months=3)
-        previous_quarter_end = quarter_start - relativedelta(days=1)
-        if options == {}:
-            options = None
-        if options is None:
-            option_domain = ['posted']
-        elif 'draft' in options:
-            option_domain = ['posted', 'draft']
-        domain = [('journal_id', 'in', journal_id),
-                  ('parent_state', 'in', option_domain), ] if journal_id else [
-            ('parent_state', 'in', option_domain), ]
-        if method == {}:
-            method = None
-        if method is not None and 'cash' in method:
-            domain += [('journal_id', 'in',
-                        self.env.company.tax_cash_basis_journal_id.ids), ]
-        if analytic:
-            analytic_line = self.env['account.analytic.line'].search(
-                [('account_id', 'in', analytic)]).mapped('id')
-            domain += [('analytic_line_ids', 'in', analytic_line)]
-        if date_range:
-            if date_range == 'month':
-                domain += [('date', '>=', today.replace(day=1)),
-                           ('date', '<=', today)]
-            elif date_range == 'year':
-                domain += [('date', '>=', today.replace(month=1, day=1)),
-                           ('date', '<=', today)]
-            elif date_range == 'quarter':
-                domain += [('date', '>=', quarter_start),
-                           ('date', '<=', quarter_end)]
-            elif date_range == 'last-month':
-                last_month_start = today.replace(day=1) - relativedelta(
-                    months=1)
-                last_month_end = last_month_start + relativedelta(
-                    day=calendar.monthrange(last_month_start.year,
-                                            last_month_start.month)[
-                        1])
-                domain += [('date', '>=', last_month_start),
-                           ('date', '<=', last_month_end)]
-            elif date_range == 'last-year':
-                last_year_start = today.replace(month=1,
-                                                day=1) - relativedelta(years=1)
-                last_year_end = last_year_start.replace(month=12, day=31)
-                domain += [('date', '>=', last_year_start),
-                           ('date', '<=', last_year_end)]
-            elif date_range == 'last-quarter':
-                domain += [('date', '>=', previous_quarter_start),
-                           ('date', '<=', previous_quarter_end)]
-            elif 'start_date' in date_range and 'end_date' in date_range:
-                start_date = datetime.strptime(date_range['start_date'],
-                                               '%Y-%m-%d').date()
-                end_date = datetime.strptime(date_range['end_date'],
-                                             '%Y-%m-%d').date()
-                domain += [('date', '>=', start_date),
-                           ('date', '<=', end_date)]
-            elif 'start_date' in date_range:
-                start_date = datetime.strptime(date_range['start_date'],
-                                               '%Y-%m-%d').date()
-                domain += [('date', '>=', start_date)]
-            elif 'end_date' in date_range:
-                end_date = datetime.strptime(date_range['end_date'],
-                                             '%Y-%m-%d').date()
-                domain += [('date', '<=', end_date)]
-        move_line_ids = self.env['account.move.line'].search(domain)
-        account_ids = move_line_ids.mapped('account_id')
-        account_dict['journal_ids'] = self.env['account.journal'].search_read(
-            [], ['name'])
-        account_dict['analytic_ids'] = self.env[
-            'account.analytic.account'].search_read(
-            [], ['name'])
-        for account in account_ids:
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.account_id == account)
-            move_line_list = []
-            for move_line in move_line_id:
-                move_line_data = move_line.read(
-                    ['date', 'name', 'move_name', 'debit', 'credit',
-                     'partner_id', 'account_id', 'journal_id', 'move_id',
-                     'analytic_line_ids'])
-                move_line_list.append(move_line_data)
-            account_dict[account.display_name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            account_totals[account.display_name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
+        currency_id = self.env.company.currency_id.symbol
+        for total in totals:
+            account_name = account_names[total['group_id']]
+            account_dict[account_name] = []
+            account_totals[account_name] = {
+                'total_debit': round(total['debit'], 2),
+                'total_credit': round(total['credit'], 2),
+                'line_count': total['line_count'],
                 'currency_id': currency_id,
-                'account_id': account.id}
+                'account_id': total['group_id']}
+        if with_lines:
+            rows = engine._get_group_lines('account_id', where_clause,
+                                           where_params)
+            for line in engine._format_lines(rows, self._get_line_fields()):
+                account_dict[account_names[line['account_id'][0]]].append(
+                    [line])
+        if account_totals:
             account_dict['account_totals'] = account_totals
         return account_dict
 
     @api.model
     def get_xlsx_report(self, data, response, report_name, report_action):
         """
-        Generate an XLSX report based on the provided data and write it to the
-        response stream.
+        Generate an XLSX report from the report filters and stream it to the
+        response.
 
-        :param data: The data used to generate the report.
+        The ledger is rebuilt on the server and the journal items of each
+        account are written page by page, so that the export runs in
+        constant memory whatever the number of journal items.
+
+        :param data: The display values of the filters under 'filters' and
+                     the arguments of get_filter_values under 'args'.
         :type data: str (JSON format)
 
         :param response: The response object to write the generated report to.
@@ -213,8 +207,13 @@ class AccountGeneralLedger(models.TransientModel):
         :type report_name: str
         """
         data = json.loads(data)
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        xlsx = self.env['account.report.xlsx']
+        engine = self.env['account.ledger.engine']
+        filters = self._get_ledger_filters(*data['args'])
+        where_clause, where_params = engine._get_filter_clause(filters)
+        account_totals = self._get_ledger_data(filters).get(
+            'account_totals', {})
+        workbook, output = xlsx._create_workbook()
         start_date = data['filters']['start_date'] if \
             data['filters']['start_date'] else ''
         end_date = data['filters']['end_date'] if \
@@ -245,85 +244,68 @@ class AccountGeneralLedger(models.TransientModel):
         sheet.set_column(3, 3, 15)
         col = 0
         sheet.write('A1:b1', report_name, head)
-        sheet.write('B3:b4', 'Date Range', filter_head)
-        sheet.write('B4:b4', 'Journals', filter_head)
-        sheet.write('B5:b4', 'Analytic', filter_head)
-        sheet.write('B6:b4', 'Options', filter_head)
-        if start_date or end_date:
-            sheet.merge_range('C3:G3', f"{start_date} to {end_date}",
-                              filter_body)
-        if data['filters']['journal']:
-            display_names = [journal for
-                             journal in data['filters']['journal']]
-            display_names_str = ', '.join(display_names)
-            sheet.merge_range('C4:G4', display_names_str, filter_body)
-        if data['filters']['analytic']:
-            display_names = [analytic for
-                             analytic in data['filters']['analytic']]
-            account_keys_str = ', '.join(display_names)
-            sheet.merge_range('C5:G5', account_keys_str, filter_body)
-        if data['filters']['options']:
-            option_keys = list(data['filters']['options'].keys())
-            option_keys_str = ', '.join(option_keys)
-            sheet.merge_range('C6:G6', option_keys_str, filter_body)
-        if data:
-            if report_action == 'dynamic_accounts_report.action_general_ledger':
-                sheet.write(8, col, ' ', sub_heading)
-                sheet.write(8, col + 1, 'Date', sub_heading)
-                sheet.merge_range('C9:E9', 'Communication', sub_heading)
-                sheet.merge_range('F9:G9', 'Partner', sub_heading)
-                sheet.merge_range('H9:I9', 'Debit', sub_heading)
-                sheet.merge_range('J9:K9', 'Credit', sub_heading)
-                sheet.merge_range('L9:M9', 'Balance', sub_heading)
-                row = 8
-                for account in data['account']:
-                    row += 1
-                    sheet.write(row, col, account, txt_name)
-                    sheet.write(row, col + 1, ' ', txt_name)
-                    sheet.merge_range(row, col + 2, row, col + 4, ' ', txt_name)
-                    sheet.merge_range(row, col + 5, row, col + 6, ' ',
-                                      txt_name)
-                    sheet.merge_range(row, col + 7, row, col + 8,
-                                      data['total'][account]['total_debit'],
-                                      txt_name)
-                    sheet.merge_range(row, col + 9, row, col + 10,
-                                      data['total'][account]['total_credit'],
-                                      txt_name)
-                    sheet.merge_range(row, col + 11, row, col + 12,
-                                      data['total'][account]['total_debit'] -
-                                      data['total'][account]['total_credit'],
-                                      txt_name)
-                    for rec in data['data'][account]:
+        xlsx._write_filter_header(sheet, [
+            ('Date Range', f"{start_date} to {end_date}"
+             if start_date or end_date else ''),
+            ('Journals', ', '.join(data['filters']['journal'] or [])),
+            ('Analytic', ', '.join(data['filters']['analytic'] or [])),
+            ('Options', ', '.join(data['filters']['options'] or [])),
+        ], filter_head, filter_body)
+        if report_action == 'dynamic_accounts_report.action_general_ledger':
+            sheet.write(8, col, ' ', sub_heading)
+            sheet.write(8, col + 1, 'Date', sub_heading)
+            sheet.merge_range('C9:E9', 'Communication', sub_heading)
+            sheet.merge_range('F9:G9', 'Partner', sub_heading)
+            sheet.merge_range('H9:I9', 'Debit', sub_heading)
+            sheet.merge_range('J9:K9', 'Credit', sub_heading)
+            sheet.merge_range('L9:M9', 'Balance', sub_heading)
+            row = 8
+            for account, total in account_totals.items():
+                row += 1
+                sheet.write(row, col, account, txt_name)
+                sheet.write(row, col + 1, ' ', txt_name)
+                sheet.merge_range(row, col + 2, row, col + 4, ' ', txt_name)
+                sheet.merge_range(row, col + 5, row, col + 6, ' ', txt_name)
+                sheet.merge_range(row, col + 7, row, col + 8,
+                                  total['total_debit'], txt_name)
+                sheet.merge_range(row, col + 9, row, col + 10,
+                                  total['total_credit'], txt_name)
+                sheet.merge_range(row, col + 11, row, col + 12,
+                                  total['total_debit'] -
+                                  total['total_credit'], txt_name)
+                for rows in engine._iter_group_pages(
+                        'account_id', total['account_id'], where_clause,
+                        where_params):
+                    for line in engine._format_lines(
+                            rows, self._get_line_fields()):
                         row += 1
-                        partner = rec[0]['partner_id']
+                        partner = line['partner_id']
                         name = partner[1] if partner else None
-                        sheet.write(row, col, rec[0]['move_name'], txt_name)
-                        sheet.write(row, col + 1, rec[0]['date'], txt_name)
+                        sheet.write(row, col, line['move_name'], txt_name)
+                        sheet.write(row, col + 1,
+                                    fields.Date.to_string(line['date']),
+                                    txt_name)
                         sheet.merge_range(row, col + 2, row, col + 4,
-                                          rec[0]['name'], txt_name)
+                                          line['name'], txt_name)
                         sheet.merge_range(row, col + 5, row, col + 6, name,
                                           txt_name)
                         sheet.merge_range(row, col + 7, row, col + 8,
-                                          rec[0]['debit'],
-                                          txt_name)
+                                          line['debit'], txt_name)
                         sheet.merge_range(row, col + 9, row, col + 10,
-                                          rec[0]['credit'], txt_name)
+                                          line['credit'], txt_name)
                         sheet.merge_range(row, col + 11, row, col + 12, ' ',
                                           txt_name)
-                row += 1
-                sheet.merge_range(row, col, row, col + 6, 'Total',
-                                  filter_head)
-                sheet.merge_range(row, col + 7, row, col + 8,
-                                  data['grand_total']['total_debit'],
-                                  filter_head)
-                sheet.merge_range(row, col + 9, row, col + 10,
-                                  data['grand_total']['total_credit'],
-                                  filter_head)
-                sheet.merge_range(row, col + 11, row, col + 12,
-                                  float(data['grand_total']['total_debit']) -
-                                  float(data['grand_total']['total_credit']),
-                                  filter_head)
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
+            total_debit = round(sum(
+                total['total_debit'] for total in account_totals.values()), 2)
+            total_credit = round(sum(
+                total['total_credit'] for total in account_totals.values()),
+                2)
+            row += 1
+            sheet.merge_range(row, col, row, col + 6, 'Total', filter_head)
+            sheet.merge_range(row, col + 7, row, col + 8, total_debit,
+                              filter_head)
+            sheet.merge_range(row, col + 9, row, col + 10, total_credit,
+                              filter_head)
+            sheet.merge_range(row, col + 11, row, col + 12,
+                              total_debit - total_credit, filter_head)
+        xlsx._stream_workbook(workbook, output, response)
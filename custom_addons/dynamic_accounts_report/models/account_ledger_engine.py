@@ -0,0 +1,675 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>).
+#    Author: Ammu Raj (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+import datetime
+from typing import NamedTuple, Optional
+from dateutil.relativedelta import relativedelta
+from odoo import api, fields, models
+from odoo.tools import date_utils
+
+# Columns of account_move_line a ledger can be grouped on. Only these values
+# are ever interpolated into the SQL text.
+LEDGER_GROUP_FIELDS = ('account_id', 'partner_id', 'journal_id')
+# Number of journal items returned per page when a group is expanded.
+LEDGER_PAGE_SIZE = 80
+# Number of groups returned per page of a ledger header.
+LEDGER_GROUP_PAGE_SIZE = 200
+# Number of journal items fetched per query when a ledger is exported.
+LEDGER_EXPORT_BATCH = 2000
+# Tables totals can be aggregated from, with their journal item count.
+LEDGER_TOTALS_TABLES = {
+    'account_move_line': 'COUNT(*)',
+    'account_daily_balance': 'SUM(aml.line_count)',
+}
+
+
+class ReportFilters(NamedTuple):
+    """Normalized filters of a dynamic report, see _compile_filters.
+
+    Record IDs are sorted tuples and dates are resolved, so that equal
+    filters compare and hash equal and serialize to the same cache key.
+    """
+    states: tuple = ('posted',)
+    journal_ids: tuple = ()
+    analytic_ids: tuple = ()
+    account_ids: tuple = ()
+    partner_ids: tuple = ()
+    account_types: tuple = ()
+    cash_basis: bool = False
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+
+
+class AccountLedgerEngine(models.AbstractModel):
+    """Set-based engine computing ledger totals and lines in PostgreSQL.
+
+    The dynamic ledgers used to load every journal item through the ORM and
+    filter the recordset once per account. The engine instead aggregates the
+    totals of every group in a single grouped query and fetches the lines of
+    the requested groups in one ordered pass, so the work depends on the
+    number of groups and lines returned rather than groups x lines.
+    """
+    _name = 'account.ledger.engine'
+    _description = 'Ledger Report Engine'
+
+    def init(self):
+        """Index the analytic account IDs of the journal items.
+
+        Multi-plan distributions are keyed by comma-joined IDs such as
+        "3,7", which no operator on the JSON keys matches one ID of. The
+        IDs are therefore extracted by an immutable function indexed with
+        GIN, so that the overlap filter of _get_where_clause uses it.
+        """
+        self._cr.execute("""
+            CREATE OR REPLACE FUNCTION account_analytic_distribution_ids(
+                distribution jsonb)
+            RETURNS int[] LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+                SELECT COALESCE(array_agg(DISTINCT analytic_id::int),
+                                '{}'::int[])
+                  FROM jsonb_object_keys(
+                           CASE WHEN jsonb_typeof(distribution) = 'object'
+                                THEN distribution ELSE '{}'::jsonb END)
+                           AS analytic_key,
+                       unnest(string_to_array(analytic_key, ','))
+                           AS analytic_id
+            $$;
+            CREATE INDEX IF NOT EXISTS account_move_line_analytic_ids_index
+                ON account_move_line
+                USING gin (account_analytic_distribution_ids(
+                               analytic_distribution));
+        """)
+
+    @api.model
+    def _get_date_range(self, date_range):
+        """
+        Resolve the date range sent by the report widgets.
+
+        :param date_range: Either a period keyword ('month', 'quarter',
+                           'year', 'last-month', 'last-quarter',
+                           'last-year'), years being fiscal years, or a
+                           dictionary with optional 'start_date' and
+                           'end_date' keys.
+        :type date_range: str or dict
+        :return: A tuple (date_from, date_to), False for an open bound.
+        :rtype: tuple
+        """
+        if not date_range:
+            return False, False
+        today = fields.Date.today()
+        if isinstance(date_range, str):
+            if date_range == 'month':
+                return date_utils.get_month(today)
+            if date_range == 'quarter':
+                return date_utils.get_quarter(today)
+            if date_range == 'year':
+                return self._get_fiscal_year(today)
+            if date_range == 'last-month':
+                return date_utils.get_month(today - relativedelta(months=1))
+            if date_range == 'last-quarter':
+                return date_utils.get_quarter(
+                    today - relativedelta(months=3))
+            if date_range == 'last-year':
+                return self._get_fiscal_year(
+                    self._get_fiscal_year(today)[0] - relativedelta(days=1))
+            return False, False
+        return (fields.Date.to_date(date_range.get('start_date')) or False,
+                fields.Date.to_date(date_range.get('end_date')) or False)
+
+    @api.model
+    def _get_fiscal_year(self, date):
+        """
+        Return the bounds of the fiscal year of the current company holding
+        a date.
+
+        :param date: Date within the fiscal year.
+        :return: A tuple (date_from, date_to).
+        :rtype: tuple
+        """
+        dates = self.env.company.compute_fiscalyear_dates(date)
+        return dates['date_from'], dates['date_to']
+
+    @api.model
+    def _compile_filters(self, date_range=None, options=None, method=None,
+                         journal_ids=None, analytic_ids=None,
+                         account_ids=None, partner_ids=None,
+                         account_types=None, states=None):
+        """
+        Compile the filters sent by the report widgets.
+
+        :param date_range: Date range of the report, see _get_date_range.
+        :param options: Options of the report, draft entries being included
+                        when it holds 'draft'.
+        :param method: Accounting method, the cash basis journal being
+                       reported alone when it holds 'cash'.
+        :param journal_ids: Journal IDs to restrict the items to.
+        :param analytic_ids: Analytic account IDs, the items must distribute
+                             to at least one of them.
+        :param account_ids: Account IDs to restrict the items to.
+        :param partner_ids: Partner IDs to restrict the items to.
+        :param account_types: Account types to restrict the items to.
+        :param states: Accepted states of the journal entries, overriding
+                       the options.
+        :return: The normalized filters, to pass to _get_filter_clause.
+        :rtype: ReportFilters
+        """
+        if states is None:
+            states = ('posted', 'draft') if options and 'draft' in options \
+                else ('posted',)
+        date_from, date_to = self._get_date_range(date_range)
+        return ReportFilters(
+            states=tuple(sorted(set(states))),
+            journal_ids=self._normalize_ids(journal_ids),
+            analytic_ids=self._normalize_ids(analytic_ids),
+            account_ids=self._normalize_ids(account_ids),
+            partner_ids=self._normalize_ids(partner_ids),
+            account_types=tuple(sorted(set(account_types or ()))),
+            cash_basis=bool(method) and 'cash' in method,
+            date_from=date_from or None,
+            date_to=date_to or None,
+        )
+
+    @api.model
+    def _normalize_ids(self, ids):
+        """
+        Normalize record IDs sent by the report widgets.
+
+        :param ids: A record ID, an iterable of record IDs or a falsy value.
+        :return: The sorted distinct IDs.
+        :rtype: tuple
+        """
+        if not ids:
+            return ()
+        if isinstance(ids, (int, str)):
+            ids = [ids]
+        return tuple(sorted({int(record_id) for record_id in ids}))
+
+    @api.model
+    def _get_filter_clause(self, filters):
+        """
+        Build the WHERE clause selecting the journal items matching compiled
+        filters.
+
+        :param ReportFilters filters: Filters returned by _compile_filters.
+        :return: A tuple (clause, params) using the ``aml`` table alias.
+        :rtype: tuple
+        """
+        return self._get_where_clause(**filters._asdict())
+
+    @api.model
+    def _get_where_clause(self, states=('posted',), journal_ids=None,
+                          date_from=None, date_to=None, analytic_ids=None,
+                          account_ids=None, partner_ids=None,
+                          account_types=None, cash_basis=False):
+        """
+        Build the WHERE clause selecting the journal items of a ledger.
+
+        :param states: Accepted states of the parent journal entries.
+        :param journal_ids: Journal IDs to restrict the items to.
+        :param date_from: Lower bound (inclusive) of the accounting date.
+        :param date_to: Upper bound (inclusive) of the accounting date.
+        :param analytic_ids: Analytic account IDs, the items must distribute
+                             to at least one of them.
+        :param account_ids: Account IDs to restrict the items to.
+        :param partner_ids: Partner IDs to restrict the items to.
+        :param account_types: Account types to restrict the items to.
+        :param cash_basis: Restrict the items to the cash basis journal of
+                           the company.
+        :return: A tuple (clause, params) using the ``aml`` table alias.
+        :rtype: tuple
+        """
+        clauses = ['aml.parent_state IN %s', 'aml.company_id IN %s']
+        params = [tuple(states), tuple(self.env.companies.ids)]
+        if journal_ids:
+            clauses.append('aml.journal_id IN %s')
+            params.append(tuple(journal_ids))
+        if cash_basis:
+            clauses.append('aml.journal_id IN %s')
+            params.append(tuple(
+                self.env.company.tax_cash_basis_journal_id.ids) or (None,))
+        if account_ids:
+            clauses.append('aml.account_id IN %s')
+            params.append(tuple(account_ids))
+        if partner_ids:
+            clauses.append('aml.partner_id IN %s')
+            params.append(tuple(partner_ids))
+        if account_types:
+            clauses.append('aml.account_id IN (SELECT acc.id '
+                           'FROM account_account acc '
+                           'WHERE acc.account_type IN %s)')
+            params.append(tuple(account_types))
+        if date_from:
+            clauses.append('aml.date >= %s')
+            params.append(date_from)
+        if date_to:
+            clauses.append('aml.date <= %s')
+            params.append(date_to)
+        if analytic_ids:
+            # Served by the GIN index created in init().
+            clauses.append('account_analytic_distribution_ids('
+                           'aml.analytic_distribution) && %s::int[]')
+            params.append([int(analytic_id) for analytic_id in analytic_ids])
+        return ' AND '.join(clauses), params
+
+    @api.model
+    def _get_totals_table(self, filters):
+        """
+        Return the table the totals of a ledger can be aggregated from.
+
+        The daily balances of ``account.daily.balance`` carry every column
+        _get_where_clause filters on, except the analytic distribution of the
+        items: only a filter on analytic accounts needs the journal items,
+        which it selects through the analytic index of init().
+
+        :param ReportFilters filters: Filters returned by _compile_filters.
+        :return: A key of LEDGER_TOTALS_TABLES.
+        :rtype: str
+        """
+        if filters.analytic_ids:
+            return 'account_move_line'
+        return 'account_daily_balance'
+
+    @api.model
+    def _check_totals_source(self, group_field, table):
+        """Ensure only known identifiers are interpolated into a query"""
+        if group_field not in LEDGER_GROUP_FIELDS:
+            raise ValueError("Invalid ledger grouping: %s" % group_field)
+        if table not in LEDGER_TOTALS_TABLES:
+            raise ValueError("Invalid ledger table: %s" % table)
+
+    @api.model
+    def _get_group_totals(self, group_field, where_clause, where_params,
+                          table='account_move_line'):
+        """
+        Aggregate debit and credit of the selected items per group.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param str where_clause: Clause returned by _get_where_clause.
+        :param list where_params: Parameters of the clause.
+        :param str table: Table to aggregate, see _get_totals_table.
+        :return: Rows with group_id, debit, credit and line_count, ordered by
+                 group.
+        :rtype: list
+        """
+        self._check_totals_source(group_field, table)
+        query = """
+            SELECT aml.%(group)s AS group_id,
+                   COALESCE(SUM(aml.debit), 0.0) AS debit,
+                   COALESCE(SUM(aml.credit), 0.0) AS credit,
+                   %(count)s AS line_count
+              FROM %(table)s aml
+             WHERE %(where)s
+          GROUP BY aml.%(group)s
+          ORDER BY aml.%(group)s
+        """ % {'group': group_field, 'where': where_clause, 'table': table,
+               'count': LEDGER_TOTALS_TABLES[table]}
+        self.env.cr.execute(query, where_params)
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _get_period_totals(self, group_field, periods, where_clause,
+                           where_params, initial_date=False,
+                           table='account_move_line'):
+        """
+        Aggregate debit and credit of the selected items per group and per
+        period in a single pass.
+
+        Each period is a filtered aggregate over the same scan, so adding
+        comparison periods adds columns rather than queries.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param list periods: List of (date_from, date_to) tuples, both bounds
+                             inclusive.
+        :param str where_clause: Clause returned by _get_where_clause, without
+                                 date bounds.
+        :param list where_params: Parameters of the clause.
+        :param initial_date: Items dated before it are summed in the
+                             initial_debit and initial_credit columns.
+        :param str table: Table to aggregate, see _get_totals_table.
+        :return: Rows with group_id, initial_debit, initial_credit and, for
+                 the n-th period, debit_<n> and credit_<n>, ordered by group.
+        :rtype: list
+        """
+        self._check_totals_source(group_field, table)
+        columns = []
+        params = []
+        if initial_date:
+            columns += [
+                "COALESCE(SUM(aml.debit) FILTER (WHERE aml.date < %s), 0.0) "
+                "AS initial_debit",
+                "COALESCE(SUM(aml.credit) FILTER (WHERE aml.date < %s), 0.0) "
+                "AS initial_credit",
+            ]
+            params += [initial_date, initial_date]
+        else:
+            columns += ["0.0 AS initial_debit", "0.0 AS initial_credit"]
+        for index, (date_from, date_to) in enumerate(periods):
+            for column in ('debit', 'credit'):
+                columns.append(
+                    "COALESCE(SUM(aml.%(column)s) FILTER (WHERE aml.date "
+                    "BETWEEN %%s AND %%s), 0.0) AS %(column)s_%(index)s" % {
+                        'column': column, 'index': index})
+                params += [date_from, date_to]
+        params += where_params
+        date_clause = "aml.date <= %s"
+        params.append(max(date_to for date_from, date_to in periods))
+        if not initial_date:
+            date_clause += " AND aml.date >= %s"
+            params.append(min(date_from for date_from, date_to in periods))
+        query = """
+            SELECT aml.%(group)s AS group_id, %(columns)s
+              FROM %(table)s aml
+             WHERE %(where)s AND %(dates)s
+          GROUP BY aml.%(group)s
+          ORDER BY aml.%(group)s
+        """ % {'group': group_field, 'columns': ', '.join(columns),
+               'table': table, 'where': where_clause, 'dates': date_clause}
+        self.env.cr.execute(query, params)
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _get_window_totals(self, group_field, filters, after=None,
+                           limit=None, with_opening=False):
+        """
+        Aggregate, per group, the opening totals before a date window and
+        the totals within it in a single pass, one page of groups at a time.
+
+        Only the groups with items in the window are returned, unless
+        with_opening is set, items without a group value being left out.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param ReportFilters filters: Filters returned by _compile_filters,
+                                      whose date_from and date_to bound the
+                                      window.
+        :param after: Value of the last group already loaded.
+        :param int limit: Maximum number of groups to return, all of them
+                          when not set.
+        :param bool with_opening: Whether to also return the groups with a
+                                  non-zero opening balance but no items in
+                                  the window.
+        :return: A tuple (rows, next_key), the rows holding group_id,
+                 initial_debit, initial_credit, debit, credit and
+                 line_count ordered by group, next_key being False on the
+                 last page.
+        :rtype: tuple
+        """
+        table = self._get_totals_table(filters)
+        self._check_totals_source(group_field, table)
+        date_from = filters.date_from
+        where_clause, where_params = self._get_filter_clause(
+            filters._replace(date_from=None))
+        if date_from:
+            window, initial = 'aml.date >= %s', 'aml.date < %s'
+            window_params = [date_from]
+        else:
+            window, initial = 'TRUE', 'FALSE'
+            window_params = []
+        count = LEDGER_TOTALS_TABLES[table]
+        query = """
+            SELECT aml.%(group)s AS group_id,
+                   COALESCE(SUM(aml.debit) FILTER (WHERE %(initial)s), 0.0)
+                       AS initial_debit,
+                   COALESCE(SUM(aml.credit) FILTER (WHERE %(initial)s), 0.0)
+                       AS initial_credit,
+                   COALESCE(SUM(aml.debit) FILTER (WHERE %(window)s), 0.0)
+                       AS debit,
+                   COALESCE(SUM(aml.credit) FILTER (WHERE %(window)s), 0.0)
+                       AS credit,
+                   %(count)s FILTER (WHERE %(window)s) AS line_count
+              FROM %(table)s aml
+             WHERE %(where)s AND aml.%(group)s IS NOT NULL
+        """ % {'group': group_field, 'initial': initial, 'window': window,
+               'count': count, 'table': table, 'where': where_clause}
+        params = window_params * 5 + list(where_params)
+        if after:
+            query += " AND aml.%s > %%s" % group_field
+            params.append(after)
+        having = '%s FILTER (WHERE %s) > 0' % (count, window)
+        params += window_params
+        if with_opening:
+            having += (" OR ROUND(COALESCE(SUM(aml.debit - aml.credit) "
+                       "FILTER (WHERE %s), 0.0), 2) <> 0" % initial)
+            params += window_params
+        query += """
+          GROUP BY aml.%(group)s
+            HAVING %(having)s
+          ORDER BY aml.%(group)s
+        """ % {'group': group_field, 'having': having}
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit + 1)
+        self.env.cr.execute(query, params)
+        rows = self.env.cr.dictfetchall()
+        next_key = False
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_key = rows[-1]['group_id']
+        return rows, next_key
+
+    @api.model
+    def _get_window_summary(self, group_field, filters):
+        """
+        Sum the window totals of every group, for the grand total of a
+        ledger whose groups are loaded page by page.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param ReportFilters filters: Filters returned by _compile_filters.
+        :return: A dictionary with the debit and credit of the window.
+        :rtype: dict
+        """
+        table = self._get_totals_table(filters)
+        self._check_totals_source(group_field, table)
+        where_clause, where_params = self._get_filter_clause(filters)
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(aml.debit), 0.0) AS debit,
+                   COALESCE(SUM(aml.credit), 0.0) AS credit
+              FROM %(table)s aml
+             WHERE %(where)s AND aml.%(group)s IS NOT NULL
+        """ % {'table': table, 'where': where_clause, 'group': group_field},
+            where_params)
+        return self.env.cr.dictfetchone()
+
+    @api.model
+    def _iter_window_pages(self, group_field, filters,
+                           limit=LEDGER_EXPORT_BATCH, with_opening=False):
+        """
+        Yield the window totals of the groups page by page, see
+        _get_window_totals.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param ReportFilters filters: Filters returned by _compile_filters.
+        :param int limit: Number of groups per page.
+        :param bool with_opening: See _get_window_totals.
+        :return: Generator of lists of totals rows, ordered by group.
+        """
+        after = None
+        while True:
+            rows, after = self._get_window_totals(
+                group_field, filters, after=after, limit=limit,
+                with_opening=with_opening)
+            if rows:
+                yield rows
+            if not after:
+                return
+
+    @api.model
+    def _get_line_query(self, group_field, where_clause):
+        """
+        Return the SELECT statement fetching the raw journal item rows.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param str where_clause: Clause returned by _get_where_clause.
+        :return: The query, without ordering.
+        :rtype: str
+        """
+        if group_field not in LEDGER_GROUP_FIELDS:
+            raise ValueError("Invalid ledger grouping: %s" % group_field)
+        return """
+            SELECT aml.%(group)s AS group_id, aml.id, aml.date, aml.name,
+                   aml.move_name, aml.ref, aml.debit, aml.credit,
+                   aml.amount_currency, aml.date_maturity,
+                   aml.matching_number, aml.partner_id, aml.account_id,
+                   aml.journal_id, aml.move_id, aml.currency_id,
+                   acc.code AS account_code, acc.account_type,
+                   journal.code AS journal_code,
+                   ARRAY(SELECT aal.id FROM account_analytic_line aal
+                          WHERE aal.move_line_id = aml.id
+                       ORDER BY aal.id) AS analytic_line_ids
+              FROM account_move_line aml
+              JOIN account_account acc ON acc.id = aml.account_id
+              JOIN account_journal journal ON journal.id = aml.journal_id
+             WHERE %(where)s
+        """ % {'group': group_field, 'where': where_clause}
+
+    @api.model
+    def _get_group_lines(self, group_field, where_clause, where_params):
+        """
+        Fetch the selected items of every group in one ordered pass.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param str where_clause: Clause returned by _get_where_clause.
+        :param list where_params: Parameters of the clause.
+        :return: Raw line rows ordered by group, date and id.
+        :rtype: list
+        """
+        query = self._get_line_query(group_field, where_clause) + \
+            " ORDER BY aml.%s, aml.date, aml.id" % group_field
+        self.env.cr.execute(query, where_params)
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _get_group_page(self, group_field, group_id, where_clause,
+                        where_params, after=None, limit=LEDGER_PAGE_SIZE):
+        """
+        Fetch one page of the selected items of a single group.
+
+        Pages are read with a keyset on (date, id): the next page starts
+        right after the last item of the previous one, so deep pages cost
+        the same as the first one.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param group_id: Value of the group column, False for items without
+                         one.
+        :param str where_clause: Clause returned by _get_where_clause.
+        :param list where_params: Parameters of the clause.
+        :param after: Key [date, id] of the last item already loaded.
+        :param int limit: Maximum number of items to return.
+        :return: A tuple (rows, next_key), next_key being False on the last
+                 page.
+        :rtype: tuple
+        """
+        query = self._get_line_query(group_field, where_clause)
+        params = list(where_params)
+        if group_id:
+            query += " AND aml.%s = %%s" % group_field
+            params.append(group_id)
+        else:
+            query += " AND aml.%s IS NULL" % group_field
+        if after:
+            query += " AND (aml.date, aml.id) > (%s, %s)"
+            params += [after[0], after[1]]
+        query += " ORDER BY aml.date, aml.id LIMIT %s"
+        params.append(limit + 1)
+        self.env.cr.execute(query, params)
+        rows = self.env.cr.dictfetchall()
+        next_key = False
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = [fields.Date.to_string(rows[-1]['date']),
+                        rows[-1]['id']]
+        return rows, next_key
+
+    @api.model
+    def _iter_group_pages(self, group_field, group_id, where_clause,
+                          where_params, limit=LEDGER_EXPORT_BATCH):
+        """
+        Yield the selected items of a single group page by page, so that
+        exports never hold more than one page of rows.
+
+        :param str group_field: Column to group on, see LEDGER_GROUP_FIELDS.
+        :param group_id: Value of the group column, False for items without
+                         one.
+        :param str where_clause: Clause returned by _get_where_clause.
+        :param list where_params: Parameters of the clause.
+        :param int limit: Number of items per page.
+        :return: Generator of lists of raw line rows, ordered by date and id.
+        """
+        after = None
+        while True:
+            rows, after = self._get_group_page(
+                group_field, group_id, where_clause, where_params,
+                after=after, limit=limit)
+            if rows:
+                yield rows
+            if not after:
+                return
+
+    @api.model
+    def _get_display_names(self, model_name, ids):
+        """
+        Return the display names of the given records in a single batch.
+
+        :param str model_name: Model of the records.
+        :param ids: Iterable of record IDs, falsy values are ignored.
+        :return: Mapping of record ID to display name.
+        :rtype: dict
+        """
+        records = self.env[model_name].browse(
+            {record_id for record_id in ids if record_id})
+        return {record.id: record.display_name for record in records}
+
+    @api.model
+    def _format_lines(self, rows, fields_list):
+        """
+        Convert raw line rows to the dictionaries ``read()`` would return.
+
+        Many2one values are rendered as ``(id, display_name)`` pairs, with the
+        names of each model resolved once for the whole batch.
+
+        :param list rows: Rows returned by _get_group_lines.
+        :param list fields_list: Fields to keep on each line.
+        :return: List of line dictionaries, in the order of the rows.
+        :rtype: list
+        """
+        relations = {
+            'partner_id': 'res.partner',
+            'account_id': 'account.account',
+            'journal_id': 'account.journal',
+            'currency_id': 'res.currency',
+        }
+        names = {
+            field: self._get_display_names(
+                model, (row[field] for row in rows))
+            for field, model in relations.items() if field in fields_list
+        }
+        lines = []
+        for row in rows:
+            line = {'id': row['id']}
+            for field in fields_list:
+                value = row[field]
+                if field in names:
+                    value = (value, names[field][value]) if value else False
+                elif field == 'move_id':
+                    value = (value, row['move_name'] or '/')
+                elif value is None:
+                    value = False
+                line[field] = value
+            lines.append(line)
+        return lines
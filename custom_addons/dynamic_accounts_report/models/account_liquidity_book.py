@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>).
+#    Author: Ammu Raj (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+import json
+from odoo import api, fields, models
+
+
+class AccountLiquidityBook(models.AbstractModel):
+    """Common implementation of the bank book and the cash book.
+
+    A book lists the journal items of the journals of its _journal_type, by
+    account. The opening balance and the totals of every account come from
+    one windowed query of the ledger engine, and the journal items of an
+    account are paged the same way as the other ledgers. Accounts holding
+    an opening balance are listed even without items in the period.
+    """
+    _name = 'account.liquidity.book'
+    _description = 'Liquidity Book Report'
+
+    # Type of the journals listed in the book, 'bank' or 'cash'.
+    _journal_type = None
+
+    @api.model
+    def view_report(self):
+        """
+        Retrieve the book for its initial view, with the totals of each
+        account and the 'accounts' displayed.
+        """
+        data = self._get_book_data(self._get_book_filters(
+            None, None, None, None))
+        accounts = self.env['account.account'].browse(
+            data['move_lines_total'][name]['account_id']
+            for name in data['move_lines_total'])
+        data['accounts'] = accounts.read(['display_name', 'name'])
+        return data
+
+    @api.model
+    def get_filter_values(self, partner_id, data_range, account_list, options):
+        """
+        Retrieve the book for the given filters.
+
+        :param partner_id: List of partner IDs to filter the data by.
+        :type partner_id: list
+        :param data_range: Specifies the date range filter. Possible values are
+                            'month', 'year', 'quarter', 'last-month',
+                            'last-year', 'last-quarter', or a dictionary
+                            containing 'start_date' and/or 'end_date' fields.
+        :type data_range: str or dict
+        :param account_list: List of account IDs to filter the data by.
+        :type account_list: list
+        :param options: Dictionary containing additional options for filtering
+                        the data. The 'draft' option indicates
+                        whether to include draft journal entries in the data.
+        :type options: dict
+        :return: A dictionary with the journal items of each account keyed by
+                 account display name, plus 'move_lines_total'.
+        :rtype: dict
+        """
+        return self._get_book_data(self._get_book_filters(
+            partner_id, data_range, account_list, options))
+
+    @api.model
+    def get_account_lines(self, account_id, partner_id, data_range,
+                          account_list, options, after=False):
+        """
+        Retrieve one page of journal items of an account, used when
+        the account is unfolded in the report.
+
+        :param int account_id: The account to load the journal items of.
+        :param after: Key [date, id] of the last journal item already
+                      loaded, False for the first page.
+        :return: A dictionary with the 'lines' of the page and the
+                 'next_key' to request the following one, False when the
+                 account has no more journal items.
+        :rtype: dict
+        """
+        engine = self.env['account.ledger.engine']
+        where_clause, where_params = engine._get_filter_clause(
+            self._get_book_filters(partner_id, data_range, account_list,
+                                   options))
+        rows, next_key = engine._get_group_page(
+            'account_id', account_id, where_clause, where_params,
+            after=after)
+        return {'lines': engine._format_lines(rows, self._get_line_fields()),
+                'next_key': next_key}
+
+    @api.model
+    def get_report_data(self, partner_id, data_range, account_list, options):
+        """
+        Retrieve the book with the journal items of every account, as
+        needed to print the report.
+
+        :return: A dictionary in the format of get_filter_values, with the
+                 journal items of each account filled in.
+        :rtype: dict
+        """
+        filters = self._get_book_filters(partner_id, data_range,
+                                         account_list, options)
+        return self._get_book_data(filters, with_lines=True)
+
+    @api.model
+    def _get_book_filters(self, partner_id, data_range, account_list,
+                          options):
+        """
+        Compile the filters of the book widget for the ledger engine,
+        restricted to the journals of the book.
+
+        :rtype: ReportFilters
+        """
+        journals = self.env['account.journal'].search(
+            [('type', '=', self._journal_type)])
+        return self.env['account.ledger.engine']._compile_filters(
+            date_range=data_range, options=options,
+            journal_ids=journals.ids or [0], partner_ids=partner_id,
+            account_ids=account_list)
+
+    @api.model
+    def _get_line_fields(self):
+        """
+        Return the journal item fields displayed in the book.
+
+        :rtype: list
+        """
+        return ['date', 'journal_id', 'partner_id', 'move_name', 'debit',
+                'move_id', 'credit', 'name', 'ref']
+
+    @api.model
+    def _get_book_totals(self, rows):
+        """
+        Convert the window totals of the ledger engine to the account totals
+        displayed by the book, keyed by account display name.
+
+        :param list rows: Rows returned by
+                          ``account.ledger.engine._get_window_totals``.
+        :return: Totals of each account, with its opening and closing
+                 balances.
+        :rtype: dict
+        """
+        account_names = self.env['account.ledger.engine']._get_display_names(
+            'account.account', (row['group_id'] for row in rows))
+        currency_id = self.env.company.currency_id.symbol
+        move_lines_total = {}
+        for row in rows:
+            initial_balance = round(
+                row['initial_debit'] - row['initial_credit'], 2)
+            move_lines_total[account_names[row['group_id']]] = {
+                'total_debit': round(row['debit'], 2),
+                'total_credit': round(row['credit'], 2),
+                'line_count': row['line_count'],
+                'currency_id': currency_id,
+                'account_id': row['group_id'],
+                'initial_debit': row['initial_debit'],
+                'initial_credit': row['initial_credit'],
+                'initial_balance': initial_balance,
+                'closing_balance': round(
+                    initial_balance + row['debit'] - row['credit'], 2),
+            }
+        return move_lines_total
+
+    @api.model
+    def _get_book_data(self, filters, with_lines=False):
+        """
+        Build the book payload with the ledger engine, the opening balance
+        and the totals of every account being computed in one windowed
+        query over the journals of the book.
+
+        :param ReportFilters filters: Filters compiled by
+                                      ``account.ledger.engine``.
+        :param bool with_lines: Whether to fill in the journal items of every
+                                account, otherwise their lists are empty.
+        :return: A dictionary with the journal items of each account keyed by
+                 account display name, plus 'move_lines_total'.
+        :rtype: dict
+        """
+        engine = self.env['account.ledger.engine']
+        rows = engine._get_window_totals('account_id', filters,
+                                         with_opening=True)[0]
+        move_lines_total = self._get_book_totals(rows)
+        data = {account: [] for account in move_lines_total}
+        if with_lines and rows:
+            account_names = {total['account_id']: account for account, total
+                             in move_lines_total.items()}
+            where_clause, where_params = engine._get_filter_clause(filters)
+            lines = engine._get_group_lines('account_id', where_clause,
+                                            where_params)
+            for row, line in zip(lines, engine._format_lines(
+                    lines, self._get_line_fields())):
+                data[account_names[row['group_id']]].append(line)
+        data['move_lines_total'] = move_lines_total
+        return data
+
+    @api.model
+    def get_xlsx_report(self, data, response, report_name, report_action):
+        """
+        Generate an Excel report from the report filters and stream it to
+        the response.
+
+        The book is rebuilt on the server and the journal items of each
+        account are written page by page, so that the export runs in
+        constant memory whatever the number of journal items.
+        :param data: The display values of the filters under 'filters' and
+                     the arguments of get_filter_values under 'args'.
+        :type data: str (JSON format)
+        :param response: The response object to write the report to.
+        :type response: object
+        :param report_name: The name of the report.
+        :type report_name: str
+        :return: None
+        """
+        data = json.loads(data)
+        xlsx = self.env['account.report.xlsx']
+        engine = self.env['account.ledger.engine']
+        filters = self._get_book_filters(*data['args'])
+        where_clause, where_params = engine._get_filter_clause(filters)
+        workbook, output = xlsx._create_workbook()
+        start_date = data['filters']['start_date'] if \
+            data['filters']['start_date'] else ''
+        end_date = data['filters']['end_date'] if \
+            data['filters']['end_date'] else ''
+        sheet = workbook.add_worksheet()
+        head = workbook.add_format(
+            {'align': 'center', 'bold': True, 'font_size': '15px'})
+        sub_heading = workbook.add_format(
+            {'align': 'center', 'bold': True, 'font_size': '10px',
+             'border': 1, 'bg_color': '#D3D3D3',
+             'border_color': 'black'})
+        filter_head = workbook.add_format(
+            {'align': 'center', 'bold': True, 'font_size': '10px',
+             'border': 1, 'bg_color': '#D3D3D3',
+             'border_color': 'black'})
+        filter_body = workbook.add_format(
+            {'align': 'center', 'bold': True, 'font_size': '10px'})
+        side_heading_sub = workbook.add_format(
+            {'align': 'left', 'bold': True, 'font_size': '10px',
+             'border': 1,
+             'border_color': 'black'})
+        side_heading_sub.set_indent(1)
+        txt_name = workbook.add_format({'font_size': '10px', 'border': 1})
+        txt_name.set_indent(2)
+        sheet.set_column(0, 0, 30)
+        sheet.set_column(1, 1, 20)
+        sheet.set_column(2, 2, 15)
+        sheet.set_column(3, 3, 15)
+        col = 0
+        sheet.write('A1:b1', report_name, head)
+        xlsx._write_filter_header(sheet, [
+            ('Date Range', f"{start_date} to {end_date}"
+             if start_date or end_date else ''),
+            ('Partners', ', '.join(
+                partner.get('display_name', 'undefined')
+                for partner in data['filters']['partner'] or [])),
+            ('Accounts', ', '.join(data['filters']['account'] or [])),
+            ('Options', ', '.join(data['filters']['options'] or [])),
+        ], filter_head, filter_body)
+        if report_action == 'dynamic_accounts_report.action_%s_book' % (
+                self._journal_type):
+            sheet.write(8, col, ' ', sub_heading)
+            sheet.merge_range('B9:C9', 'Journal', sub_heading)
+            sheet.merge_range('D9:E9', 'Partner', sub_heading)
+            sheet.merge_range('F9:G9', 'Ref', sub_heading)
+            sheet.merge_range('H9:I9', 'Move', sub_heading)
+            sheet.merge_range('J9:K9', 'Entry Label', sub_heading)
+            sheet.merge_range('L9:M9', 'Debit', sub_heading)
+            sheet.merge_range('N9:O9', 'Credit', sub_heading)
+            sheet.merge_range('P9:Q9', 'Balance', sub_heading)
+            row = 8
+            total_debit = total_credit = 0.0
+            initial_balance = closing_balance = 0.0
+            for totals in engine._iter_window_pages('account_id', filters,
+                                                    with_opening=True):
+                move_lines_total = self._get_book_totals(totals)
+                for total in move_lines_total.values():
+                    total_debit += total['total_debit']
+                    total_credit += total['total_credit']
+                    initial_balance += total['initial_balance']
+                    closing_balance += total['closing_balance']
+                for move_line, total in move_lines_total.items():
+                    row += 1
+                    sheet.write(row, col, move_line, txt_name)
+                    sheet.merge_range(row, col + 1, row, col + 2, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 3, row, col + 4, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 5, row, col + 6, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 7, row, col + 8, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 9, row, col + 10, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 11, row, col + 12,
+                                      total['total_debit'], txt_name)
+                    sheet.merge_range(row, col + 13, row, col + 14,
+                                      total['total_credit'], txt_name)
+                    sheet.merge_range(row, col + 15, row, col + 16,
+                                      total['total_debit'] -
+                                      total['total_credit'], txt_name)
+                    row += 1
+                    sheet.write(row, col, '', txt_name)
+                    sheet.merge_range(row, col + 1, row, col + 8, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 9, row, col + 10,
+                                      'Initial Balance', txt_name)
+                    sheet.merge_range(row, col + 11, row, col + 12,
+                                      total['initial_debit'], txt_name)
+                    sheet.merge_range(row, col + 13, row, col + 14,
+                                      total['initial_credit'], txt_name)
+                    sheet.merge_range(row, col + 15, row, col + 16,
+                                      total['initial_balance'], txt_name)
+                    for rows in engine._iter_group_pages(
+                            'account_id', total['account_id'], where_clause,
+                            where_params):
+                        for rec in engine._format_lines(
+                                rows, self._get_line_fields()):
+                            row += 1
+                            if rec['partner_id']:
+                                partner = rec['partner_id'][1]
+                            else:
+                                partner = ' '
+                            sheet.write(row, col,
+                                        fields.Date.to_string(rec['date']),
+                                        txt_name)
+                            sheet.merge_range(row, col + 1, row, col + 2,
+                                              rec['journal_id'][1], txt_name)
+                            sheet.merge_range(row, col + 3, row, col + 4,
+                                              partner, txt_name)
+                            sheet.merge_range(row, col + 5, row, col + 6,
+                                              rec['ref'], txt_name)
+                            sheet.merge_range(row, col + 7, row, col + 8,
+                                              rec['move_name'], txt_name)
+                            sheet.merge_range(row, col + 9, row, col + 10,
+                                              rec['name'], txt_name)
+                            sheet.merge_range(row, col + 11, row, col + 12,
+                                              rec['debit'], txt_name)
+                            sheet.merge_range(row, col + 13, row, col + 14,
+                                              rec['credit'], txt_name)
+                            sheet.merge_range(row, col + 15, row, col + 16,
+                                              ' ', txt_name)
+                    row += 1
+                    sheet.write(row, col, '', txt_name)
+                    sheet.merge_range(row, col + 1, row, col + 8, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 9, row, col + 10,
+                                      'Closing Balance', txt_name)
+                    sheet.merge_range(row, col + 11, row, col + 14, ' ',
+                                      txt_name)
+                    sheet.merge_range(row, col + 15, row, col + 16,
+                                      total['closing_balance'], txt_name)
+            total_debit = round(total_debit, 2)
+            total_credit = round(total_credit, 2)
+            for label, debit, credit, balance in (
+                    ('Opening Balance', ' ', ' ', initial_balance),
+                    ('Total', total_debit, total_credit,
+                     total_debit - total_credit),
+                    ('Closing Balance', ' ', ' ', closing_balance)):
+                row += 1
+                sheet.merge_range(row, col, row, col + 10, label,
+                                  filter_head)
+                sheet.merge_range(row, col + 11, row, col + 12, debit,
+                                  filter_head)
+                sheet.merge_range(row, col + 13, row, col + 14, credit,
+                                  filter_head)
+                sheet.merge_range(row, col + 15, row, col + 16,
+                                  round(balance, 2), filter_head)
+        xlsx._stream_workbook(workbook, output, response)
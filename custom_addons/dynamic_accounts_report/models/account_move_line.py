@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>).
+#    Author: Ammu Raj (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+from odoo import models
+
+
+class AccountMoveLine(models.Model):
+    """Outdate the cached report results filtered on analytic accounts"""
+    _inherit = 'account.move.line'
+
+    def write(self, vals):
+        """Log the days of the journal items whose analytic distribution
+        changes, which the daily balances do not track"""
+        if 'analytic_distribution' in vals:
+            self.env['account.report.cache']._log_changes(
+                (line.account_id.id, line.date) for line in self
+                if line.account_id and line.date)
+        return super().write(vals)
@@ -19,13 +19,9 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ################################################################################
-import io
 import json
-from dateutil.relativedelta import relativedelta
-import xlsxwriter
 from odoo import api, fields, models
-from datetime import datetime
-from odoo.tools import date_utils
+from .account_ledger_engine import LEDGER_GROUP_PAGE_SIZE
 
 
 class AccountPartnerLedger(models.TransientModel):
@@ -36,7 +32,11 @@ class AccountPartnerLedger(models.TransientModel):
     @api.model
     def view_report(self, option, tag):
         """
-        Retrieve partner-related data for generating a report.
+        Retrieve the first page of partner headers for generating a report.
+
+        Only the per-partner totals are returned, the journal items of a
+        partner are loaded on demand through get_partner_lines and the
+        following partners through get_filter_values.
 
         :param option: The option for filtering the data.
         :type option: str
@@ -47,60 +47,16 @@ class AccountPartnerLedger(models.TransientModel):
         :return: A dictionary containing the partner data for the report.
         :rtype: dict
         """
-        fiscal_year = self.env['res.company'].search([]).mapped('account_opening_date')[0].strftime('%Y-%m-%d')
-        fiscal_year_start = datetime.strptime(fiscal_year,
-                                              '%Y-%m-%d').date()
-        partner_dict = {}
-        partner_totals = {}
-        move_line_ids = self.env['account.move.line'].search(
-            [('account_type', 'in',
-              ['liability_payable', 'asset_receivable']),
-             ('parent_state', '=', 'posted')])
-        partner_ids = move_line_ids.mapped('partner_id')
-        for partner in partner_ids:
-            total_debit_balance = 0
-            total_credit_balance = 0
-            balance = 0
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.partner_id == partner)
-            move_line_list = []
-            for move_line in move_line_id:
-                if move_line.invoice_date:
-                    if move_line.invoice_date < fiscal_year_start:
-                        total_debit_balance += move_line.debit
-                        total_credit_balance += move_line.credit
-                        balance = total_debit_balance - total_credit_balance
-                move_line_data = move_line.read(
-                    ['date', 'move_name', 'account_type', 'debit', 'credit',
-                     'date_maturity', 'account_id', 'journal_id', 'move_id',
-                     'matching_number', 'amount_currency'])
-                account_code = self.env['account.account'].browse(
-                    move_line.account_id.id).code
-                journal_code = self.env['account.journal'].browse(
-                    move_line.journal_id.id).code
-                if account_code:
-                    move_line_data[0]['jrnl'] = journal_code
-                    move_line_data[0]['code'] = account_code
-                move_line_list.append(move_line_data)
-            partner_dict[partner.name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            partner_totals[partner.name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
-                'currency_id': currency_id,
-                'initial_balance': balance,
-                'partner_id': partner.id,
-                'move_name': 'Initial Balance',
-                'initial_debit': total_debit_balance,
-                'initial_credit': total_credit_balance,
-            }
-            partner_dict['partner_totals'] = partner_totals
-        return partner_dict
+        return self._get_partner_data(
+            self._get_partner_filters(None, None, None, None),
+            limit=LEDGER_GROUP_PAGE_SIZE)
 
     @api.model
-    def get_filter_values(self, partner_id, data_range, account, options):
+    def get_filter_values(self, partner_id, data_range, account, options,
+                          after=False):
         """
-        Retrieve filtered partner-related data for generating a report.
+        Retrieve one page of filtered partner headers for generating a
+        report.
 
         :param partner_id: The ID(s) of the partner(s) to filter by.
         :type partner_id: list or int
@@ -114,18 +70,67 @@ class AccountPartnerLedger(models.TransientModel):
         :param options: Additional options for filtering the data.
         :type options: dict
 
-        :return: A dictionary containing the filtered partner data.
+        :param after: ID of the last partner already loaded, False for the
+                      first page.
+        :type after: int
+
+        :return: A dictionary containing the filtered partner data, with
+                 the 'next_key' to request the following page.
+        :rtype: dict
+        """
+        return self._get_partner_data(
+            self._get_partner_filters(partner_id, data_range, account,
+                                      options),
+            after=after, limit=LEDGER_GROUP_PAGE_SIZE)
+
+    @api.model
+    def get_partner_lines(self, partner, data_range, account, options,
+                          after=False):
+        """
+        Retrieve one page of journal items of a partner, used when the
+        partner is unfolded in the report.
+
+        :param int partner: The partner to load the journal items of.
+        :param after: Key [date, id] of the last journal item already
+                      loaded, False for the first page.
+        :return: A dictionary with the 'lines' of the page and the
+                 'next_key' to request the following one, False when the
+                 partner has no more journal items.
+        :rtype: dict
+        """
+        engine = self.env['account.ledger.engine']
+        where_clause, where_params = engine._get_filter_clause(
+            self._get_partner_filters(False, data_range, account, options))
+        rows, next_key = engine._get_group_page(
+            'partner_id', partner, where_clause, where_params, after=after)
+        return {'lines': self._format_partner_lines(rows),
+                'next_key': next_key}
+
+    @api.model
+    def get_report_data(self, partner_id, data_range, account, options):
+        """
+        Retrieve the partner ledger with the journal items of every partner,
+        as needed to print the report.
+
+        :return: A dictionary in the format of get_filter_values, with the
+                 journal items of each partner filled in.
         :rtype: dict
         """
-        if options == {}:
-            options = None
-        if account == {}:
+        filters = self._get_partner_filters(partner_id, data_range, account,
+                                            options)
+        return self._get_partner_data(filters, with_lines=True)
+
+    @api.model
+    def _get_partner_filters(self, partner_id, data_range, account, options):
+        """
+        Compile the filters of the partner ledger widget for the ledger
+        engine.
+
+        :rtype: ReportFilters
+        """
+        if not account:
             account = None
         account_type_domain = []
-        if options is None:
-            option_domain = ['posted']
-        elif 'draft' in options:
-            option_domain = ['posted', 'draft']
         if account is None or (
                 'Receivable' in account and 'Payable' in account):
             account_type_domain.append('liability_payable')
@@ -134,220 +139,130 @@ class AccountPartnerLedger(models.TransientModel):
             account_type_domain.append('asset_receivable')
         elif 'Payable' in account:
             account_type_domain.append('liability_payable')
-        partner_dict = {}
+        return self.env['account.ledger.engine']._compile_filters(
+            date_range=data_range, options=options, partner_ids=partner_id,
+            account_types=account_type_domain)
+
+    @api.model
+    def _format_partner_lines(self, rows):
+        """
+        Format raw journal item rows the way the partner ledger displays
+        them, with the journal and account codes.
+
+        :param list rows: Rows returned by the ledger engine.
+        :return: List of one-element lists of line dictionaries.
+        :rtype: list
+        """
+        lines = self.env['account.ledger.engine']._format_lines(
+            rows, ['date', 'move_name', 'account_type', 'debit', 'credit',
+                   'date_maturity', 'account_id', 'journal_id', 'move_id',
+                   'matching_number', 'amount_currency', 'account_code',
+                   'journal_code'])
+        for line in lines:
+            line['jrnl'] = line.pop('journal_code')
+            line['code'] = line.pop('account_code')
+        return [[line] for line in lines]
+
+    @api.model
+    def _get_partner_totals(self, rows):
+        """
+        Convert the window totals of the ledger engine to the partner totals
+        displayed by the report, keyed by partner name.
+
+        :param list rows: Rows returned by
+                          ``account.ledger.engine._get_window_totals``.
+        :return: Totals of each partner, with its opening and closing
+                 balances.
+        :rtype: dict
+        """
+        partners = self.env['res.partner'].browse(
+            [row['group_id'] for row in rows])
+        partner_names = {partner.id: partner.name for partner in partners}
+        currency_id = self.env.company.currency_id.symbol
         partner_totals = {}
-        today = fields.Date.today()
-        quarter_start, quarter_end = date_utils.get_quarter(today)
-        previous_quarter_start = quarter_start - relativedelta(months=3)
-        previous_quarter_end = quarter_start - relativedelta(days=1)
-        if not partner_id:
-            partner_id = self.env['account.move.line'].search([(
-                'account_type', 'in', account_type_domain),
-                ('parent_state', 'in', option_domain)]).mapped(
-                'partner_id').ids
-        balance_move_line_ids = []
-        for partners in partner_id:
-            partner = self.env['res.partner'].browse(partners).name
-            if data_range:
-                if data_range == 'month':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.month == fields.Date.today().month)
-                    date_start = fields.Date.today().replace(day=1)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'year':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.year == fields.Date.today().year)
-                    date_start = fields.Date.today().replace(month=1, day=1)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'quarter':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', quarter_start),
-                         ('date', '<=', quarter_end),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = quarter_start
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'last-month':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.month == fields.Date.today().month - 1)
-                    date_start = fields.Date.today().replace(day=1,month=fields.Date.today().month - 1)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'last-year':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.year == fields.Date.today().year - 1)
-                    date_start = fields.Date.today().replace(day=1,month=1,)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'last-quarter':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', previous_quarter_start),
-                         ('date', '<=', previous_quarter_end),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = previous_quarter_start
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif 'start_date' in data_range and 'end_date' in data_range:
-                    start_date = datetime.strptime(data_range['start_date'],
-                                                   '%Y-%m-%d').date()
-                    end_date = datetime.strptime(data_range['end_date'],
-                                                 '%Y-%m-%d').date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', start_date),
-                         ('date', '<=', end_date),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = start_date
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif 'start_date' in data_range:
-                    start_date = datetime.strptime(data_range['start_date'],
-                                                   '%Y-%m-%d').date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', start_date),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = start_date
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif 'end_date' in data_range:
-                    end_date = datetime.strptime(data_range['end_date'],
-                                                 '%Y-%m-%d').date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '<=', end_date),
-                         ('parent_state', 'in', option_domain)])
-                    fiscal_year = self.env['res.company'].search([]).mapped(
-                        'account_opening_date')[0].strftime('%Y-%m-%d')
-                    date_start = datetime.strptime(fiscal_year,
-                                                          '%Y-%m-%d').date()
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-            else:
-                move_line_ids = self.env['account.move.line'].search(
-                    [('partner_id', '=', partners), (
-                        'account_type', 'in',
-                        account_type_domain),
-                     ('parent_state', 'in', option_domain)])
-            total_debit_balance = 0
-            total_credit_balance = 0
-            balance = 0
-            move_line_list = []
-            for move_line in move_line_ids:
-                move_line_data = move_line.read(
-                    ['date', 'move_name', 'account_type', 'debit', 'credit',
-                     'date_maturity', 'account_id', 'journal_id', 'move_id',
-                     'matching_number', 'amount_currency'])
-                account_code = self.env['account.account'].browse(
-                    move_line.account_id.id).code
-                journal_code = self.env['account.journal'].browse(
-                    move_line.journal_id.id).code
-                if account_code:
-                    move_line_data[0]['jrnl'] = journal_code
-                    move_line_data[0]['code'] = account_code
-                move_line_list.append(move_line_data)
-            for remaining_move in balance_move_line_ids:
-                if remaining_move.invoice_date:
-                    if remaining_move.invoice_date < date_start:
-                        total_debit_balance += remaining_move.debit
-                        total_credit_balance += remaining_move.credit
-                        balance = total_debit_balance - total_credit_balance
-            partner_dict[partner] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            partner_totals[partner] = {
-                'total_debit': round(sum(move_line_ids.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_ids.mapped('credit')), 2),
+        for row in rows:
+            initial_balance = row['initial_debit'] - row['initial_credit']
+            partner_totals[partner_names[row['group_id']]] = {
+                'total_debit': round(row['debit'], 2),
+                'total_credit': round(row['credit'], 2),
+                'line_count': row['line_count'],
                 'currency_id': currency_id,
-                'partner_id': partners,
-                'initial_balance': balance,
+                'partner_id': row['group_id'],
+                'initial_balance': initial_balance,
                 'move_name': 'Initial Balance',
-                'initial_debit': total_debit_balance,
-                'initial_credit': total_credit_balance,
+                'initial_debit': row['initial_debit'],
+                'initial_credit': row['initial_credit'],
+                'closing_balance': round(
+                    initial_balance + row['debit'] - row['credit'], 2),
             }
+        return partner_totals
+
+    @api.model
+    def _get_partner_data(self, filters, with_lines=False, after=None,
+                          limit=None):
+        """
+        Build the partner ledger payload with the ledger engine.
+
+        The opening balance before the period and the totals of the period
+        are computed for a page of partners in one windowed query. When the
+        partners are paged, the grand total of all of them and the key of
+        the next page are added.
+
+        :param ReportFilters filters: Filters compiled by
+                                      ``account.ledger.engine``.
+        :param bool with_lines: Whether to fill in the journal items of every
+                                partner, otherwise their lists are empty.
+        :param after: ID of the last partner already loaded.
+        :param int limit: Number of partners per page, all of them when not
+                          set.
+        :return: A dictionary with the journal items of each partner keyed by
+                 partner name, plus 'partner_totals'. When paged, it also
+                 holds the 'next_key' and, on the first page, the
+                 'grand_total'.
+        :rtype: dict
+        """
+        engine = self.env['account.ledger.engine']
+        rows, next_key = engine._get_window_totals(
+            'partner_id', filters, after=after, limit=limit)
+        partner_totals = self._get_partner_totals(rows)
+        partner_dict = {partner: [] for partner in partner_totals}
+        if with_lines and rows:
+            partner_names = {
+                partner.id: partner.name for partner in self.env[
+                    'res.partner'].browse([row['group_id'] for row in rows])}
+            where_clause, where_params = engine._get_filter_clause(filters)
+            lines = engine._get_group_lines('partner_id', where_clause,
+                                            where_params)
+            for line_row, line in zip(lines,
+                                      self._format_partner_lines(lines)):
+                if line_row['group_id'] in partner_names:
+                    partner_dict[partner_names[line_row['group_id']]].append(
+                        line)
+        if partner_totals:
             partner_dict['partner_totals'] = partner_totals
+        if limit:
+            partner_dict['next_key'] = next_key
+        if limit and not after:
+            summary = engine._get_window_summary('partner_id', filters)
+            partner_dict['grand_total'] = {
+                'total_debit': round(summary['debit'], 2),
+                'total_credit': round(summary['credit'], 2),
+                'currency_id': self.env.company.currency_id.symbol,
+            }
         return partner_dict
 
     @api.model
     def get_xlsx_report(self, data, response, report_name, report_action):
         """
-        Generate an Excel report based on the provided data.
+        Generate an Excel report from the report filters and stream it to
+        the response.
+
+        The ledger is rebuilt on the server and the journal items of each
+        partner are written page by page, so that the export runs in
+        constant memory whatever the number of journal items.
 
-        :param data: The data used to generate the report.
+        :param data: The display values of the filters under 'filters' and
+                     the arguments of get_filter_values under 'args'.
         :type data: str (JSON format)
 
         :param response: The response object to write the report to.
@@ -359,8 +274,11 @@ class AccountPartnerLedger(models.TransientModel):
         :return: None
         """
         data = json.loads(data)
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        xlsx = self.env['account.report.xlsx']
+        engine = self.env['account.ledger.engine']
+        filters = self._get_partner_filters(*data['args'])
+        where_clause, where_params = engine._get_filter_clause(filters)
+        workbook, output = xlsx._create_workbook()
         start_date = data['filters']['start_date'] if \
             data['filters']['start_date'] else ''
         end_date = data['filters']['end_date'] if \
@@ -393,38 +311,33 @@ class AccountPartnerLedger(models.TransientModel):
         sheet.set_column(3, 3, 15)
         col = 0
         sheet.write('A1:b1', report_name, head)
-        sheet.write('B3:b4', 'Date Range', filter_head)
-        sheet.write('B4:b4', 'Partners', filter_head)
-        sheet.write('B5:b4', 'Accounts', filter_head)
-        sheet.write('B6:b4', 'Options', filter_head)
-        if start_date or end_date:
-            sheet.merge_range('C3:G3', f"{start_date} to {end_date}",
-                              filter_body)
-        if data['filters']['partner']:
-            display_names = [partner.get('display_name', 'undefined') for
-                             partner in data['filters']['partner']]
-            display_names_str = ', '.join(display_names)
-            sheet.merge_range('C4:G4', display_names_str, filter_body)
-        if data['filters']['account']:
-            account_keys = list(data['filters']['account'].keys())
-            account_keys_str = ', '.join(account_keys)
-            sheet.merge_range('C5:G5', account_keys_str, filter_body)
-        if data['filters']['options']:
-            option_keys = list(data['filters']['options'].keys())
-            option_keys_str = ', '.join(option_keys)
-            sheet.merge_range('C6:G6', option_keys_str, filter_body)
-        if data:
-            if report_action == 'dynamic_accounts_report.action_partner_ledger':
-                sheet.write(8, col, ' ', sub_heading)
-                sheet.write(8, col + 1, 'JNRL', sub_heading)
-                sheet.write(8, col + 2, 'Account', sub_heading)
-                sheet.merge_range('D9:E9', 'Ref', sub_heading)
-                sheet.merge_range('F9:G9', 'Due Date', sub_heading)
-                sheet.merge_range('H9:I9', 'Debit', sub_heading)
-                sheet.merge_range('J9:K9', 'Credit', sub_heading)
-                sheet.merge_range('L9:M9', 'Balance', sub_heading)
-                row = 8
-                for partner in data['partners']:
+        xlsx._write_filter_header(sheet, [
+            ('Date Range', f"{start_date} to {end_date}"
+             if start_date or end_date else ''),
+            ('Partners', ', '.join(
+                partner.get('display_name', 'undefined')
+                for partner in data['filters']['partner'] or [])),
+            ('Accounts', ', '.join(data['filters']['account'] or [])),
+            ('Options', ', '.join(data['filters']['options'] or [])),
+        ], filter_head, filter_body)
+        if report_action == 'dynamic_accounts_report.action_partner_ledger':
+            sheet.write(8, col, ' ', sub_heading)
+            sheet.write(8, col + 1, 'JNRL', sub_heading)
+            sheet.write(8, col + 2, 'Account', sub_heading)
+            sheet.merge_range('D9:E9', 'Ref', sub_heading)
+            sheet.merge_range('F9:G9', 'Due Date', sub_heading)
+            sheet.merge_range('H9:I9', 'Debit', sub_heading)
+            sheet.merge_range('J9:K9', 'Credit', sub_heading)
+            sheet.merge_range('L9:M9', 'Balance', sub_heading)
+            row = 8
+            total_debit = total_credit = 0.0
+            for totals in engine._iter_window_pages('partner_id', filters):
+                partner_totals = self._get_partner_totals(totals)
+                total_debit += sum(total['total_debit']
+                                   for total in partner_totals.values())
+                total_credit += sum(total['total_credit']
+                                    for total in partner_totals.values())
+                for partner, total in partner_totals.items():
                     row += 1
                     sheet.write(row, col, partner, txt_name)
                     sheet.write(row, col + 1, ' ', txt_name)
@@ -434,63 +347,57 @@ class AccountPartnerLedger(models.TransientModel):
                     sheet.merge_range(row, col + 5, row, col + 6, ' ',
                                       txt_name)
                     sheet.merge_range(row, col + 7, row, col + 8,
-                                      data['total'][partner]['total_debit'],
-                                      txt_name)
+                                      total['total_debit'], txt_name)
                     sheet.merge_range(row, col + 9, row, col + 10,
-                                      data['total'][partner]['total_credit'],
-                                      txt_name)
+                                      total['total_credit'], txt_name)
                     sheet.merge_range(row, col + 11, row, col + 12,
-                                      data['total'][partner]['total_debit'] -
-                                      data['total'][partner]['total_credit'],
-                                      txt_name)
-                    if data['total'][partner]['initial_balance'] != 0:
+                                      total['total_debit'] -
+                                      total['total_credit'], txt_name)
+                    if total['initial_balance'] != 0:
                         row += 1
                         sheet.write(row, col, '', txt_name)
                         sheet.write(row, col + 1, ' ', txt_name)
                         sheet.write(row, col + 2, ' ', txt_name)
-                        sheet.merge_range(row, col + 3, row, col + 4, 'Initial Balance ',
-                                          head_highlight)
+                        sheet.merge_range(row, col + 3, row, col + 4,
+                                          'Initial Balance ', head_highlight)
                         sheet.merge_range(row, col + 5, row, col + 6, ' ',
                                           txt_name)
                         sheet.merge_range(row, col + 7, row, col + 8,
-                                          data['total'][partner]['initial_debit'],
-                                          txt_name)
+                                          total['initial_debit'], txt_name)
                         sheet.merge_range(row, col + 9, row, col + 10,
-                                          data['total'][partner]['initial_credit'],
-                                          txt_name)
+                                          total['initial_credit'], txt_name)
                         sheet.merge_range(row, col + 11, row, col + 12,
-                                          data['total'][partner]['initial_balance'],
-                                          txt_name)
-                    for rec in data['data'][partner]:
-                        row += 1
-                        sheet.write(row, col, rec[0]['date'], txt_name)
-                        sheet.write(row, col + 1, rec[0]['jrnl'], txt_name)
-                        sheet.write(row, col + 2, rec[0]['code'], txt_name)
-                        sheet.merge_range(row, col + 3, row, col + 4,
-                                          rec[0]['move_name'],
-                                          txt_name)
-                        sheet.merge_range(row, col + 5, row, col + 6,
-                                          rec[0]['date_maturity'],
-                                          txt_name)
-                        sheet.merge_range(row, col + 7, row, col + 8,
-                                          rec[0]['debit'], txt_name)
-                        sheet.merge_range(row, col + 9, row, col + 10,
-                                          rec[0]['credit'], txt_name)
-                        sheet.merge_range(row, col + 11, row, col + 12, ' ',
-                                          txt_name)
-                row += 1
-                sheet.merge_range(row, col, row, col + 6, 'Total', filter_head)
-                sheet.merge_range(row, col + 7, row, col + 8,
-                                  data['grand_total']['total_debit'],
-                                  filter_head)
-                sheet.merge_range(row, col + 9, row, col + 10,
-                                  data['grand_total']['total_credit'],
-                                  filter_head)
-                sheet.merge_range(row, col + 11, row, col + 12,
-                                  data['grand_total']['total_debit'] -
-                                  data['grand_total']['total_credit'],
-                                  filter_head)
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
+                                          total['initial_balance'], txt_name)
+                    for rows in engine._iter_group_pages(
+                            'partner_id', total['partner_id'], where_clause,
+                            where_params):
+                        for rec in self._format_partner_lines(rows):
+                            row += 1
+                            sheet.write(row, col,
+                                        fields.Date.to_string(rec[0]['date']),
+                                        txt_name)
+                            sheet.write(row, col + 1, rec[0]['jrnl'], txt_name)
+                            sheet.write(row, col + 2, rec[0]['code'], txt_name)
+                            sheet.merge_range(row, col + 3, row, col + 4,
+                                              rec[0]['move_name'], txt_name)
+                            sheet.merge_range(
+                                row, col + 5, row, col + 6,
+                                fields.Date.to_string(rec[0]['date_maturity']),
+                                txt_name)
+                            sheet.merge_range(row, col + 7, row, col + 8,
+                                              rec[0]['debit'], txt_name)
+                            sheet.merge_range(row, col + 9, row, col + 10,
+                                              rec[0]['credit'], txt_name)
+                            sheet.merge_range(row, col + 11, row, col + 12,
+                                              ' ', txt_name)
+            total_debit = round(total_debit, 2)
+            total_credit = round(total_credit, 2)
+            row += 1
+            sheet.merge_range(row, col, row, col + 6, 'Total', filter_head)
+            sheet.merge_range(row, col + 7, row, col + 8, total_debit,
+                              filter_head)
+            sheet.merge_range(row, col + 9, row, col + 10, total_credit,
+                              filter_head)
+            sheet.merge_range(row, col + 11, row, col + 12,
+                              total_debit - total_credit, filter_head)
+        xlsx._stream_workbook(workbook, output, response)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>).
+#    Author: Ammu Raj (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+import hashlib
+import json
+from odoo import api, fields, models
+from odoo.tools import sql
+
+# Maximum number of cached report results.
+REPORT_CACHE_MAX_ENTRIES = 500
+# Maximum total size of the cached results, in bytes.
+REPORT_CACHE_MAX_SIZE = 64 * 1024 * 1024
+
+
+class AccountReportCache(models.Model):
+    """Results of the dynamic reports, keyed by a fingerprint of the report,
+    its filters, the companies and the access rights of the user.
+
+    Every transaction changing journal items logs the companies and earliest
+    date it touched, with its transaction ID. A cached result is only used
+    while every logged change of its companies up to its last date was
+    visible to the snapshot it was computed from, which also covers the
+    changes committed while it was being computed. Results are evicted
+    least recently used first beyond REPORT_CACHE_MAX_ENTRIES entries or
+    REPORT_CACHE_MAX_SIZE bytes.
+    """
+    _name = 'account.report.cache'
+    _description = 'Report Result Cache'
+    _auto = False
+    _log_access = False
+
+    key = fields.Char(string='Fingerprint', readonly=True)
+    res_model = fields.Char(string='Report Model', readonly=True)
+    date_to = fields.Date(string='Last Date', readonly=True)
+    size = fields.Integer(string='Size', readonly=True)
+    last_used = fields.Datetime(string='Last Used', readonly=True)
+
+    def init(self):
+        """Create the cache and change log tables"""
+        if sql.table_exists(self._cr, self._table):
+            return
+        self._cr.execute("""
+            CREATE TABLE account_report_cache (
+                id SERIAL PRIMARY KEY,
+                key VARCHAR NOT NULL,
+                res_model VARCHAR NOT NULL,
+                company_ids INTEGER[] NOT NULL,
+                date_to DATE,
+                snapshot TXID_SNAPSHOT NOT NULL,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used TIMESTAMP NOT NULL
+                    DEFAULT (now() AT TIME ZONE 'UTC')
+            );
+            CREATE UNIQUE INDEX account_report_cache_key_uniq
+                ON account_report_cache (key);
+            CREATE TABLE account_report_cache_log (
+                company_id INTEGER NOT NULL,
+                date DATE NOT NULL,
+                txid BIGINT NOT NULL,
+                logged_at TIMESTAMP NOT NULL
+                    DEFAULT (now() AT TIME ZONE 'UTC')
+            );
+            CREATE INDEX account_report_cache_log_company_idx
+                ON account_report_cache_log (company_id, date);
+        """)
+
+    @api.model
+    def _get_key(self, res_model, filters):
+        """
+        Return the fingerprint of a report result.
+
+        :param str res_model: Model generating the report.
+        :param filters: JSON serializable description of everything the
+                        result depends on besides the companies, the user
+                        groups and the language.
+        :rtype: str
+        """
+        fingerprint = json.dumps({
+            'res_model': res_model,
+            'filters': filters,
+            'company_ids': sorted(self.env.companies.ids),
+            'group_ids': sorted(self.env.user.groups_id.ids),
+            'lang': self.env.lang,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    @api.model
+    def _get_or_compute(self, res_model, filters, date_to, compute):
+        """
+        Return the cached result of a report, computing and caching it when
+        missing or outdated.
+
+        :param str res_model: Model generating the report.
+        :param filters: Filters of the report, see _get_key.
+        :param date_to: Last date of the journal items the result depends
+                        on, None when unbounded.
+        :param compute: Function computing the result, which must be JSON
+                        serializable.
+        :return: The report result, as decoded from JSON.
+        """
+        key = self._get_key(res_model, filters)
+        self.env.cr.execute("""
+            SELECT cache.id, cache.result,
+                   cache.last_used < (now() AT TIME ZONE 'UTC')
+                                     - INTERVAL '1 minute' AS stale
+              FROM account_report_cache cache
+             WHERE cache.key = %s
+               AND NOT EXISTS (
+                   SELECT 1 FROM account_report_cache_log log
+                    WHERE log.company_id = ANY(cache.company_ids)
+                      AND (cache.date_to IS NULL
+                           OR log.date <= cache.date_to)
+                      AND NOT txid_visible_in_snapshot(log.txid,
+                                                       cache.snapshot))
+        """, [key])
+        row = self.env.cr.dictfetchone()
+        if row:
+            if row['stale']:
+                self.env.cr.execute("""
+                    UPDATE account_report_cache
+                       SET last_used = now() AT TIME ZONE 'UTC'
+                     WHERE id IN (SELECT id FROM account_report_cache
+                                   WHERE id = %s
+                                     FOR UPDATE SKIP LOCKED)
+                """, [row['id']])
+            return json.loads(row['result'])
+        result = json.dumps(compute(), default=str)
+        if len(result) <= REPORT_CACHE_MAX_SIZE:
+            self.env.cr.execute("""
+                INSERT INTO account_report_cache (
+                    key, res_model, company_ids, date_to, snapshot, result,
+                    size)
+                VALUES (%s, %s, %s, %s, txid_current_snapshot(), %s, %s)
+                    ON CONFLICT (key)
+                    DO UPDATE SET date_to = EXCLUDED.date_to,
+                                  snapshot = EXCLUDED.snapshot,
+                                  result = EXCLUDED.result,
+                                  size = EXCLUDED.size,
+                                  last_used = EXCLUDED.last_used
+            """, [key, res_model, self.env.companies.ids, date_to, result,
+                  len(result)])
+            self._evict()
+        return json.loads(result)
+
+    @api.model
+    def _evict(self):
+        """Drop the least recently used results beyond the cache limits"""
+        self.env.cr.execute("""
+            DELETE FROM account_report_cache
+             WHERE id IN (
+                SELECT id FROM (
+                    SELECT id,
+                           ROW_NUMBER() OVER recent AS rank,
+                           SUM(size) OVER recent AS total_size
+                      FROM account_report_cache
+                    WINDOW recent AS (ORDER BY last_used DESC, id DESC)
+                ) ranked
+                 WHERE rank > %s OR total_size > %s)
+        """, [REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_MAX_SIZE])
+
+    @api.model
+    def _log_changes(self, keys):
+        """
+        Log the journal item changes of the current transaction, outdating
+        the cached results of the same companies that include their dates.
+
+        The log is only appended to, so that concurrent transactions never
+        wait on each other.
+
+        :param keys: Iterable of (account_id, date) pairs.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        self.env.cr.execute("""
+            INSERT INTO account_report_cache_log (company_id, date, txid)
+            SELECT acc.company_id, MIN(dirty.date), txid_current()
+              FROM unnest(%s::int[], %s::date[]) AS dirty(account_id, date)
+              JOIN account_account acc ON acc.id = dirty.account_id
+          GROUP BY acc.company_id
+        """, [[account_id for account_id, date in keys],
+              [date for account_id, date in keys]])
+
+    @api.autovacuum
+    def _gc_cache_log(self):
+        """
+        Drop the outdated results, then the logged changes every remaining
+        result already includes. Changes are kept at least a day, for the
+        results still being computed from older snapshots.
+        """
+        self.env.cr.execute("""
+            DELETE FROM account_report_cache cache
+             WHERE EXISTS (
+                   SELECT 1 FROM account_report_cache_log log
+                    WHERE log.company_id = ANY(cache.company_ids)
+                      AND (cache.date_to IS NULL
+                           OR log.date <= cache.date_to)
+                      AND NOT txid_visible_in_snapshot(log.txid,
+                                                       cache.snapshot))
+        """)
+        self.env.cr.execute("""
+            DELETE FROM account_report_cache_log
+             WHERE logged_at < (now() AT TIME ZONE 'UTC') - INTERVAL '1 day'
+               AND txid < COALESCE(
+                   (SELECT MIN(txid_snapshot_xmin(snapshot))
+                      FROM account_report_cache),
+                   txid_snapshot_xmin(txid_current_snapshot()))
+        """)
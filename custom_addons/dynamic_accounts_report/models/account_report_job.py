@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>).
+#    Author: Ammu Raj (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import timedelta
+from werkzeug.wrappers import Response
+from odoo import api, fields, models, _
+from odoo.exceptions import AccessError
+
+_logger = logging.getLogger(__name__)
+
+# Maximum number of jobs a worker processes per cron run.
+REPORT_JOB_BATCH = 10
+# Number of days finished jobs and their results are kept.
+REPORT_JOB_RETENTION_DAYS = 7
+# Size of the chunks result files are copied to the filestore in.
+REPORT_JOB_CHUNK_SIZE = 64 * 1024
+# Mimetype and file extension of the results of each output format.
+REPORT_JOB_OUTPUTS = {
+    'json': ('application/json', 'json'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.'
+             'spreadsheetml.sheet', 'xlsx'),
+    'pdf': ('application/pdf', 'pdf'),
+}
+
+
+class AccountReportJob(models.Model):
+    """Accounting report generated in the background.
+
+    A job holds the report and the filters it was requested with. Pending
+    jobs are taken by the report job cron, or by any other worker calling
+    _process_jobs, through ``account.queue.mixin``, so that the job of a
+    worker that died is pending again for the next one. The result is saved
+    as an attachment of the job and the requesting user is notified once it
+    is done.
+    """
+    _name = 'account.report.job'
+    _inherit = 'account.queue.mixin'
+    _description = 'Accounting Report Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Report', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='Requested By',
+                              required=True, readonly=True, index=True,
+                              default=lambda self: self.env.user)
+    company_ids = fields.Many2many('res.company', string='Companies',
+                                   readonly=True,
+                                   default=lambda self: self.env.companies,
+                                   help='Companies the report is run for.')
+    res_model = fields.Char(string='Report Model', required=True,
+                            readonly=True)
+    output_format = fields.Selection([('json', 'JSON'), ('xlsx', 'XLSX'),
+                                      ('pdf', 'PDF')],
+                                     string='Format', required=True,
+                                     readonly=True)
+    payload = fields.Text(string='Filters', readonly=True,
+                          help='JSON arguments of the report: the public '
+                               '"method" and its "args" for JSON results, '
+                               'the "data" and "report_action" passed to '
+                               'get_xlsx_report for XLSX results, the '
+                               '"report_ref", "res_ids" and "data" of the '
+                               'report action for PDF results.')
+    state = fields.Selection([('pending', 'Pending'),
+                              ('done', 'Done'),
+                              ('failed', 'Failed')],
+                             string='Status', required=True, readonly=True,
+                             default='pending', index=True)
+    attachment_id = fields.Many2one('ir.attachment', string='Result',
+                                    readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+    date_started = fields.Datetime(string='Started On', readonly=True)
+    date_finished = fields.Datetime(string='Finished On', readonly=True)
+    wait_time = fields.Float(string='Queued (s)', readonly=True,
+                             help='Seconds the job waited for a worker.')
+    duration = fields.Float(string='Duration (s)', readonly=True,
+                            help='Seconds spent generating the report.')
+
+    @api.model
+    def enqueue_report(self, name, res_model, output_format, payload):
+        """
+        Enqueue the generation of a report and wake up the report workers.
+
+        :param str name: Name of the report, used for the result file.
+        :param str res_model: Model generating the report.
+        :param str output_format: 'json', 'xlsx' or 'pdf'.
+        :param dict payload: Arguments of the report, see the payload field.
+        :return: ID of the created job.
+        :rtype: int
+        """
+        self.env[res_model].check_access_rights('read')
+        job = self.create({
+            'name': name,
+            'res_model': res_model,
+            'output_format': output_format,
+            'payload': json.dumps(payload),
+        })
+        self.env.ref(
+            'dynamic_accounts_report.ir_cron_process_report_jobs')._trigger()
+        return job.id
+
+    def action_download(self):
+        """Download the result of the job"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    @api.model
+    def _process_jobs(self, limit=REPORT_JOB_BATCH):
+        """
+        Run pending jobs, oldest first, committing after each of them.
+
+        :param int limit: Maximum number of jobs to run.
+        """
+        self._process_queue(limit)
+
+    def _run(self):
+        """Generate the report of the job and save it as an attachment"""
+        self.ensure_one()
+        date_started = fields.Datetime.now()
+        start = time.time()
+        try:
+            mimetype, extension = REPORT_JOB_OUTPUTS[self.output_format]
+            with self.env.cr.savepoint():
+                with self._render() as output:
+                    attachment = self._save_result(
+                        output, '%s.%s' % (self.name, extension), mimetype)
+            values = {'state': 'done', 'attachment_id': attachment.id}
+        except Exception as error:
+            _logger.exception("Report job %s failed", self.id)
+            values = {'state': 'failed', 'error': str(error)}
+        values.update({
+            'date_started': date_started,
+            'date_finished': fields.Datetime.now(),
+            'wait_time': (date_started - self.create_date).total_seconds(),
+            'duration': time.time() - start,
+        })
+        self.write(values)
+        self._notify_user()
+
+    def _render(self):
+        """
+        Generate the report as the requesting user, for the companies it was
+        requested for.
+
+        XLSX exports are kept in the temporary file they are written to,
+        so that their size never bounds the memory of the worker.
+
+        :return: The result file, positioned at its start.
+        """
+        self.ensure_one()
+        payload = json.loads(self.payload or '{}')
+        env = self.with_user(self.user_id).with_context(
+            allowed_company_ids=self.company_ids.ids).env
+        if self.output_format == 'pdf':
+            return io.BytesIO(env['ir.actions.report']._render_qweb_pdf(
+                payload['report_ref'], payload.get('res_ids'),
+                data=payload.get('data'))[0])
+        report = env[self.res_model]
+        if self.output_format == 'xlsx':
+            response = Response()
+            report.get_xlsx_report(json.dumps(payload['data']), response,
+                                   self.name, payload.get('report_action'))
+            # The temporary file account.report.xlsx streams the workbook
+            # from.
+            output = response.response.file
+            output.seek(0)
+            return output
+        method = payload['method']
+        if method.startswith('_'):
+            raise AccessError(_("Private methods cannot be run as a report "
+                                "job: %s", method))
+        result = getattr(report, method)(*payload.get('args', []))
+        return io.BytesIO(json.dumps(result, default=str).encode())
+
+    def _save_result(self, output, name, mimetype):
+        """
+        Save a result file as an attachment of the job.
+
+        With the file storage, the file is hashed and copied to the
+        filestore in chunks instead of being read into memory.
+
+        :param output: The result file returned by _render.
+        :param str name: Name of the attachment.
+        :param str mimetype: Mimetype of the result.
+        :return: The created ``ir.attachment``.
+        """
+        self.ensure_one()
+        attachments = self.env['ir.attachment']
+        values = {
+            'name': name,
+            'mimetype': mimetype,
+            'res_model': self._name,
+            'res_id': self.id,
+        }
+        if attachments._storage() != 'file':
+            values['raw'] = output.read()
+            return attachments.create(values)
+        checksum = hashlib.sha1()
+        for chunk in iter(lambda: output.read(REPORT_JOB_CHUNK_SIZE), b''):
+            checksum.update(chunk)
+        checksum = checksum.hexdigest()
+        store_fname = '%s/%s' % (checksum[:2], checksum)
+        full_path = attachments._full_path(store_fname)
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            output.seek(0)
+            with open(full_path, 'wb') as stored:
+                shutil.copyfileobj(output, stored, REPORT_JOB_CHUNK_SIZE)
+            # Collected if the transaction is rolled back, as _file_write
+            # does.
+            attachments._mark_for_gc(store_fname)
+        attachment = attachments.create(values)
+        # ir.attachment ignores the storage fields written through the ORM.
+        self.env.cr.execute("""
+            UPDATE ir_attachment
+               SET store_fname = %s, checksum = %s, file_size = %s
+             WHERE id = %s
+        """, [store_fname, checksum, output.seek(0, os.SEEK_END),
+              attachment.id])
+        attachment.invalidate_recordset(['store_fname', 'checksum',
+                                         'file_size'])
+        return attachment
+
+    def _notify_user(self):
+        """Notify the requesting users that their jobs are over"""
+        for job in self:
+            if job.state == 'done':
+                message = _("%s is ready to download from the report jobs.",
+                            job.name)
+            else:
+                message = _("%s could not be generated: %s", job.name,
+                            job.error)
+            self.env['bus.bus']._sendone(
+                job.user_id.partner_id, 'simple_notification', {
+                    'title': _("Report Job"),
+                    'message': message,
+                    'type': 'success' if job.state == 'done' else 'danger',
+                    'sticky': job.state != 'done',
+                })
+
+    @api.autovacuum
+    def _gc_finished_jobs(self):
+        """Delete the finished jobs, and their results, past retention"""
+        jobs = self.search([
+            ('state', 'in', ('done', 'failed')),
+            ('date_finished', '<', fields.Datetime.now() - timedelta(
+                days=REPORT_JOB_RETENTION_DAYS)),
+        ])
+        jobs.attachment_id.unlink()
+        jobs.unlink()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>).
+#    Author: Ammu Raj (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+import os
+import tempfile
+import xlsxwriter
+from werkzeug.wsgi import FileWrapper
+from odoo import api, models
+
+# Size of the chunks the generated workbook is sent to the client in.
+XLSX_CHUNK_SIZE = 64 * 1024
+
+
+class AccountReportXlsx(models.AbstractModel):
+    """Workbook handling shared by the XLSX exports of the dynamic reports.
+
+    Workbooks are written to a temporary file rather than to memory. In
+    constant memory mode xlsxwriter flushes every row as soon as the next one
+    is started, so rows must be written in ascending order, and the file is
+    then sent to the client in chunks.
+    """
+    _name = 'account.report.xlsx'
+    _description = 'Dynamic Report XLSX Export'
+
+    @api.model
+    def _create_workbook(self, constant_memory=True):
+        """
+        Create a workbook backed by a temporary file.
+
+        :param bool constant_memory: Whether to flush the rows as they are
+                                     written, which requires them to be
+                                     written in order.
+        :return: A tuple (workbook, output), output being the temporary file
+                 to pass to _stream_workbook.
+        :rtype: tuple
+        """
+        output = tempfile.TemporaryFile()
+        workbook = xlsxwriter.Workbook(
+            output, {'constant_memory': constant_memory})
+        return workbook, output
+
+    @api.model
+    def _write_filter_header(self, sheet, filters, head_format, body_format,
+                             row=2):
+        """
+        Write the applied filters of a report, one row per filter, each
+        label followed by its value.
+
+        :param sheet: The worksheet to write to.
+        :param list filters: (label, value) pairs, falsy values leave the
+                             value cell empty.
+        :param head_format: Format of the labels.
+        :param body_format: Format of the values.
+        :param int row: Index of the first row to write.
+        :return: Index of the row following the header.
+        :rtype: int
+        """
+        for label, value in filters:
+            sheet.write(row, 1, label, head_format)
+            if value:
+                sheet.merge_range(row, 2, row, 6, value, body_format)
+            row += 1
+        return row
+
+    @api.model
+    def _stream_workbook(self, workbook, output, response):
+        """
+        Close the workbook and stream its file to the response in chunks,
+        the file being closed once sent.
+
+        :param workbook: Workbook returned by _create_workbook.
+        :param output: Temporary file returned by _create_workbook.
+        :param response: The response object to stream the report to.
+        """
+        workbook.close()
+        response.headers['Content-Length'] = output.seek(0, os.SEEK_END)
+        output.seek(0)
+        response.response = FileWrapper(output, XLSX_CHUNK_SIZE)
+        response.direct_passthrough = True
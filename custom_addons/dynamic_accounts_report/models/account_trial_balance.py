@@ -20,13 +20,10 @@
 #
 ################################################################################
 import calendar
-import io
 import json
 from datetime import datetime
-import xlsxwriter
 from odoo import api, fields, models
-from odoo.tools.date_utils import get_month, get_fiscal_year, \
-    get_quarter_number, subtract
+from odoo.tools.date_utils import get_month, get_quarter_number, subtract
 
 
 class AccountTrialBalance(models.TransientModel):
@@ -45,49 +42,14 @@ class AccountTrialBalance(models.TransientModel):
         :return: List of dictionaries representing the trial balance report.
         :rtype: list
         """
-        account_ids = self.env['account.move.line'].search([]).mapped(
-            'account_id')
         today = fields.Date.today()
-        move_line_list = []
-        for account_id in account_ids:
-            initial_move_line_ids = self.env['account.move.line'].search(
-                [('date', '<', get_month(today)[0]),
-                 ('account_id', '=', account_id.id),
-                 ('parent_state', '=', 'posted')])
-            initial_total_debit = round(
-                sum(initial_move_line_ids.mapped('debit')), 2)
-            initial_total_credit = round(
-                sum(initial_move_line_ids.mapped('credit')), 2)
-            move_line_ids = self.env['account.move.line'].search(
-                [('date', '>=', get_month(today)[0]),
-                 ('account_id', '=', account_id.id),
-                 ('date', '<=', get_month(today)[1]),
-                 ('parent_state', '=', 'posted')])
-            total_debit = round(sum(move_line_ids.mapped('debit')), 2)
-            total_credit = round(sum(move_line_ids.mapped('credit')), 2)
-            sum_debit = initial_total_debit + total_debit
-            sum_credit = initial_total_credit + total_credit
-            diff_credit_debit = sum_debit - sum_credit
-            if diff_credit_debit > 0:
-                end_total_debit = diff_credit_debit
-                end_total_credit = 0.0
-            else:
-                end_total_debit = 0.0
-                end_total_credit = abs(diff_credit_debit)
-            data = {
-                'account': account_id.display_name,
-                'account_id': account_id.id,
-                'journal_ids': self.env['account.journal'].search_read([], [
-                    'name']),
-                'initial_total_debit': initial_total_debit,
-                'initial_total_credit': initial_total_credit,
-                'total_debit': total_debit,
-                'total_credit': total_credit,
-                'end_total_debit': end_total_debit,
-                'end_total_credit': end_total_credit
-            }
-            move_line_list.append(data)
-        return move_line_list
+        month_start, month_end = get_month(today)
+        filters = self.env['account.ledger.engine']._compile_filters()
+        rows = self.env['account.report.cache']._get_or_compute(
+            self._name, ['view_report', month_start], month_end,
+            lambda: self._get_trial_balance_totals(
+                [(month_start, month_end)], month_start, filters))
+        return self._get_trial_balance(rows, 0)
 
     @api.model
     def get_filter_values(self, start_date, end_date, comparison_number,
@@ -106,179 +68,102 @@ class AccountTrialBalance(models.TransientModel):
         :param int comparison_number: Number of periods for comparison.
         :param str comparison_type: Type of comparison (month, year, quarter).
         :param list[int] journal_list: List of selected journal IDs.
-        :param list[int] analytic: List of selected analytic line IDs.
+        :param list[int] analytic: List of selected analytic account IDs.
         :param dict options: Additional filtering options (e.g., 'draft').
         :param dict method: Find the method.
         :return: List of dictionaries representing the financial report.
         :rtype: list
         """
-        if options == {}:
-            options = None
-        if options is None:
-            option_domain = ['posted']
-        elif 'draft' in options:
-            option_domain = ['posted', 'draft']
-        if method == {}:
-            method = None
-        dynamic_total_debit = {}
-        dynamic_date_num = {}
-        dynamic_total_credit = {}
-        account_ids = self.env['account.move.line'].search([]).mapped(
-            'account_id')
-        move_line_list = []
-        start_date_first = \
-            get_fiscal_year(datetime.strptime(start_date, "%Y-%m-%d").date())[
-                0] if comparison_type == 'year' else datetime.strptime(
-                start_date, "%Y-%m-%d").date()
-        end_date_first = \
-            get_fiscal_year(datetime.strptime(end_date, "%Y-%m-%d").date())[
-                1] if comparison_type == 'year' else datetime.strptime(end_date,
-                                                                       "%Y-%m-%d").date()
-        for account_id in account_ids:
-            start_date = start_date_first
-            end_date = end_date_first
-            if comparison_number:
-                if comparison_type == 'month':
-                    initial_start_date = subtract(start_date, months=eval(
-                        comparison_number))
-                elif comparison_type == 'year':
-                    initial_start_date = subtract(start_date, years=eval(
-                        comparison_number))
-                else:
-                    initial_start_date = subtract(start_date, months=eval(
-                        comparison_number) * 3)
+        comparison_number = int(comparison_number or 0)
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        if comparison_type == 'year':
+            engine = self.env['account.ledger.engine']
+            start_date = engine._get_fiscal_year(start_date)[0]
+            end_date = engine._get_fiscal_year(end_date)[1]
+        months = {'month': 1, 'quarter': 3}.get(comparison_type)
+        periods = [(start_date, end_date)]
+        for i in range(1, comparison_number + 1):
+            if months:
+                periods.append((subtract(start_date, months=i * months),
+                                subtract(end_date, months=i * months)))
             else:
-                initial_start_date = start_date
-            domain = [('date', '<', initial_start_date),
-                      ('account_id', '=', account_id.id),
-                      ('parent_state', 'in', option_domain), ]
-            if journal_list:
-                domain.append(
-                    ('journal_id', 'in', journal_list), )
-            if analytic:
-                domain.append(
-                    ('analytic_line_ids', 'in', analytic))
-            if method is not None and 'cash' in method:
-                domain.append(('journal_id', 'in',
-                               self.env.company.tax_cash_basis_journal_id.ids))
-            initial_move_line_ids = self.env['account.move.line'].search(
-                domain)
-            initial_total_debit = round(
-                sum(initial_move_line_ids.mapped('debit')), 2)
-            initial_total_credit = round(
-                sum(initial_move_line_ids.mapped('credit')), 2)
-            if comparison_number:
-                if comparison_type == 'year':
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, years=i)
-                        com_end_date = subtract(end_date, years=i)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain), ]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list), )
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids))
-                        move_lines = self.env['account.move.line'].search(
-                            domain)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
+                periods.append((subtract(start_date, years=i),
+                                subtract(end_date, years=i)))
+        dynamic_date_num = {}
+        if comparison_number and comparison_type in ('month', 'quarter'):
+            for i, (com_start_date, com_end_date) in enumerate(periods):
                 if comparison_type == 'month':
-                    dynamic_date_num[
-                        f"dynamic_date_num{0}"] = self.get_month_name(
-                        start_date) + ' ' + str(
-                        start_date.year)
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, months=i)
-                        com_end_date = subtract(end_date, months=i)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain), ]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list), )
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids), )
-                        move_lines = self.env['account.move.line'].search(
-                            domain)
-                        dynamic_date_num[
-                            f"dynamic_date_num{i}"] = self.get_month_name(
-                            com_start_date) + ' ' + str(
-                            com_start_date.year)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-                if comparison_type == 'quarter':
-                    dynamic_date_num[
-                        f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                        get_quarter_number(start_date)) + ' ' + str(
-                        start_date.year)
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, months=i * 3)
-                        com_end_date = subtract(end_date, months=i * 3)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain), ]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list), )
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids))
-                        move_lines = self.env['account.move.line'].search(
-                            domain)
-                        dynamic_date_num[
-                            f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                            get_quarter_number(com_start_date)) + ' ' + str(
+                    dynamic_date_num[f"dynamic_date_num{i}"] = \
+                        self.get_month_name(com_start_date) + ' ' + str(
                             com_start_date.year)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-            domain = [('date', '>=', start_date),
-                      ('account_id', '=', account_id.id),
-                      ('date', '<=', end_date),
-                      ('parent_state', 'in', option_domain), ]
-            if journal_list:
-                domain.append(
-                    ('journal_id', 'in', journal_list), )
-            if analytic:
-                domain.append(
-                    ('analytic_line_ids', 'in', analytic))
-            if method is not None and 'cash' in method:
-                domain.append(('journal_id', 'in',
-                               self.env.company.tax_cash_basis_journal_id.ids))
-            move_line_ids = self.env['account.move.line'].search(domain)
-            total_debit = round(sum(move_line_ids.mapped('debit')), 2)
-            total_credit = round(sum(move_line_ids.mapped('credit')), 2)
-            sum_debit = initial_total_debit + sum(
-                dynamic_total_debit.values()) + total_debit
-            sum_credit = initial_total_credit + sum(
-                dynamic_total_credit.values()) + total_credit
+                else:
+                    dynamic_date_num[f"dynamic_date_num{i}"] = \
+                        'Q' + ' ' + str(get_quarter_number(
+                            com_start_date)) + ' ' + str(com_start_date.year)
+        filters = self.env['account.ledger.engine']._compile_filters(
+            options=options, method=method, journal_ids=journal_list,
+            analytic_ids=analytic)
+        rows = self.env['account.report.cache']._get_or_compute(
+            self._name, ['get_filter_values', periods, filters._asdict()],
+            periods[0][1], lambda: self._get_trial_balance_totals(
+                periods, periods[-1][0], filters))
+        return self._get_trial_balance(rows, comparison_number,
+                                       dynamic_date_num=dynamic_date_num)
+
+    @api.model
+    def _get_trial_balance_totals(self, periods, initial_date, filters):
+        """
+        Aggregate the totals of every account for all the periods in one
+        query.
+
+        The first period is the reporting period, the following ones are the
+        comparison periods, most recent first. The initial balance covers the
+        items dated before initial_date.
+
+        :param list periods: List of (date_from, date_to) tuples.
+        :param initial_date: Start of the oldest period.
+        :param ReportFilters filters: Filters compiled by
+                                      ``account.ledger.engine``, without
+                                      dates.
+        :return: Rows of _get_period_totals.
+        :rtype: list
+        """
+        engine = self.env['account.ledger.engine']
+        where_clause, where_params = engine._get_filter_clause(filters)
+        return engine._get_period_totals(
+            'account_id', periods, where_clause, where_params,
+            initial_date=initial_date,
+            table=engine._get_totals_table(filters))
+
+    @api.model
+    def _get_trial_balance(self, rows, comparison_number,
+                           dynamic_date_num=None):
+        """
+        Build the trial balance lines from the account totals.
+
+        The account names and the journals are read here rather than cached
+        with the totals, so that creating or renaming them shows up at once.
+        The ending balance adds every period to the initial balance.
+
+        :param list rows: Rows returned by _get_trial_balance_totals.
+        :param int comparison_number: Number of comparison periods.
+        :param dict dynamic_date_num: Labels of the comparison periods.
+        :return: List of dictionaries representing the trial balance report.
+        :rtype: list
+        """
+        account_names = self.env['account.ledger.engine']._get_display_names(
+            'account.account', (row['group_id'] for row in rows))
+        journal_ids = self.env['account.journal'].search_read([], ['name'])
+        move_line_list = []
+        for row in rows:
+            initial_total_debit = round(row['initial_debit'], 2)
+            initial_total_credit = round(row['initial_credit'], 2)
+            sum_debit = initial_total_debit
+            sum_credit = initial_total_credit
+            for index in range(comparison_number + 1):
+                sum_debit += round(row[f'debit_{index}'], 2)
+                sum_credit += round(row[f'credit_{index}'], 2)
             diff_credit_debit = sum_debit - sum_credit
             if diff_credit_debit > 0:
                 end_total_debit = diff_credit_debit
@@ -287,28 +172,24 @@ class AccountTrialBalance(models.TransientModel):
                 end_total_debit = 0.0
                 end_total_credit = abs(diff_credit_debit)
             data = {
-                'account': account_id.display_name,
-                'account_id': account_id.id,
-                'journal_ids': self.env['account.journal'].search_read([], [
-                    'name']),
+                'account': account_names[row['group_id']],
+                'account_id': row['group_id'],
+                'journal_ids': journal_ids,
                 'initial_total_debit': initial_total_debit,
                 'initial_total_credit': initial_total_credit,
-                'total_debit': total_debit,
-                'total_credit': total_credit,
+                'total_debit': round(row['debit_0'], 2),
+                'total_credit': round(row['credit_0'], 2),
                 'end_total_debit': end_total_debit,
                 'end_total_credit': end_total_credit
             }
             if comparison_number:
                 if dynamic_date_num:
                     data['dynamic_date_num'] = dynamic_date_num
-                for i in range(1, eval(comparison_number) + 1):
-                    data[f'dynamic_total_debit_{i}'] = dynamic_total_debit.get(
-                        f"dynamic_total_debit_{eval(comparison_number) + 1 - i}",
-                        0.0)
-                    data[
-                        f'dynamic_total_credit_{i}'] = dynamic_total_credit.get(
-                        f"dynamic_total_credit_{eval(comparison_number) + 1 - i}",
-                        0.0)
+                for i in range(1, comparison_number + 1):
+                    data[f'dynamic_total_debit_{i}'] = round(
+                        row[f'debit_{comparison_number + 1 - i}'], 2)
+                    data[f'dynamic_total_credit_{i}'] = round(
+                        row[f'credit_{comparison_number + 1 - i}'], 2)
             move_line_list.append(data)
         return move_line_list
 
@@ -336,8 +217,8 @@ class AccountTrialBalance(models.TransientModel):
         :param str report_name: Name of the financial report.
         """
         data = json.loads(data)
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        xlsx = self.env['account.report.xlsx']
+        workbook, output = xlsx._create_workbook()
         start_date = data['filters']['start_date'] if \
             data['filters']['start_date'] else ''
         end_date = data['filters']['end_date'] if \
@@ -368,32 +249,18 @@ class AccountTrialBalance(models.TransientModel):
         sheet.set_column(3, 3, 15)
         col = 0
         sheet.write('A1:b1', report_name, head)
-        sheet.write('B3:b4', 'Date Range', filter_head)
-        sheet.write('B4:b4', 'Comparison', filter_head)
-        sheet.write('B5:b4', 'Journal', filter_head)
-        sheet.write('B6:b4', 'Account', filter_head)
-        sheet.write('B7:b4', 'Option', filter_head)
-        if start_date or end_date:
-            sheet.merge_range('C3:G3', f"{start_date} to {end_date}",
-                              filter_body)
-        if data['filters']['comparison_number_range']:
-            sheet.merge_range('C4:G4',
-                              f"{data['filters']['comparison_type']} : {data['filters']['comparison_number_range']}",
-                              filter_body)
-        if data['filters']['journal']:
-            display_names = [journal for
-                             journal in data['filters']['journal']]
-            display_names_str = ', '.join(display_names)
-            sheet.merge_range('C5:G5', display_names_str, filter_body)
-        if data['filters']['account']:
-            account_keys = [account.get('display_name', 'undefined') for
-                            account in data['filters']['account']]
-            account_keys_str = ', '.join(account_keys)
-            sheet.merge_range('C6:G6', account_keys_str, filter_body)
-        if data['filters']['options']:
-            option_keys = list(data['filters']['options'].keys())
-            option_keys_str = ', '.join(option_keys)
-            sheet.merge_range('C7:G7', option_keys_str, filter_body)
+        xlsx._write_filter_header(sheet, [
+            ('Date Range', f"{start_date} to {end_date}"
+             if start_date or end_date else ''),
+            ('Comparison', f"{data['filters']['comparison_type']} : "
+                           f"{data['filters']['comparison_number_range']}"
+             if data['filters']['comparison_number_range'] else ''),
+            ('Journal', ', '.join(data['filters']['journal'] or [])),
+            ('Account', ', '.join(
+                account.get('display_name', 'undefined')
+                for account in data['filters']['account'] or [])),
+            ('Option', ', '.join(data['filters']['options'] or [])),
+        ], filter_head, filter_body)
         sheet.write(9, col, '', sub_heading)
         sheet.merge_range(9, col + 1, 9, col + 2, 'Initial Balance',
                           sub_heading)
@@ -443,7 +310,4 @@ class AccountTrialBalance(models.TransientModel):
                     sheet.write(row, col + j + 3,
                                 move_line['end_total_credit'], txt_name)
                     row += 1
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
+        xlsx._stream_workbook(workbook, output, response)
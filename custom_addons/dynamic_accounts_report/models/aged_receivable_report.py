@@ -19,10 +19,8 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ################################################################################
-import io
 import json
 
-import xlsxwriter
 from odoo import models, fields, api
 
 
@@ -47,50 +45,7 @@ class AgeReceivableReport(models.TransientModel):
               based on days between maturity date and today.
               The 'partner_totals' key contains summary data for each partner.
         """
-        partner_total = {}
-        move_line_list = {}
-        paid = self.env['account.move.line'].search(
-            [('parent_state', '=', 'posted'),
-             ('account_type', '=', 'asset_receivable'),
-             ('reconciled', '=', False)])
-        currency_id = self.env.company.currency_id.symbol
-        partner_ids = paid.mapped('partner_id')
-        today = fields.Date.today()
-        for partner_id in partner_ids:
-            move_line_ids = paid.filtered(
-                lambda rec: rec.partner_id in partner_id)
-            move_line_data = move_line_ids.read(
-                ['name', 'move_name', 'date', 'amount_currency', 'account_id',
-                 'date_maturity', 'currency_id', 'debit', 'move_id'])
-            for val in move_line_data:
-                if val['date_maturity']:
-                    diffrence = (today - val['date_maturity']).days
-                val['diff0'] = val['debit'] if diffrence <= 0 else 0.0
-                val['diff1'] = val['debit'] if 0 < diffrence <= 30 else 0.0
-                val['diff2'] = val['debit'] if 30 < diffrence <= 60 else 0.0
-                val['diff3'] = val['debit'] if 60 < diffrence <= 90 else 0.0
-                val['diff4'] = val['debit'] if 90 < diffrence <= 120 else 0.0
-                val['diff5'] = val['debit'] if diffrence > 120 else 0.0
-            move_line_list[partner_id.name] = move_line_data
-            partner_total[partner_id.name] = {
-                'debit_sum': sum(val['debit'] for val in move_line_data),
-                'diff0_sum': round(sum(val['diff0'] for val in move_line_data),
-                                   2),
-                'diff1_sum': round(sum(val['diff1'] for val in move_line_data),
-                                   2),
-                'diff2_sum': round(sum(val['diff2'] for val in move_line_data),
-                                   2),
-                'diff3_sum': round(sum(val['diff3'] for val in move_line_data),
-                                   2),
-                'diff4_sum': round(sum(val['diff4'] for val in move_line_data),
-                                   2),
-                'diff5_sum': round(sum(val['diff5'] for val in move_line_data),
-                                   2),
-                'currency_id': currency_id,
-                'partner_id': partner_id.id
-            }
-        move_line_list['partner_totals'] = partner_total
-        return move_line_list
+        return self._get_aged_data(fields.Date.today())
 
     @api.model
     def get_filter_values(self, date, partner):
@@ -107,58 +62,60 @@ class AgeReceivableReport(models.TransientModel):
                    difference.Contains partner-wise summary under
                    'partner_totals' key.
          """
+        return self._get_aged_data(
+            fields.Date.to_date(date) or fields.Date.today(), partner)
+
+    @api.model
+    def _get_aged_data(self, date, partner_ids=None):
+        """
+        Build the aged receivable payload with the aging engine.
+
+        The open items of every partner are bucketed by due date against the
+        aging date in a single query, then read in one batch.
+
+        :param date: Aging date, later items are ignored.
+        :param list partner_ids: Partner IDs to restrict the report to.
+        :return: Dictionary containing move line data categorized by partner
+                 names, with the 'partner_totals' summary of each partner.
+        :rtype: dict
+        """
+        aging = self.env['account.aging.engine']._get_aging_buckets(
+            ['asset_receivable'], date, partner_ids=partner_ids,
+            amount='debit')
+        aging.pop(False, None)
+        lines = {
+            line['id']: line for line in self.env['account.move.line'].browse(
+                [line_id for values in aging.values()
+                 for line_ids in values['line_ids'] for line_id in line_ids]
+            ).read(['name', 'move_name', 'date', 'amount_currency',
+                    'account_id', 'date_maturity', 'currency_id', 'debit',
+                    'move_id'])
+        }
+        partners = self.env['res.partner'].browse(list(aging))
         partner_total = {}
         move_line_list = {}
-        if date:
-            paid = self.env['account.move.line'].search(
-                [('parent_state', '=', 'posted'),
-                 ('account_type', '=', 'asset_receivable'),
-                 ('reconciled', '=', False), ('date', '<=', date)])
-        else:
-            paid = self.env['account.move.line'].search(
-                [('parent_state', '=', 'posted'),
-                 ('account_type', '=', 'asset_receivable'),
-                 ('reconciled', '=', False)])
         currency_id = self.env.company.currency_id.symbol
-        if partner:
-            partner_ids = self.env['res.partner'].search(
-                [('id', 'in', partner)])
-        else:
-            partner_ids = paid.mapped('partner_id')
-        today = fields.Date.today()
-        for partner_id in partner_ids:
-            move_line_ids = paid.filtered(
-                lambda rec: rec.partner_id in partner_id)
-            move_line_data = move_line_ids.read(
-                ['name', 'move_name', 'date', 'amount_currency', 'account_id',
-                 'date_maturity', 'currency_id', 'debit', 'move_id'])
-            for val in move_line_data:
-                if val['date_maturity']:
-                    diffrence = (today - val['date_maturity']).days
-                val['diff0'] = val['debit'] if diffrence <= 0 else 0.0
-                val['diff1'] = val['debit'] if 0 < diffrence <= 30 else 0.0
-                val['diff2'] = val['debit'] if 30 < diffrence <= 60 else 0.0
-                val['diff3'] = val['debit'] if 60 < diffrence <= 90 else 0.0
-                val['diff4'] = val['debit'] if 90 < diffrence <= 120 else 0.0
-                val['diff5'] = val['debit'] if diffrence > 120 else 0.0
+        for partner_id in partners:
+            values = aging[partner_id.id]
+            move_line_data = []
+            for bucket, line_ids in enumerate(values['line_ids']):
+                for line_id in line_ids:
+                    val = lines[line_id]
+                    for index in range(len(values['buckets'])):
+                        val['diff%s' % index] = \
+                            val['debit'] if index == bucket else 0.0
+                    move_line_data.append(val)
+            move_line_data.sort(key=lambda val: (val['date'], val['id']),
+                                reverse=True)
             move_line_list[partner_id.name] = move_line_data
             partner_total[partner_id.name] = {
-                'debit_sum': sum(val['debit'] for val in move_line_data),
-                'diff0_sum': round(sum(val['diff0'] for val in move_line_data),
-                                   2),
-                'diff1_sum': round(sum(val['diff1'] for val in move_line_data),
-                                   2),
-                'diff2_sum': round(sum(val['diff2'] for val in move_line_data),
-                                   2),
-                'diff3_sum': round(sum(val['diff3'] for val in move_line_data),
-                                   2),
-                'diff4_sum': round(sum(val['diff4'] for val in move_line_data),
-                                   2),
-                'diff5_sum': round(sum(val['diff5'] for val in move_line_data),
-                                   2),
+                'debit_sum': values['total'],
                 'currency_id': currency_id,
                 'partner_id': partner_id.id
             }
+            for index, amount in enumerate(values['buckets']):
+                partner_total[partner_id.name]['diff%s_sum' % index] = round(
+                    amount, 2)
         move_line_list['partner_totals'] = partner_total
         return move_line_list
 
@@ -179,8 +136,8 @@ class AgeReceivableReport(models.TransientModel):
         :return: None
         """
         data = json.loads(data)
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        xlsx = self.env['account.report.xlsx']
+        workbook, output = xlsx._create_workbook()
         end_date = data['filters']['end_date'] if \
             data['filters']['end_date'] else ''
         sheet = workbook.add_worksheet()
@@ -209,15 +166,12 @@ class AgeReceivableReport(models.TransientModel):
         sheet.set_column(3, 3, 15)
         col = 0
         sheet.write('A1:b1', report_name, head)
-        sheet.write('B3:b4', 'Date Range', filter_head)
-        sheet.write('B4:b4', 'Partners', filter_head)
-        if end_date:
-            sheet.merge_range('C3:G3', f"{end_date}", filter_body)
-        if data['filters']['partner']:
-            display_names = [partner.get('display_name', 'undefined') for
-                             partner in data['filters']['partner']]
-            display_names_str = ', '.join(display_names)
-            sheet.merge_range('C4:G4', display_names_str, filter_body)
+        xlsx._write_filter_header(sheet, [
+            ('Date Range', end_date),
+            ('Partners', ', '.join(
+                partner.get('display_name', 'undefined')
+                for partner in data['filters']['partner'] or [])),
+        ], filter_head, filter_body)
         if data:
             if report_action == 'dynamic_accounts_report.action_aged_receivable':
                 sheet.write(6, col, ' ', sub_heading)
@@ -316,7 +270,4 @@ class AgeReceivableReport(models.TransientModel):
                             data['grand_total']['total_debit'],
                             filter_head)
 
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
+        xlsx._stream_workbook(workbook, output, response)
@@ -19,14 +19,57 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ################################################################################
-import io
 import json
 import datetime
-import xlsxwriter
+from decimal import Decimal, ROUND_HALF_UP
+from typing import NamedTuple
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
-from odoo.tools.date_utils import get_month, get_fiscal_year, get_quarter, \
-    subtract
+from odoo.tools.date_utils import get_month, subtract
+
+# Account types reported, in display order.
+ACCOUNT_TYPES = (
+    'income', 'income_other', 'expense', 'expense_depreciation',
+    'expense_direct_cost', 'asset_receivable', 'asset_cash', 'asset_current',
+    'asset_non_current', 'asset_prepayments', 'asset_fixed',
+    'liability_payable', 'liability_credit_card', 'liability_current',
+    'liability_non_current', 'equity', 'equity_unaffected',
+)
+# Account types whose balance is reported as credit minus debit.
+CREDIT_ACCOUNT_TYPES = (
+    'income', 'income_other', 'liability_payable', 'liability_current',
+    'liability_non_current', 'equity', 'equity_unaffected',
+)
+
+ZERO = Decimal(0)
+CENT = Decimal('0.01')
+
+
+class ReportEntry(NamedTuple):
+    """Balance of one account in a period of the report"""
+    name: str
+    amount: Decimal
+
+
+def to_decimal(value):
+    """
+    Convert an amount read from the database to an exact decimal.
+
+    :param float value: Amount, a sum of numeric columns.
+    :rtype: Decimal
+    """
+    return Decimal(str(value))
+
+
+def format_amount(amount):
+    """
+    Format an amount rounded half up to the cent, with thousands
+    separators.
+
+    :param Decimal amount: Amount to format.
+    :rtype: str
+    """
+    return "{:,.2f}".format(amount.quantize(CENT, rounding=ROUND_HALF_UP))
 
 
 class ProfitLossReport(models.TransientModel):
@@ -64,255 +107,202 @@ class ProfitLossReport(models.TransientModel):
 
     @api.model
     def view_report(self, option, comparison, comparison_type):
-        datas = []
-        account_types = {
-            'income': 'income',
-            'income_other': 'income_other',
-            'expense': 'expense',
-            'expense_depreciation': 'expense_depreciation',
-            'expense_direct_cost': 'expense_direct_cost',
-            'asset_receivable': 'asset_receivable',
-            'asset_cash': 'asset_cash',
-            'asset_current': 'asset_current',
-            'asset_non_current': 'asset_non_current',
-            'asset_prepayments': 'asset_prepayments',
-            'asset_fixed': 'asset_fixed',
-            'liability_payable': 'liability_payable',
-            'liability_credit_card': 'liability_credit_card',
-            'liability_current': 'liability_current',
-            'liability_non_current': 'liability_non_current',
-            'equity': 'equity',
-            'equity_unaffected': 'equity_unaffected',
+        """
+        Return the profit and loss and balance sheet figures of the filters
+        of a report record, served from the report result cache.
+
+        :param int option: ID of the record holding the filters.
+        :param comparison: Number of comparison periods.
+        :param str comparison_type: 'month' or 'year'.
+        :return: A list [data, filters, datas] as built by _get_report_data.
+        :rtype: list
+        """
+        report = self.browse(option)
+        today = fields.Date.today()
+        date_to = datetime.date(today.year, 12, 31)
+        if report.date_to:
+            date_to = min(date_to, report.date_to)
+        filters = {
+            'target_move': report.target_move,
+            'journal_ids': report.journal_ids.ids,
+            'account_ids': report.account_ids.ids,
+            'analytic_ids': report.analytic_ids.ids,
+            'date_from': report.date_from,
+            'date_to': report.date_to,
+            'comparison': comparison,
+            'comparison_type': comparison_type,
+            'today': today,
         }
+        rows = self.env['account.report.cache']._get_or_compute(
+            self._name, filters, date_to, lambda: self._get_period_balances(
+                option, comparison, comparison_type))
+        return list(self._get_report_data(rows, int(comparison or 0) + 1))
+
+    @api.model
+    def _get_period_balances(self, option, comparison, comparison_type):
+        """
+        Aggregate the balances of every account for all the periods of the
+        filters of a report record in one grouped query.
+
+        Only these totals are cached: the account names and the filter
+        choices are read again for every report, so that creating or
+        renaming records shows up without outdating the cache.
+
+        :param int option: ID of the record holding the filters.
+        :param comparison: Number of comparison periods.
+        :param str comparison_type: 'month' or 'year'.
+        :return: Rows of _get_period_totals, periods most recent first.
+        :rtype: list
+        """
         financial_report_id = self.browse(option)
-        current_year = fields.Date.today().year
-        current_date = fields.Date.today()
+        periods = self._get_periods(comparison, comparison_type)
         if financial_report_id.target_move == 'draft':
             target_move = ['posted', 'draft']
         else:
             target_move = ['posted']
-        if comparison:
-            for count in range(0, int(comparison) + 1):
-                if comparison_type == "month":
-                    account_move_lines = self.env['account.move.line'].search(
-                        [(
-                            'parent_state', 'in', target_move),
-                            ('date', '>=', (current_date - datetime.timedelta(
-                                days=30 * count)).strftime('%Y-%m-01')),
-                            ('date', '<=', (current_date - datetime.timedelta(
-                                days=30 * count)).strftime('%Y-%m-12'))])
-                elif comparison_type == "year":
-                    account_move_lines = self.env['account.move.line'].search(
-                        [(
-                            'parent_state', 'in', target_move),
-                            ('date', '>=', f'{current_year - count}-01-01'),
-                            ('date', '<=', f'{current_year - count}-12-31')])
-                lists = [{'id': rec.id, 'value': [eval(i) for i in
-                                                  rec.analytic_distribution.keys()]}
-                         for rec in account_move_lines if
-                         rec.analytic_distribution]
-                if financial_report_id.analytic_ids:
-                    account_move_lines = account_move_lines.filtered(lambda
-                                                                         rec: rec.id in [
-                        lst['id'] for lst in lists if lst['value'] and any(
-                            i in financial_report_id.analytic_ids.mapped('id')
-                            for i in lst['value'])])
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.journal_ids or a.journal_id in financial_report_id.journal_ids)
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.account_ids or a.account_id in financial_report_id.account_ids)
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.date_from or a.date >= financial_report_id.date_from)
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.date_to or a.date <= financial_report_id.date_to)
-                account_entries = {}
-                for account_type in account_types.values():
-                    account_entries[account_type] = self._get_entries(
-                        account_move_lines, self.env['account.account'].search(
-                            [('account_type', '=', account_type)]),
-                        account_type)
-                total_income = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['income', 'income_other'] for entry in
-                    account_entries[account_type][0]) - sum(
-                    float(entry['amount'].replace(',', '')) for entry in
-                    account_entries['expense_direct_cost'][0])
-                total_expense = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['expense', 'expense_depreciation'] for entry in
-                    account_entries[account_type][0])
-                total_current_asset = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['asset_receivable', 'asset_current', 'asset_cash',
-                     'asset_prepayments'] for entry in
-                    account_entries[account_type][0])
-                total_assets = total_current_asset + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['asset_fixed', 'asset_non_current'] for entry in
-                    account_entries[account_type][0])
-                total_current_liability = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['liability_current', 'liability_payable'] for entry in
-                    account_entries[account_type][0])
-                total_liability = total_current_liability + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['liability_non_current'] for entry in
-                    account_entries[account_type][0])
-                total_unallocated_earning = (
-                                                    total_income - total_expense) + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['equity_unaffected'] for entry in
-                    account_entries[account_type][0])
-                total_equity = total_unallocated_earning + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['equity'] for entry in
-                    account_entries[account_type][0])
-                total = total_liability + total_equity
-                data = {
-                    'total': total_income - total_expense,
-                    'total_expense': "{:,.2f}".format(total_expense),
-                    'total_income': "{:,.2f}".format(total_income),
-                    'total_current_asset': "{:,.2f}".format(
-                        total_current_asset),
-                    'total_assets': "{:,.2f}".format(total_assets),
-                    'total_current_liability': "{:,.2f}".format(
-                        total_current_liability),
-                    'total_liability': "{:,.2f}".format(total_liability),
-                    'total_earnings': "{:,.2f}".format(
-                        total_income - total_expense),
-                    'total_unallocated_earning': "{:,.2f}".format(
-                        total_unallocated_earning),
-                    'total_equity': "{:,.2f}".format(total_equity),
-                    'total_balance': "{:,.2f}".format(total),
-                    **account_entries}
-                datas.append(data)
-        else:
-            account_move_lines = self.env['account.move.line'].search(
-                [('parent_state', 'in', target_move),
-                 ('date', '>=', f'{current_year}-01-01'),
-                 ('date', '<=', f'{current_year}-12-31')])
-            lists = [{'id': rec.id,
-                      'value': [eval(i) for i in
-                                rec.analytic_distribution.keys()]}
-                     for rec in account_move_lines if
-                     rec.analytic_distribution]
-            if financial_report_id.analytic_ids:
-                account_move_lines = account_move_lines.filtered(
-                    lambda rec: rec.id in [lst['id'] for lst in lists if
-                                           lst['value'] and any(
-                                               i in financial_report_id.analytic_ids.mapped(
-                                                   'id') for i in
-                                               lst['value'])])
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.journal_ids or a.journal_id in financial_report_id.journal_ids)
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.account_ids or a.account_id in financial_report_id.account_ids)
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.date_from or a.date >= financial_report_id.date_from)
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.date_to or a.date <= financial_report_id.date_to)
-            account_entries = {}
-            for account_type in account_types.values():
-                account_entries[account_type] = self._get_entries(
-                    account_move_lines, self.env['account.account'].search(
-                        [('account_type', '=', account_type)]), account_type)
-            total_income = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['income', 'income_other'] for entry in
-                account_entries[account_type][0]) - sum(
-                float(entry['amount'].replace(',', '')) for entry in
-                account_entries['expense_direct_cost'][0])
-            total_expense = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['expense', 'expense_depreciation'] for entry in
-                account_entries[account_type][0])
-            total_current_asset = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['asset_receivable', 'asset_current', 'asset_cash',
-                 'asset_prepayments'] for entry in
-                account_entries[account_type][0])
-            total_assets = total_current_asset + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['asset_fixed', 'asset_non_current'] for entry in
-                account_entries[account_type][0])
-            total_current_liability = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['liability_current', 'liability_payable'] for entry in
-                account_entries[account_type][0])
-            total_liability = total_current_liability + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['liability_non_current'] for entry in
-                account_entries[account_type][0])
-            total_unallocated_earning = (total_income - total_expense) + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['equity_unaffected'] for entry in
-                account_entries[account_type][0])
-            total_equity = total_unallocated_earning + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['equity'] for entry in account_entries[account_type][0])
-            total = total_liability + total_equity
-            data = {
-                'total': total_income - total_expense,
-                'total_expense': "{:,.2f}".format(total_expense),
-                'total_income': "{:,.2f}".format(total_income),
-                'total_current_asset': "{:,.2f}".format(total_current_asset),
-                'total_assets': "{:,.2f}".format(total_assets),
-                'total_current_liability': "{:,.2f}".format(
-                    total_current_liability),
-                'total_liability': "{:,.2f}".format(total_liability),
-                'total_earnings': "{:,.2f}".format(
-                    total_income - total_expense),
-                'total_unallocated_earning': "{:,.2f}".format(
-                    total_unallocated_earning),
-                'total_equity': "{:,.2f}".format(total_equity),
-                'total_balance': "{:,.2f}".format(total),
-                **account_entries}
-            datas.append(data)
-        filters = self._get_filter_data()
-        return data, filters, datas
+        engine = self.env['account.ledger.engine']
+        filters = engine._compile_filters(
+            date_range={'start_date': financial_report_id.date_from,
+                        'end_date': financial_report_id.date_to},
+            journal_ids=financial_report_id.journal_ids.ids,
+            account_ids=financial_report_id.account_ids.ids,
+            analytic_ids=financial_report_id.analytic_ids.ids,
+            states=target_move)
+        where_clause, where_params = engine._get_filter_clause(filters)
+        return engine._get_period_totals(
+            'account_id', periods, where_clause, where_params,
+            table=engine._get_totals_table(filters))
 
-    def _get_entries(self, account_move_lines, account_ids, account_type):
+    @api.model
+    def _get_report_data(self, rows, period_count):
         """
-            Get the entries for the specified account type.
-            :param account_move_lines: The account move lines to filter.
-            :param account_ids: The account IDs to filter.
-            :param account_type: The account type.
-            :return: A tuple containing the entries and the total amount.
-            """
-        entries = []
-        total = 0
-        for account in account_ids:
-            filtered_lines = account_move_lines.filtered(
-                lambda line: line.account_id == account)
-            if filtered_lines:
-                if account_type in ['income', 'income_other',
-                                    'liability_payable', 'liability_current',
-                                    'liability_non_current', 'equity',
-                                    'equity_unaffected']:
-                    amount = -(sum(filtered_lines.mapped('debit')) - sum(
-                        filtered_lines.mapped('credit')))
-                else:
-                    amount = sum(filtered_lines.mapped('debit')) - sum(
-                        filtered_lines.mapped('credit'))
-                entries.append({
-                    'name': "{} - {}".format(account.code, account.name),
-                    'amount': "{:,.2f}".format(amount),
-                })
-                total += amount
+        Compute the profit and loss and balance sheet figures from the
+        account balances, splitting them by account type in a single pass
+        over the accounts.
+
+        :param list rows: Rows returned by _get_period_balances.
+        :param int period_count: Number of periods in the rows.
+        :return: A tuple (data, filters, datas), datas holding the figures of
+                 every period, most recent first, and data those of the
+                 oldest one.
+        :rtype: tuple
+        """
+        balances = {row['group_id']: row for row in rows}
+        accounts = self.env['account.account'].search(
+            [('account_type', 'in', ACCOUNT_TYPES)])
+        datas = [self._format_period_figures(
+            self._get_period_figures(accounts, balances, index))
+            for index in range(period_count)]
+        return datas[-1], self._get_filter_data(), datas
+
+    @api.model
+    def _get_periods(self, comparison, comparison_type):
+        """
+        Return the reported period followed by the comparison periods.
+
+        :param comparison: Number of comparison periods, the current year
+                           alone is reported without any.
+        :param str comparison_type: 'month' or 'year'.
+        :return: List of (date_from, date_to) tuples, most recent first.
+        :rtype: list
+        """
+        today = fields.Date.today()
+        if not comparison:
+            return [(datetime.date(today.year, 1, 1),
+                     datetime.date(today.year, 12, 31))]
+        periods = []
+        for count in range(0, int(comparison) + 1):
+            if comparison_type == 'month':
+                periods.append(get_month(
+                    today - datetime.timedelta(days=30 * count)))
             else:
-                entries.append({
-                    'name': "{} - {}".format(account.code, account.name),
-                    'amount': "{:,.2f}".format(0),
-                })
-        return entries, "{:,.2f}".format(total)
+                periods.append((datetime.date(today.year - count, 1, 1),
+                                datetime.date(today.year - count, 12, 31)))
+        return periods
+
+    @api.model
+    def _get_period_figures(self, accounts, balances, index):
+        """
+        Build the figures of one period from the account balances.
+
+        Amounts are kept as exact decimals, so that the totals add up the
+        same as the displayed entries.
+
+        :param accounts: ``account.account`` records reported, in display
+                         order.
+        :param dict balances: Rows of _get_period_totals per account ID.
+        :param int index: Index of the period in the rows.
+        :return: The ReportEntry rows of each account type under 'entries',
+                 the total of each account type under 'type_totals' and the
+                 report totals.
+        :rtype: dict
+        """
+        entries = {account_type: [] for account_type in ACCOUNT_TYPES}
+        totals = dict.fromkeys(ACCOUNT_TYPES, ZERO)
+        for account in accounts:
+            row = balances.get(account.id, {})
+            debit = to_decimal(row.get('debit_%s' % index, 0.0))
+            credit = to_decimal(row.get('credit_%s' % index, 0.0))
+            if account.account_type in CREDIT_ACCOUNT_TYPES:
+                amount = credit - debit
+            else:
+                amount = debit - credit
+            entries[account.account_type].append(ReportEntry(
+                "{} - {}".format(account.code, account.name), amount))
+            totals[account.account_type] += amount
+        total_income = totals['income'] + totals['income_other'] - totals[
+            'expense_direct_cost']
+        total_expense = totals['expense'] + totals['expense_depreciation']
+        total_current_asset = totals['asset_receivable'] + totals[
+            'asset_current'] + totals['asset_cash'] + totals[
+            'asset_prepayments']
+        total_assets = total_current_asset + totals['asset_fixed'] + totals[
+            'asset_non_current']
+        total_current_liability = totals['liability_current'] + totals[
+            'liability_payable']
+        total_liability = total_current_liability + totals[
+            'liability_non_current']
+        total_unallocated_earning = (total_income - total_expense) + totals[
+            'equity_unaffected']
+        total_equity = total_unallocated_earning + totals['equity']
+        return {
+            'entries': entries,
+            'type_totals': totals,
+            'total_expense': total_expense,
+            'total_income': total_income,
+            'total_current_asset': total_current_asset,
+            'total_assets': total_assets,
+            'total_current_liability': total_current_liability,
+            'total_liability': total_liability,
+            'total_earnings': total_income - total_expense,
+            'total_unallocated_earning': total_unallocated_earning,
+            'total_equity': total_equity,
+            'total_balance': total_liability + total_equity,
+        }
+
+    @api.model
+    def _format_period_figures(self, figures):
+        """
+        Format the figures of a period for the report widgets, the only
+        place amounts are turned into text.
+
+        :param dict figures: Figures returned by _get_period_figures.
+        :return: The entries of each account type as (entries, total) pairs
+                 and the report totals, amounts formatted with thousands
+                 separators; 'total' holds the net profit as a number.
+        :rtype: dict
+        """
+        data = {
+            key: format_amount(value) for key, value in figures.items()
+            if key not in ('entries', 'type_totals')
+        }
+        data['total'] = float(figures['total_earnings'])
+        for account_type in ACCOUNT_TYPES:
+            data[account_type] = (
+                [{'name': entry.name, 'amount': format_amount(entry.amount)}
+                 for entry in figures['entries'][account_type]],
+                format_amount(figures['type_totals'][account_type]))
+        return data
 
     def filter(self, vals):
         """
@@ -321,45 +311,11 @@ class ProfitLossReport(models.TransientModel):
             :return: The updated record.
             """
         filter = []
-        today = fields.Date.today()
-        if vals == 'month':
-            vals = {
-                'date_from': get_month(today)[0].strftime("%Y-%m-%d"),
-                'date_to': get_month(today)[1].strftime("%Y-%m-%d"),
-            }
-        elif vals == 'quarter':
-            vals = {
-                'date_from': get_quarter(today)[0].strftime("%Y-%m-%d"),
-                'date_to': get_quarter(today)[1].strftime("%Y-%m-%d"),
-            }
-        elif vals == 'year':
-            vals = {
-                'date_from': get_fiscal_year(today)[0].strftime("%Y-%m-%d"),
-                'date_to': get_fiscal_year(today)[1].strftime("%Y-%m-%d"),
-            }
-        elif vals == 'last-month':
-            last_month_date = subtract(today, months=1)
-            vals = {
-                'date_from': get_month(last_month_date)[0].strftime(
-                    "%Y-%m-%d"),
-                'date_to': get_month(last_month_date)[1].strftime("%Y-%m-%d"),
-            }
-        elif vals == 'last-quarter':
-            last_quarter_date = subtract(today, months=3)
-            vals = {
-                'date_from': get_quarter(last_quarter_date)[0].strftime(
-                    "%Y-%m-%d"),
-                'date_to': get_quarter(last_quarter_date)[1].strftime(
-                    "%Y-%m-%d"),
-            }
-        elif vals == 'last-year':
-            last_year_date = subtract(today, years=1)
-            vals = {
-                'date_from': get_fiscal_year(last_year_date)[0].strftime(
-                    "%Y-%m-%d"),
-                'date_to': get_fiscal_year(last_year_date)[1].strftime(
-                    "%Y-%m-%d"),
-            }
+        if isinstance(vals, str):
+            date_from, date_to = self.env[
+                'account.ledger.engine']._get_date_range(vals)
+            vals = {'date_from': date_from, 'date_to': date_to} \
+                if date_from else {}
         if 'date_from' in vals:
             self.write({'date_from': vals['date_from']})
         if 'date_to' in vals:
@@ -435,14 +391,14 @@ class ProfitLossReport(models.TransientModel):
         today = fields.Date.today()
         if not count:
             raise ValidationError(_("Please select the count."))
+        engine = self.env['account.ledger.engine']
         last_year_date_list = []
         for i in range(1, int(count) + 1):
             last_year_date = subtract(today, years=i)
+            date_from, date_to = engine._get_fiscal_year(last_year_date)
             vals = {
-                'date_from': get_fiscal_year(last_year_date)[0].strftime(
-                    "%Y-%m-%d"),
-                'date_to': get_fiscal_year(last_year_date)[1].strftime(
-                    "%Y-%m-%d"),
+                'date_from': date_from.strftime("%Y-%m-%d"),
+                'date_to': date_to.strftime("%Y-%m-%d"),
             }
             last_year_date_list.append(vals)
         return last_year_date_list
@@ -455,8 +411,8 @@ class ProfitLossReport(models.TransientModel):
             :param response: The response object to write the generated report to.
             """
         data = json.loads(data)
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        xlsx = self.env['account.report.xlsx']
+        workbook, output = xlsx._create_workbook(constant_memory=False)
         sheet = workbook.add_worksheet()
         sub_heading = workbook.add_format(
             {'align': 'center', 'bold': True, 'font_size': '10px',
@@ -1098,7 +1054,4 @@ class ProfitLossReport(models.TransientModel):
                     sheet.write(row, col + 1, datas['total_balance'],
                                 side_heading_sub)
                     col += 1
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
+        xlsx._stream_workbook(workbook, output, response)
@@ -20,13 +20,9 @@
 #
 ################################################################################
 import calendar
-import io
 import json
-from datetime import datetime
-import xlsxwriter
 from odoo import models, fields, api
-from odoo.tools.date_utils import get_month, get_fiscal_year, \
-    get_quarter_number, subtract
+from odoo.tools.date_utils import get_month, get_quarter_number, subtract
 
 
 class TaxReport(models.TransientModel):
@@ -38,44 +34,16 @@ class TaxReport(models.TransientModel):
     def view_report(self):
         """
         View a tax report for the current month. This function retrieves
-        tax-related information for the current month. It calculates the net
-        amount and tax amount for both sales and purchases based on the tax
-        information associated with account move lines.
+        the base and tax amounts of every tax used in the journal items for
+        the current month.
             :return: Dictionary containing sale and purchase data for the
                      current month.
         """
-        sale = []
-        purchase = []
-        tax_ids = self.env['account.move.line'].search([]).mapped(
-            'tax_ids')
         today = fields.Date.today()
-        for tax in tax_ids:
-            tax_id = self.env['account.move.line'].search(
-                [('tax_ids', '=', tax.id), ('parent_state', '=', 'posted'),
-                 ('date', '>=', get_month(today)[0]),
-                 ('date', '<=', get_month(today)[1])]).read(
-                ['debit', 'credit'])
-            tax_debit_sums = sum(record['debit'] for record in tax_id)
-            tax_credit_sums = sum(record['credit'] for record in tax_id)
-            if tax.type_tax_use == 'sale':
-                sale.append({
-                    'name': tax.name,
-                    'amount': tax.amount,
-                    'net': round(tax_debit_sums + tax_credit_sums, 2),
-                    'tax': round((tax_debit_sums + tax_credit_sums) * (
-                            tax.amount / 100), 2)
-                })
-            elif tax.type_tax_use == 'purchase':
-                purchase.append({
-                    'name': tax.name,
-                    'amount': tax.amount,
-                    'net': round(tax_debit_sums + tax_credit_sums, 2),
-                    'tax': round((tax_debit_sums + tax_credit_sums) * (
-                            tax.amount / 100), 2)
-                })
+        lines = self._get_tax_lines([get_month(today)], ['posted'])
         return {
-            'sale': sale,
-            'purchase': purchase
+            'sale': lines['sale'],
+            'purchase': lines['purchase']
         }
 
     @api.model
@@ -93,507 +61,203 @@ class TaxReport(models.TransientModel):
            :return: Dictionary containing dynamic_date_num, sale, and purchase
                     data.
            """
-        sale = []
-        purchase = []
+        states = self.env['account.ledger.engine']._compile_filters(
+            options=options).states
+        start_date = fields.Date.to_date(start_date)
+        end_date = fields.Date.to_date(end_date)
+        if comparison_type == 'year':
+            engine = self.env['account.ledger.engine']
+            start_date = engine._get_fiscal_year(start_date)[0]
+            end_date = engine._get_fiscal_year(end_date)[1]
+        periods = [(start_date, end_date)]
         dynamic_date_num = {}
-        if options == {}:
-            options = None
-        if options is None:
-            option_domain = ['posted']
-        elif 'draft' in options:
-            option_domain = ['posted', 'draft']
-        tax_ids = self.env['account.move.line'].search([]).mapped(
-            'tax_ids')
-        start_date_first = \
-            get_fiscal_year(datetime.strptime(start_date, "%Y-%m-%d").date())[
-                0] if comparison_type == 'year' else datetime.strptime(
-                start_date, "%Y-%m-%d").date()
-        end_date_first = \
-            get_fiscal_year(datetime.strptime(end_date, "%Y-%m-%d").date())[
-                1] if comparison_type == 'year' else datetime.strptime(
-                end_date, "%Y-%m-%d").date()
+        if comparison_number:
+            periods += self._get_comparison_periods(
+                start_date, end_date, int(comparison_number), comparison_type)
+            for index, (date_from, date_to) in enumerate(periods):
+                if comparison_type == 'month':
+                    dynamic_date_num[f"dynamic_date_num{index}"] = \
+                        self.get_month_name(date_from) + ' ' + str(
+                            date_from.year)
+                elif comparison_type == 'quarter':
+                    dynamic_date_num[f"dynamic_date_num{index}"] = \
+                        'Q' + ' ' + str(get_quarter_number(
+                            date_from)) + ' ' + str(date_from.year)
+        group_by = None
         if report_type is not None and 'account' in report_type:
-            start_date = start_date_first
-            end_date = end_date_first
-            account_ids = self.env['account.move.line'].search([]).mapped(
-                'account_id')
-            for account in account_ids:
-                tax_ids = self.env['account.move.line'].search(
-                    [('account_id', '=', account.id)]).mapped('tax_ids')
-                if tax_ids:
-                    for tax in tax_ids:
-                        dynamic_total_tax_sum = {}
-                        dynamic_total_net_sum = {}
-                        if comparison_number:
-                            if comparison_type == 'year':
-                                start_date = start_date_first
-                                end_date = end_date_first
-                                for i in range(1, eval(comparison_number) + 1):
-                                    com_start_date = subtract(start_date,
-                                                              years=i)
-                                    com_end_date = subtract(end_date, years=i)
-                                    tax_id = self.env[
-                                        'account.move.line'].search(
-                                        [('tax_ids', '=', tax.id),
-                                         ('date', '>=', com_start_date),
-                                         ('date', '<=', com_end_date),
-                                         ('account_id', '=', account.id),
-                                         ('parent_state', 'in',
-                                          option_domain)]).read(
-                                        ['debit', 'credit'])
-                                    tax_debit_sums = sum(
-                                        record['debit'] for record in tax_id)
-                                    tax_credit_sums = sum(
-                                        record['credit'] for record in tax_id)
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                    dynamic_total_tax_sum[
-                                        f"dynamic_total_tax_sum{i}"] = \
-                                        dynamic_total_net_sum[
-                                            f"dynamic_total_net_sum{i}"] * (
-                                                tax.amount / 100)
-                            elif comparison_type == 'month':
-                                dynamic_date_num[
-                                    f"dynamic_date_num{0}"] = self.get_month_name(
-                                    start_date) + ' ' + str(start_date.year)
-                                for i in range(1, eval(comparison_number) + 1):
-                                    com_start_date = subtract(start_date,
-                                                              months=i)
-                                    com_end_date = subtract(end_date, months=i)
-                                    tax_id = self.env[
-                                        'account.move.line'].search(
-                                        [('tax_ids', '=', tax.id),
-                                         ('date', '>=', com_start_date),
-                                         ('account_id', '=', account.id),
-                                         ('date', '<=', com_end_date),
-                                         ('parent_state', 'in',
-                                          option_domain)]).read(
-                                        ['debit', 'credit'])
-                                    tax_debit_sums = sum(
-                                        record['debit'] for record in tax_id)
-                                    tax_credit_sums = sum(
-                                        record['credit'] for record in tax_id)
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                    dynamic_total_tax_sum[
-                                        f"dynamic_total_tax_sum{i}"] = \
-                                        dynamic_total_net_sum[
-                                            f"dynamic_total_net_sum{i}"] * (
-                                                tax.amount / 100)
-                                    dynamic_date_num[
-                                        f"dynamic_date_num{i}"] = self.get_month_name(
-                                        com_start_date) + ' ' + str(
-                                        com_start_date.year)
-                            elif comparison_type == 'quarter':
-                                dynamic_date_num[
-                                    f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                                    get_quarter_number(
-                                        start_date)) + ' ' + str(
-                                    start_date.year)
-                                for i in range(1, eval(comparison_number) + 1):
-                                    com_start_date = subtract(start_date,
-                                                              months=i * 3)
-                                    com_end_date = subtract(end_date,
-                                                            months=i * 3)
-                                    tax_id = self.env[
-                                        'account.move.line'].search(
-                                        [('tax_ids', '=', tax.id),
-                                         ('date', '>=', com_start_date),
-                                         ('account_id', '=', account.id),
-                                         ('date', '<=', com_end_date),
-                                         ('parent_state', 'in',
-                                          option_domain)]).read(
-                                        ['debit', 'credit'])
-                                    tax_debit_sums = sum(
-                                        record['debit'] for record in tax_id)
-                                    tax_credit_sums = sum(
-                                        record['credit'] for record in tax_id)
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                    dynamic_total_tax_sum[
-                                        f"dynamic_total_tax_sum{i}"] = \
-                                        dynamic_total_net_sum[
-                                            f"dynamic_total_net_sum{i}"] * (
-                                                tax.amount / 100)
-                                    dynamic_date_num[
-                                        f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                                        get_quarter_number(
-                                            com_start_date)) + ' ' + str(
-                                        com_start_date.year)
-                        tax_id = self.env['account.move.line'].search(
-                            [('tax_ids', '=', tax.id),
-                             ('date', '>=', start_date_first),
-                             ('date', '<=', end_date_first),
-                             ('parent_state', 'in', option_domain),
-                             ('account_id', '=', account.id)]).read(
-                            ['debit', 'credit'])
-                        tax_debit_sums = sum(
-                            record['debit'] for record in tax_id)
-                        tax_credit_sums = sum(
-                            record['credit'] for record in tax_id)
-                        if tax_id and tax.type_tax_use == 'sale':
-                            if comparison_number:
-                                sale.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'dynamic net': dynamic_total_net_sum,
-                                    'dynamic tax': dynamic_total_tax_sum,
-                                    'account': account.display_name,
-                                })
-                            else:
-                                sale.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'account': account.display_name,
-                                })
-                        elif tax_id and tax.type_tax_use == 'purchase':
-                            if comparison_number:
-                                purchase.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'dynamic net': dynamic_total_net_sum,
-                                    'dynamic tax': dynamic_total_tax_sum,
-                                    'account': account.display_name,
-                                })
-                            else:
-                                purchase.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'account': account.display_name,
-                                })
+            group_by = 'account'
         elif report_type is not None and 'tax' in report_type:
-            start_date = start_date_first
-            end_date = end_date_first
-            for tax in tax_ids:
-                account_ids = self.env['account.move.line'].search(
-                    [('tax_ids', '=', tax.id)]).mapped('account_id')
-                for account in account_ids:
-                    dynamic_total_tax_sum = {}
-                    dynamic_total_net_sum = {}
-                    if comparison_number:
-                        if comparison_type == 'year':
-                            start_date = start_date_first
-                            end_date = end_date_first
-                            for i in range(1, eval(comparison_number) + 1):
-                                com_start_date = subtract(start_date,
-                                                          years=i)
-                                com_end_date = subtract(end_date, years=i)
-                                tax_id = self.env[
-                                    'account.move.line'].search(
-                                    [('tax_ids', '=', tax.id),
-                                     ('date', '>=', com_start_date),
-                                     ('date', '<=', com_end_date),
-                                     ('account_id', '=', account.id),
-                                     ('parent_state', 'in',
-                                      option_domain)]).read(
-                                    ['debit', 'credit'])
-                                tax_debit_sums = sum(
-                                    record['debit'] for record in tax_id)
-                                tax_credit_sums = sum(
-                                    record['credit'] for record in tax_id)
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                dynamic_total_tax_sum[
-                                    f"dynamic_total_tax_sum{i}"] = \
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] * (
-                                            tax.amount / 100)
-                        elif comparison_type == 'month':
-                            dynamic_date_num[
-                                f"dynamic_date_num{0}"] = self.get_month_name(
-                                start_date) + ' ' + str(start_date.year)
-                            for i in range(1, eval(comparison_number) + 1):
-                                com_start_date = subtract(start_date, months=i)
-                                com_end_date = subtract(end_date, months=i)
-                                tax_id = self.env[
-                                    'account.move.line'].search(
-                                    [('tax_ids', '=', tax.id),
-                                     ('date', '>=', com_start_date),
-                                     ('date', '<=', com_end_date),
-                                     ('account_id', '=', account.id),
-                                     ('parent_state', 'in',
-                                      option_domain)]).read(
-                                    ['debit', 'credit'])
-                                tax_debit_sums = sum(
-                                    record['debit'] for record in tax_id)
-                                tax_credit_sums = sum(
-                                    record['credit'] for record in tax_id)
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                dynamic_total_tax_sum[
-                                    f"dynamic_total_tax_sum{i}"] = \
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] * (
-                                            tax.amount / 100)
-                                dynamic_date_num[
-                                    f"dynamic_date_num{i}"] = self.get_month_name(
-                                    com_start_date) + ' ' + str(
-                                    com_start_date.year)
-                        elif comparison_type == 'quarter':
-                            dynamic_date_num[
-                                f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                                get_quarter_number(start_date)) + ' ' + str(
-                                start_date.year)
-                            for i in range(1, eval(comparison_number) + 1):
-                                com_start_date = subtract(start_date,
-                                                          months=i * 3)
-                                com_end_date = subtract(end_date,
-                                                        months=i * 3)
-                                tax_id = self.env[
-                                    'account.move.line'].search(
-                                    [('tax_ids', '=', tax.id),
-                                     ('date', '>=', com_start_date),
-                                     ('date', '<=', com_end_date),
-                                     ('account_id', '=', account.id),
-                                     ('parent_state', 'in',
-                                      option_domain)]).read(
-                                    ['debit', 'credit'])
-                                tax_debit_sums = sum(
-                                    record['debit'] for record in tax_id)
-                                tax_credit_sums = sum(
-                                    record['credit'] for record in tax_id)
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                dynamic_total_tax_sum[
-                                    f"dynamic_total_tax_sum{i}"] = \
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] * (
-                                            tax.amount / 100)
-                                dynamic_date_num[
-                                    f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                                    get_quarter_number(
-                                        com_start_date)) + ' ' + str(
-                                    com_start_date.year)
-                    tax_id = self.env['account.move.line'].search(
-                        [('tax_ids', '=', tax.id),
-                         ('parent_state', 'in', option_domain),
-                         ('date', '>=', start_date_first),
-                         ('date', '<=', end_date_first),
-                         ('account_id', '=', account.id)]).read(
-                        ['debit', 'credit'])
-                    tax_debit_sums = sum(
-                        record['debit'] for record in tax_id)
-                    tax_credit_sums = sum(
-                        record['credit'] for record in tax_id)
-                    if tax_id and tax.type_tax_use == 'sale':
-                        if comparison_number:
-                            sale.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'dynamic net': dynamic_total_net_sum,
-                                'dynamic tax': dynamic_total_tax_sum,
-                                'account': account.display_name,
-                            })
-                        else:
-                            sale.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'account': account.display_name,
-                            })
-                    elif tax_id and tax.type_tax_use == 'purchase':
-                        if comparison_number:
-                            purchase.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'dynamic net': dynamic_total_net_sum,
-                                'dynamic tax': dynamic_total_tax_sum,
-                                'account': account.display_name,
-                            })
-                        else:
-                            purchase.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'account': account.display_name,
-                            })
-        else:
-            start_date = start_date_first
-            end_date = end_date_first
-            for tax in tax_ids:
-                dynamic_total_tax_sum = {}
-                dynamic_total_net_sum = {}
-                if comparison_number:
-                    if comparison_type == 'year':
-                        start_date = start_date_first
-                        end_date = end_date_first
-                        for i in range(1, eval(comparison_number) + 1):
-                            com_start_date = subtract(start_date,
-                                                      years=i)
-                            com_end_date = subtract(end_date, years=i)
-                            tax_id = self.env[
-                                'account.move.line'].search(
-                                [('tax_ids', '=', tax.id),
-                                 ('date', '>=', com_start_date),
-                                 ('date', '<=', com_end_date),
-                                 ('parent_state', 'in', option_domain)]).read(
-                                ['debit', 'credit'])
-                            tax_debit_sums = sum(
-                                record['debit'] for record in tax_id)
-                            tax_credit_sums = sum(
-                                record['credit'] for record in tax_id)
-                            dynamic_total_net_sum[
-                                f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                            dynamic_total_tax_sum[
-                                f"dynamic_total_tax_sum{i}"] = \
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] * (
-                                        tax.amount / 100)
-                    elif comparison_type == 'month':
-                        dynamic_date_num[
-                            f"dynamic_date_num{0}"] = self.get_month_name(
-                            start_date) + ' ' + str(start_date.year)
-                        for i in range(1, eval(comparison_number) + 1):
-                            com_start_date = subtract(start_date, months=i)
-                            com_end_date = subtract(end_date, months=i)
-                            tax_id = self.env[
-                                'account.move.line'].search(
-                                [('tax_ids', '=', tax.id),
-                                 ('date', '>=', com_start_date),
-                                 ('date', '<=', com_end_date),
-                                 ('parent_state', 'in', option_domain)]).read(
-                                ['debit', 'credit'])
-                            tax_debit_sums = sum(
-                                record['debit'] for record in tax_id)
-                            tax_credit_sums = sum(
-                                record['credit'] for record in tax_id)
-                            dynamic_total_net_sum[
-                                f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                            dynamic_total_tax_sum[
-                                f"dynamic_total_tax_sum{i}"] = \
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] * (
-                                        tax.amount / 100)
-                            dynamic_date_num[
-                                f"dynamic_date_num{i}"] = self.get_month_name(
-                                com_start_date) + ' ' + str(
-                                com_start_date.year)
-                    elif comparison_type == 'quarter':
-                        dynamic_date_num[
-                            f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                            get_quarter_number(start_date)) + ' ' + str(
-                            start_date.year)
-                        for i in range(1, eval(comparison_number) + 1):
-                            com_start_date = subtract(start_date,
-                                                      months=i * 3)
-                            com_end_date = subtract(end_date,
-                                                    months=i * 3)
-                            tax_id = self.env[
-                                'account.move.line'].search(
-                                [('tax_ids', '=', tax.id),
-                                 ('date', '>=', com_start_date),
-                                 ('date', '<=', com_end_date),
-                                 ('parent_state', 'in', option_domain)]).read(
-                                ['debit', 'credit'])
-                            tax_debit_sums = sum(
-                                record['debit'] for record in tax_id)
-                            tax_credit_sums = sum(
-                                record['credit'] for record in tax_id)
-                            dynamic_total_net_sum[
-                                f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                            dynamic_total_tax_sum[
-                                f"dynamic_total_tax_sum{i}"] = \
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] * (
-                                        tax.amount / 100)
-                            dynamic_date_num[
-                                f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                                get_quarter_number(
-                                    com_start_date)) + ' ' + str(
-                                com_start_date.year)
-                tax_id = self.env['account.move.line'].search(
-                    [('tax_ids', '=', tax.id),
-                     ('parent_state', 'in', option_domain),
-                     ('date', '>=', start_date_first),
-                     ('date', '<=', end_date_first)]).read(['debit', 'credit'])
-                tax_debit_sums = sum(record['debit'] for record in tax_id)
-                tax_credit_sums = sum(record['credit'] for record in tax_id)
-                if tax.type_tax_use == 'sale':
-                    if comparison_number:
-                        sale.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                            'dynamic net': dynamic_total_net_sum,
-                            'dynamic tax': dynamic_total_tax_sum,
-                        })
-                    else:
-                        sale.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                        })
-                elif tax.type_tax_use == 'purchase':
-                    if comparison_number:
-                        purchase.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                            'dynamic net': dynamic_total_net_sum,
-                            'dynamic tax': dynamic_total_tax_sum,
-                        })
-                    else:
-                        purchase.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                        })
+            group_by = 'tax'
+        lines = self._get_tax_lines(periods, states, group_by,
+                                    bool(comparison_number))
         return {
             'dynamic_date_num': dynamic_date_num,
-            'sale': sale,
-            'purchase': purchase
+            'sale': lines['sale'],
+            'purchase': lines['purchase']
         }
 
+    @api.model
+    def _get_comparison_periods(self, start_date, end_date, count,
+                                comparison_type):
+        """
+        Return the periods the report is compared with, the closest first.
+
+        :param date start_date: Start date of the reported period.
+        :param date end_date: End date of the reported period.
+        :param int count: Number of comparison periods.
+        :param str comparison_type: 'year', 'month' or 'quarter'.
+        :return: List of (date_from, date_to) tuples.
+        :rtype: list
+        """
+        if comparison_type == 'year':
+            shifts = [{'years': index} for index in range(1, count + 1)]
+        elif comparison_type == 'quarter':
+            shifts = [{'months': index * 3} for index in range(1, count + 1)]
+        elif comparison_type == 'month':
+            shifts = [{'months': index} for index in range(1, count + 1)]
+        else:
+            return []
+        return [(subtract(start_date, **shift), subtract(end_date, **shift))
+                for shift in shifts]
+
+    @api.model
+    def _get_used_taxes(self):
+        """Return the taxes set on journal items of the active companies"""
+        self.env.cr.execute("""
+            SELECT tax.id FROM account_tax tax
+             WHERE EXISTS (
+                   SELECT 1 FROM account_move_line_account_tax_rel rel
+                     JOIN account_move_line aml
+                       ON aml.id = rel.account_move_line_id
+                    WHERE rel.account_tax_id = tax.id
+                      AND aml.company_id IN %s)
+        """, [tuple(self.env.companies.ids)])
+        return self.env['account.tax'].with_context(active_test=False).search(
+            [('id', 'in', [row[0] for row in self.env.cr.fetchall()])])
+
+    @api.model
+    def _get_tax_totals(self, periods, states, by_account=False):
+        """
+        Aggregate the base and tax amounts of every tax over several periods
+        in a single query.
+
+        Base amounts are read from the journal items through their taxes,
+        tax amounts from the tax lines through their originating tax. Both
+        are summed as debit plus credit.
+
+        :param list periods: (date_from, date_to) tuples.
+        :param list states: Accepted states of the journal entries.
+        :param bool by_account: Also group the amounts by account.
+        :return: Rows with tax_id, account_id when grouped by account, and
+                 base_<n> and tax_<n> columns for the period at index n.
+        :rtype: list
+        """
+        engine = self.env['account.ledger.engine']
+        where_clause, where_params = engine._get_filter_clause(
+            engine._compile_filters(
+                date_range={
+                    'start_date': min(period[0] for period in periods),
+                    'end_date': max(period[1] for period in periods)},
+                states=states))
+        group_fields = 'tax_id, account_id' if by_account else 'tax_id'
+        columns = []
+        params = []
+        for index, (date_from, date_to) in enumerate(periods):
+            columns.append(
+                "SUM(base) FILTER (WHERE date BETWEEN %%s AND %%s) "
+                "AS base_%(index)s, "
+                "SUM(tax) FILTER (WHERE date BETWEEN %%s AND %%s) "
+                "AS tax_%(index)s" % {'index': index})
+            params += [date_from, date_to, date_from, date_to]
+        self.env.cr.execute("""
+            SELECT %(group)s, %(columns)s
+              FROM (
+                SELECT rel.account_tax_id AS tax_id, aml.account_id, aml.date,
+                       aml.debit + aml.credit AS base, 0 AS tax
+                  FROM account_move_line_account_tax_rel rel
+                  JOIN account_move_line aml
+                    ON aml.id = rel.account_move_line_id
+                 WHERE %(where)s
+             UNION ALL
+                SELECT aml.tax_line_id, aml.account_id, aml.date,
+                       0, aml.debit + aml.credit
+                  FROM account_move_line aml
+                 WHERE aml.tax_line_id IS NOT NULL AND %(where)s
+              ) lines
+          GROUP BY %(group)s
+        """ % {'group': group_fields, 'columns': ', '.join(columns),
+               'where': where_clause}, params + where_params + where_params)
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _get_tax_lines(self, periods, states, group_by=None,
+                       comparison=False):
+        """
+        Build the sale and purchase lines of the report.
+
+        Without grouping, every tax used in the journal items gets a line.
+        Grouped by account or by tax, a line is given to every account and
+        tax having amounts in the reported period, ordered by account or by
+        tax respectively.
+
+        :param list periods: (date_from, date_to) tuples, the reported
+                             period first, then the comparison periods.
+        :param list states: Accepted states of the journal entries.
+        :param str group_by: None, 'account' or 'tax'.
+        :param bool comparison: Add the amounts of the comparison periods.
+        :return: Dictionary with the 'sale' and 'purchase' lines.
+        :rtype: dict
+        """
+        rows = self._get_tax_totals(periods, states, bool(group_by))
+        if group_by:
+            rows = [row for row in rows if row['base_0'] or row['tax_0']]
+            taxes = self.env['account.tax'].browse(
+                {row['tax_id'] for row in rows})
+            accounts = self.env['account.account'].browse(
+                {row['account_id'] for row in rows})
+        else:
+            taxes = self._get_used_taxes()
+            accounts = self.env['account.account']
+        tax_order = {tax.id: index for index, tax in enumerate(
+            taxes.sorted())}
+        account_order = {account.id: index for index, account in enumerate(
+            accounts.sorted(lambda account: (account.code or '', account.id)))}
+        if group_by == 'account':
+            rows.sort(key=lambda row: (account_order[row['account_id']],
+                                       tax_order[row['tax_id']]))
+        elif group_by == 'tax':
+            rows.sort(key=lambda row: (tax_order[row['tax_id']],
+                                       account_order[row['account_id']]))
+        else:
+            rows_by_tax = {row['tax_id']: row for row in rows}
+            rows = [rows_by_tax.get(tax.id, {'tax_id': tax.id})
+                    for tax in taxes.sorted()]
+        result = {'sale': [], 'purchase': []}
+        for row in rows:
+            tax = taxes.browse(row['tax_id'])
+            if tax.type_tax_use not in result:
+                continue
+            line = {
+                'name': tax.name,
+                'amount': tax.amount,
+                'net': round(row.get('base_0') or 0.0, 2),
+                'tax': round(row.get('tax_0') or 0.0, 2),
+            }
+            if comparison:
+                line['dynamic net'] = {
+                    f"dynamic_total_net_sum{index}": round(
+                        row.get('base_%s' % index) or 0.0, 2)
+                    for index in range(1, len(periods))}
+                line['dynamic tax'] = {
+                    f"dynamic_total_tax_sum{index}": round(
+                        row.get('tax_%s' % index) or 0.0, 2)
+                    for index in range(1, len(periods))}
+            if group_by:
+                line['account'] = accounts.browse(
+                    row['account_id']).display_name
+            result[tax.type_tax_use].append(line)
+        return result
+
     @api.model
     def get_month_name(self, date):
         """
@@ -622,8 +286,8 @@ class TaxReport(models.TransientModel):
         :param str report_name: Name of the financial report.
         """
         data = json.loads(data)
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        xlsx = self.env['account.report.xlsx']
+        workbook, output = xlsx._create_workbook(constant_memory=False)
         sheet = workbook.add_worksheet()
         sub_heading = workbook.add_format(
             {'align': 'center', 'bold': True, 'font_size': '10px',
@@ -754,7 +418,4 @@ class TaxReport(models.TransientModel):
         sheet.write(row, col + 1, ' ', sub_heading)
         sheet.write(row, col + 2, data['purchase_total'], sub_heading)
         row += 1
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
+        xlsx._stream_workbook(workbook, output, response)
@@ -3,8 +3,7 @@ const { Component } = owl;
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
 import { useRef, useState } from "@odoo/owl";
-import { BlockUI } from "@web/core/ui/block_ui";
-import { download } from "@web/core/network/download";
+import { enqueueXlsxReport } from "./report_job";
 const actionRegistry = registry.category("actions");
 
 class CashBook extends owl.Component {
@@ -13,6 +12,7 @@ class CashBook extends owl.Component {
         this.initial_render = true;
         this.orm = useService('orm');
         this.action = useService('action');
+        this.notification = useService('notification');
         this.dialog = useService("dialog");
         this.tbody = useRef('tbody');
         this.unfoldButton = useRef('unfoldButton');
@@ -28,9 +28,13 @@ class CashBook extends owl.Component {
             selected_account_list: [],
             total_debit: null,
             total_credit: null,
+            initial_balance: null,
+            closing_balance: null,
             currency: null,
             options: null,
             message_list : [],
+            expanded: {},
+            next_keys: {},
         });
         this.load_data(self.initial_render = true);
 
@@ -45,6 +49,8 @@ class CashBook extends owl.Component {
         var self = this;
         let totalDebitSum = 0;
         let totalCreditSum = 0;
+        let initialBalanceSum = 0;
+        let closingBalanceSum = 0;
         let currency;
         var action_title = self.props.action.display_name;
         try {
@@ -62,6 +68,8 @@ class CashBook extends owl.Component {
                         currency = moveLine.currency_id;
                         totalDebitSum += moveLine.total_debit || 0;
                         totalCreditSum += moveLine.total_credit || 0;
+                        initialBalanceSum += moveLine.initial_balance || 0;
+                        closingBalanceSum += moveLine.closing_balance || 0;
                     }
                 }
             }
@@ -70,6 +78,8 @@ class CashBook extends owl.Component {
             self.state.currency = currency
             self.state.total_debit = totalDebitSum.toFixed(2)
             self.state.total_credit = totalCreditSum.toFixed(2)
+            self.state.initial_balance = initialBalanceSum.toFixed(2)
+            self.state.closing_balance = closingBalanceSum.toFixed(2)
         }
         catch (el) {
             window.location.href;
@@ -99,10 +109,13 @@ class CashBook extends owl.Component {
          */
         ev.preventDefault();
         var self = this;
+        const report_data = await this.getReportData();
         var action_title = self.props.action.display_name;
         let totals = {
             'total_debit':this.state.total_debit,
             'total_credit':this.state.total_credit,
+            'initial_balance':this.state.initial_balance,
+            'closing_balance':this.state.closing_balance,
             'currency':this.state.currency,
         }
         return self.action.doAction({
@@ -114,7 +127,7 @@ class CashBook extends owl.Component {
                 'move_lines': self.state.move_line,
                 'filters': this.filter(),
                 'grand_total': totals,
-                'data': self.state.data,
+                'data': report_data,
                 'total': self.state.total,
                 'title': action_title,
                 'report_name': self.props.action.display_name
@@ -183,39 +196,19 @@ class CashBook extends owl.Component {
     }
     async print_xlsx() {
         /**
-         * Generates and downloads an XLSX report for the bank book.
+         * Queues the XLSX report of the bank book.
          */
         var self = this;
         var action_title = self.props.action.display_name;
-        let totals = {
-            'total_debit':this.state.total_debit,
-            'total_credit':this.state.total_credit,
-            'currency':this.state.currency,
-        }
+        // The report is rebuilt on the server from its filters.
         var datas = {
-            'move_lines': self.state.move_line,
-            'data': self.state.data,
-            'total': self.state.total,
             'title': action_title,
             'filters': this.filter(),
-            'grand_total': totals,
+            'args': this.getFilterArgs(),
         }
-        var action = {
-            'data': {
-                'model': 'cash.book.report',
-                'data': JSON.stringify(datas),
-                'output_format': 'xlsx',
-                'report_action': self.props.action.xml_id,
-                'report_name': action_title,
-            },
-        };
-        BlockUI;
-        await download({
-            url: '/xlsx_report',
-            data: action.data,
-            complete: () => unblockUI,
-            error: (error) => self.call('crash_manager', 'rpc_error', error),
-        });
+        await enqueueXlsxReport(self.orm, self.notification, 'cash.book.report',
+                                action_title, datas,
+                                self.props.action.xml_id);
     }
     async applyFilter(val, ev, is_delete = false) {
         /**
@@ -232,9 +225,13 @@ class CashBook extends owl.Component {
         this.state.move_line = null
         this.state.data = null
         this.state.total = null
+        this.state.expanded = {}
+        this.state.next_keys = {}
         this.state.filter_applied = true;
         let totalDebitSum = 0;
         let totalCreditSum = 0;
+        let initialBalanceSum = 0;
+        let closingBalanceSum = 0;
         if (ev) {
             if (ev.input && ev.input.attributes.placeholder.value == 'Partner' && !is_delete) {
                 this.state.selected_partner.push(val[0].id)
@@ -291,7 +288,7 @@ class CashBook extends owl.Component {
                 }
             }
         }
-        let filtered_data = await this.orm.call("cash.book.report", "get_filter_values", [this.state.selected_partner, this.state.date_range, this.state.selected_account_list, this.state.options,]);
+        let filtered_data = await this.orm.call("cash.book.report", "get_filter_values", this.getFilterArgs());
         for (const [index, value] of Object.entries(filtered_data)) {
             if (index !== 'move_lines_total') {
                 move_line_list.push(index);
@@ -300,6 +297,8 @@ class CashBook extends owl.Component {
                 Object.values(move_line_totals).forEach(move_line => {
                     totalDebitSum += move_line.total_debit || 0;
                     totalCreditSum += move_line.total_credit || 0;
+                    initialBalanceSum += move_line.initial_balance || 0;
+                    closingBalanceSum += move_line.closing_balance || 0;
                 });
             }
         }
@@ -308,28 +307,75 @@ class CashBook extends owl.Component {
         this.state.total = move_line_totals
         this.state.total_debit = totalDebitSum.toFixed(2)
         this.state.total_credit = totalCreditSum.toFixed(2)
+        this.state.initial_balance = initialBalanceSum.toFixed(2)
+        this.state.closing_balance = closingBalanceSum.toFixed(2)
         if ($(this.unfoldButton.el.classList).find("selected-filter")) {
             this.unfoldButton.el.classList.remove("selected-filter")
         }
     }
     async unfoldAll(ev) {
         /**
-         * Unfolds all items in the table body if the event target does not have the 'selected-filter' class,
-         * or folds all items if the event target has the 'selected-filter' class.
+         * Unfolds all accounts, loading the first page of journal items of
+         * those not loaded yet, or folds them all back.
          *
          * @param {Event} ev - The event object triggered by the action.
          */
-        if (!ev.target.classList.contains("selected-filter")) {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                $(this.tbody.el.children[length])[0].classList.add('show')
+        const button = ev.target;
+        if (!button.classList.contains("selected-filter")) {
+            await Promise.all(this.state.move_line.filter(
+                (move_line) => !this.state.data[move_line].length
+            ).map((move_line) => this.loadAccountLines(move_line)));
+            for (const move_line of this.state.move_line) {
+                this.state.expanded[move_line] = true;
             }
-            ev.target.classList.add("selected-filter");
+            button.classList.add("selected-filter");
         } else {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                $(this.tbody.el.children[length])[0].classList.remove('show')
-            }
-            ev.target.classList.remove("selected-filter");
+            this.state.expanded = {};
+            button.classList.remove("selected-filter");
+        }
+    }
+    async toggleAccount(move_line) {
+        /**
+         * Folds or unfolds an account, its first page of journal items being
+         * loaded the first time it is unfolded.
+         *
+         * @param {string} move_line - The display name of the account.
+         */
+        if (this.state.expanded[move_line]) {
+            this.state.expanded[move_line] = false;
+            return;
         }
+        if (!this.state.data[move_line].length) {
+            await this.loadAccountLines(move_line);
+        }
+        this.state.expanded[move_line] = true;
+    }
+    async loadAccountLines(move_line) {
+        /**
+         * Appends the next page of journal items of an account.
+         *
+         * @param {string} move_line - The display name of the account.
+         */
+        const result = await this.orm.call("cash.book.report", "get_account_lines", [
+            this.state.total[move_line]['account_id'],
+            ...this.getFilterArgs(),
+            this.state.next_keys[move_line] || false,
+        ]);
+        this.state.data[move_line].push(...result.lines);
+        this.state.next_keys[move_line] = result.next_key;
+    }
+    getFilterArgs() {
+        /**
+         * Returns the filters of the report, as expected by the server.
+         */
+        return [this.state.selected_partner, this.state.date_range, this.state.selected_account_list, this.state.options];
+    }
+    async getReportData() {
+        /**
+         * Returns the report with the journal items of every account, used
+         * for printing.
+         */
+        return await this.orm.call("cash.book.report", "get_report_data", this.getFilterArgs());
     }
     getDomain() {
         return [];
@@ -3,8 +3,7 @@ const { Component } = owl;
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
 import { useRef, useState } from "@odoo/owl";
-import { BlockUI } from "@web/core/ui/block_ui";
-import { download } from "@web/core/network/download";
+import { enqueueXlsxReport } from "./report_job";
 const actionRegistry = registry.category("actions");
 
 class GeneralLedger extends owl.Component {
@@ -13,6 +12,7 @@ class GeneralLedger extends owl.Component {
         this.initial_render = true;
         this.orm = useService('orm');
         this.action = useService('action');
+        this.notification = useService('notification');
         this.tbody = useRef('tbody');
         this.unfoldButton = useRef('unfoldButton');
         this.state = useState({
@@ -36,6 +36,8 @@ class GeneralLedger extends owl.Component {
             method: {
                         'accural': true
                     },
+            expanded: {},
+            next_keys: {},
         });
         this.load_data(self.initial_render = true);
     }
@@ -85,6 +87,7 @@ class GeneralLedger extends owl.Component {
     async printPdf(ev) {
         ev.preventDefault();
         var self = this;
+        const report_data = await this.getReportData();
         let totals = {
             'total_debit':this.state.total_debit,
             'total_credit':this.state.total_credit,
@@ -98,7 +101,7 @@ class GeneralLedger extends owl.Component {
             'report_file': 'dynamic_accounts_report.general_ledger',
             'data': {
                 'account': self.state.account,
-                'data': self.state.account_data,
+                'data': report_data,
                 'total': self.state.account_total,
                 'title': action_title,
                 'filters': this.filter(),
@@ -110,36 +113,16 @@ class GeneralLedger extends owl.Component {
     }
     async print_xlsx() {
         var self = this;
-        let totals = {
-            'total_debit':this.state.total_debit,
-            'total_credit':this.state.total_credit,
-            'currency':this.state.currency,
-        }
         var action_title = self.props.action.display_name;
+        // The report is rebuilt on the server from its filters.
         var datas = {
-            'account': self.state.account,
-            'data': self.state.account_data,
-            'total': self.state.account_total,
             'title': action_title,
             'filters': this.filter(),
-            'grand_total': totals,
+            'args': this.getFilterArgs(),
         }
-        var action = {
-            'data': {
-                'model': 'account.general.ledger',
-                'data': JSON.stringify(datas),
-                'output_format': 'xlsx',
-                'report_action': self.props.action.xml_id,
-                'report_name': action_title,
-            },
-        };
-        BlockUI;
-        await download({
-            url: '/xlsx_report',
-            data: action.data,
-            complete: () => unblockUI,
-            error: (error) => self.call('crash_manager', 'rpc_error', error),
-        });
+        await enqueueXlsxReport(self.orm, self.notification, 'account.general.ledger',
+                                action_title, datas,
+                                self.props.action.xml_id);
     }
     gotoJournalEntry(ev) {
         return this.action.doAction({
@@ -171,6 +154,8 @@ class GeneralLedger extends owl.Component {
         this.state.account = null
         this.state.account_data = null
         this.state.account_total = null
+        this.state.expanded = {}
+        this.state.next_keys = {}
         this.state.filter_applied = true;
         if (ev) {
             if (ev.input && ev.input.attributes.placeholder.value == 'Account' && !is_delete) {
@@ -280,7 +265,7 @@ class GeneralLedger extends owl.Component {
                 }
             }
         }
-        let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list,this.state.method]);
+        let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", this.getFilterArgs());
         $.each(filtered_data, function (index, value) {
             if (index !== 'account_totals' && index !== 'journal_ids' && index !== 'analytic_ids') {
                 account_list.push(index)
@@ -303,17 +288,66 @@ class GeneralLedger extends owl.Component {
         }
     }
     async unfoldAll(ev) {
-        if (!ev.target.classList.contains("selected-filter")) {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                $(this.tbody.el.children[length])[0].classList.add('show')
+        /**
+         * Unfolds all accounts, loading the first page of journal items of
+         * those not loaded yet, or folds them all back.
+         */
+        const button = ev.target;
+        if (!button.classList.contains("selected-filter")) {
+            await Promise.all(this.state.account.filter(
+                (account) => !this.state.account_data[account].length
+            ).map((account) => this.loadAccountLines(account)));
+            for (const account of this.state.account) {
+                this.state.expanded[account] = true;
             }
-            ev.target.classList.add("selected-filter");
+            button.classList.add("selected-filter");
         } else {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                $(this.tbody.el.children[length])[0].classList.remove('show')
-            }
-            ev.target.classList.remove("selected-filter");
+            this.state.expanded = {};
+            button.classList.remove("selected-filter");
+        }
+    }
+    async toggleAccount(account) {
+        /**
+         * Folds or unfolds an account, its first page of journal items being
+         * loaded the first time it is unfolded.
+         *
+         * @param {string} account - The display name of the account.
+         */
+        if (this.state.expanded[account]) {
+            this.state.expanded[account] = false;
+            return;
         }
+        if (!this.state.account_data[account].length) {
+            await this.loadAccountLines(account);
+        }
+        this.state.expanded[account] = true;
+    }
+    async loadAccountLines(account) {
+        /**
+         * Appends the next page of journal items of an account.
+         *
+         * @param {string} account - The display name of the account.
+         */
+        const result = await this.orm.call("account.general.ledger", "get_account_lines", [
+            this.state.account_total[account]['account_id'],
+            ...this.getFilterArgs(),
+            this.state.next_keys[account] || false,
+        ]);
+        this.state.account_data[account].push(...result.lines);
+        this.state.next_keys[account] = result.next_key;
+    }
+    getFilterArgs() {
+        /**
+         * Returns the filters of the report, as expected by the server.
+         */
+        return [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list, this.state.method];
+    }
+    async getReportData() {
+        /**
+         * Returns the report with the journal items of every account, used
+         * for printing.
+         */
+        return await this.orm.call("account.general.ledger", "get_report_data", this.getFilterArgs());
     }
     filter() {
     var self=this;
@@ -3,8 +3,7 @@ const { Component } = owl;
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
 import { useRef, useState } from "@odoo/owl";
-import { BlockUI } from "@web/core/ui/block_ui";
-import { download } from "@web/core/network/download";
+import { enqueueXlsxReport } from "./report_job";
 const actionRegistry = registry.category("actions");
 
 class PartnerLedger extends owl.Component {
@@ -13,6 +12,7 @@ class PartnerLedger extends owl.Component {
         this.initial_render = true;
         this.orm = useService('orm');
         this.action = useService('action');
+        this.notification = useService('notification');
         this.tbody = useRef('tbody');
         this.unfoldButton = useRef('unfoldButton');
         this.dialog = useService("dialog");
@@ -33,6 +33,9 @@ class PartnerLedger extends owl.Component {
             account: null,
             options: null,
             message_list : [],
+            expanded: {},
+            next_keys: {},
+            partner_next_key: false,
         });
         this.load_data(self.initial_render = true);
 
@@ -41,37 +44,14 @@ class PartnerLedger extends owl.Component {
         /**
          * Loads the data for the partner ledger report.
          */
-        let partner_list = []
-        let partner_totals = ''
-        let totalDebitSum = 0;
-        let totalCreditSum = 0;
-        let currency;
         var self = this;
         var action_title = self.props.action.display_name;
         try {
             var self = this;
-            self.state.data = await self.orm.call("account.partner.ledger", "view_report", [[this.wizard_id], action_title,]);
-            // Extract partner information from the data
-            $.each(self.state.data, function (index, value) {
-                if (index !== 'partner_totals') {
-                    partner_list.push(index)
-                }
-                else {
-                    partner_totals = value
-                    Object.values(partner_totals).forEach(partner_list => {
-                        currency = partner_list.currency_id
-                        totalDebitSum += partner_list.total_debit || 0;
-                        totalCreditSum += partner_list.total_credit || 0;
-                    });
-                }
-            })
-            self.state.partners = partner_list
-            self.state.partner_list = partner_list
-            self.state.total_list = partner_totals
-            self.state.total = partner_totals
-            self.state.currency = currency
-            self.state.total_debit = totalDebitSum
-            self.state.total_credit = totalCreditSum
+            self.state.data = {};
+            self.addPartnerPage(await self.orm.call("account.partner.ledger", "view_report", [[this.wizard_id], action_title,]));
+            self.state.partner_list = self.state.partners
+            self.state.total_list = self.state.total
             self.state.title = action_title
         }
         catch (el) {
@@ -86,9 +66,9 @@ class PartnerLedger extends owl.Component {
          * @returns {Promise} - A promise that resolves to the result of the action.
          */
         ev.preventDefault();
-        let partner_list = []
-        let partner_value = []
-        let partner_totals = ''
+        const report_data = await this.getReportData();
+        // The widget may hold only some pages of partners, print them all.
+        const { partner_totals = {}, ...report_partners } = report_data;
         let totals = {
             'total_debit':this.state.total_debit,
             'total_credit':this.state.total_credit,
@@ -101,11 +81,11 @@ class PartnerLedger extends owl.Component {
             'report_name': 'dynamic_accounts_report.partner_ledger',
             'report_file': 'dynamic_accounts_report.partner_ledger',
             'data': {
-                'partners': this.state.partners,
+                'partners': Object.keys(report_partners),
                 'filters': this.filter(),
                 'grand_total': totals,
-                'data': this.state.data,
-                'total': this.state.total,
+                'data': report_data,
+                'total': partner_totals,
                 'title': action_title,
                 'report_name': this.props.action.display_name
             },
@@ -168,43 +148,19 @@ class PartnerLedger extends owl.Component {
     }
     async print_xlsx() {
         /**
-         * Generates and downloads an XLSX report for the partner ledger.
+         * Queues the XLSX report of the partner ledger.
          */
         var self = this;
-
-        let partner_list = []
-        let partner_value = []
-        let partner_totals = ''
-        let totals = {
-            'total_debit':this.state.total_debit,
-            'total_credit':this.state.total_credit,
-            'currency':this.state.currency,
-        }
         var action_title = self.props.action.display_name;
+        // The report is rebuilt on the server from its filters.
         var datas = {
-            'partners': self.state.partners,
-            'data': self.state.data,
-            'total': self.state.total,
             'title': action_title,
             'filters': this.filter(),
-            'grand_total': totals,
+            'args': this.getFilterArgs(),
         }
-        var action = {
-            'data': {
-                'model': 'account.partner.ledger',
-                'data': JSON.stringify(datas),
-                'output_format': 'xlsx',
-                'report_action': self.props.action.xml_id,
-                'report_name': action_title,
-            },
-        };
-        BlockUI;
-        await download({
-            url: '/xlsx_report',
-            data: action.data,
-            complete: () => unblockUI,
-            error: (error) => self.call('crash_manager', 'rpc_error', error),
-        });
+        await enqueueXlsxReport(self.orm, self.notification, 'account.partner.ledger',
+                                action_title, datas,
+                                self.props.action.xml_id);
     }
     gotoJournalEntry(ev) {
         /**
@@ -260,16 +216,13 @@ class PartnerLedger extends owl.Component {
          * @param {Event} ev - The event object triggered by the action.
          * @param {boolean} is_delete - Indicates whether the filter value is being deleted.
          */
-        let partner_list = []
-        let partner_value = []
-        let partner_totals = ''
-        let month = null
         this.state.partners = null
         this.state.data = null
         this.state.total = null
+        this.state.expanded = {}
+        this.state.next_keys = {}
+        this.state.partner_next_key = false
         this.state.filter_applied = true;
-        let totalDebitSum = 0;
-        let totalCreditSum = 0;
         if (ev) {
             if (ev.input && ev.input.attributes.placeholder.value == 'Partner' && !is_delete) {
                 this.state.selected_partner.push(val[0].id)
@@ -350,24 +303,8 @@ class PartnerLedger extends owl.Component {
                 }
             }
         }
-        let filtered_data = await this.orm.call("account.partner.ledger", "get_filter_values", [this.state.selected_partner, this.state.date_range, this.state.account, this.state.options,]);
-        $.each(filtered_data, function (index, value) {
-            if (index !== 'partner_totals') {
-                partner_list.push(index)
-            }
-            else {
-                partner_totals = value
-                Object.values(partner_totals).forEach(partner_list => {
-                        totalDebitSum += partner_list.total_debit || 0;
-                        totalCreditSum += partner_list.total_credit || 0;
-                    });
-            }
-        })
-        this.state.partners = partner_list
-        this.state.data = filtered_data
-        this.state.total = partner_totals
-        this.state.total_debit = totalDebitSum
-        this.state.total_credit = totalCreditSum
+        this.state.data = {}
+        this.addPartnerPage(await this.orm.call("account.partner.ledger", "get_filter_values", this.getFilterArgs()));
         if ($(this.unfoldButton.el.classList).find("selected-filter")) {
             this.unfoldButton.el.classList.remove("selected-filter")
         }
@@ -377,22 +314,95 @@ class PartnerLedger extends owl.Component {
     }
     async unfoldAll(ev) {
         /**
-         * Unfolds all items in the table body if the event target does not have the 'selected-filter' class,
-         * or folds all items if the event target has the 'selected-filter' class.
+         * Unfolds all partners, loading the first page of journal items of
+         * those not loaded yet, or folds them all back.
          *
          * @param {Event} ev - The event object triggered by the action.
          */
-        if (!ev.target.classList.contains("selected-filter")) {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                $(this.tbody.el.children[length])[0].classList.add('show')
+        const button = ev.target;
+        if (!button.classList.contains("selected-filter")) {
+            await Promise.all(this.state.partners.filter(
+                (partner) => !this.state.data[partner].length
+            ).map((partner) => this.loadPartnerLines(partner)));
+            for (const partner of this.state.partners) {
+                this.state.expanded[partner] = true;
             }
-            ev.target.classList.add("selected-filter");
+            button.classList.add("selected-filter");
         } else {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                $(this.tbody.el.children[length])[0].classList.remove('show')
-            }
-            ev.target.classList.remove("selected-filter");
+            this.state.expanded = {};
+            button.classList.remove("selected-filter");
+        }
+    }
+    async togglePartner(partner) {
+        /**
+         * Folds or unfolds a partner, its first page of journal items being
+         * loaded the first time it is unfolded.
+         *
+         * @param {string} partner - The name of the partner.
+         */
+        if (this.state.expanded[partner]) {
+            this.state.expanded[partner] = false;
+            return;
         }
+        if (!this.state.data[partner].length) {
+            await this.loadPartnerLines(partner);
+        }
+        this.state.expanded[partner] = true;
+    }
+    addPartnerPage(page) {
+        /**
+         * Appends a page of partner headers to the report.
+         *
+         * @param {Object} page - The partners keyed by name, with their
+         *     'partner_totals', the 'next_key' of the following page and, on
+         *     the first page, the 'grand_total' of all partners.
+         */
+        const { partner_totals, grand_total, next_key, ...partners } = page;
+        this.state.partners = [...(this.state.partners || []), ...Object.keys(partners)];
+        this.state.data = { ...this.state.data, ...partners };
+        this.state.total = { ...this.state.total, ...partner_totals };
+        this.state.partner_next_key = next_key;
+        if (grand_total) {
+            this.state.currency = grand_total.currency_id;
+            this.state.total_debit = grand_total.total_debit;
+            this.state.total_credit = grand_total.total_credit;
+        }
+    }
+    async loadMorePartners() {
+        /**
+         * Appends the next page of partners to the report.
+         */
+        this.addPartnerPage(await this.orm.call("account.partner.ledger", "get_filter_values", [
+            ...this.getFilterArgs(),
+            this.state.partner_next_key,
+        ]));
+    }
+    async loadPartnerLines(partner) {
+        /**
+         * Appends the next page of journal items of a partner.
+         *
+         * @param {string} partner - The name of the partner.
+         */
+        const result = await this.orm.call("account.partner.ledger", "get_partner_lines", [
+            this.state.total[partner]['partner_id'],
+            ...this.getFilterArgs().slice(1),
+            this.state.next_keys[partner] || false,
+        ]);
+        this.state.data[partner].push(...result.lines);
+        this.state.next_keys[partner] = result.next_key;
+    }
+    getFilterArgs() {
+        /**
+         * Returns the filters of the report, as expected by the server.
+         */
+        return [this.state.selected_partner, this.state.date_range, this.state.account, this.state.options];
+    }
+    async getReportData() {
+        /**
+         * Returns the report with the journal items of every partner, used
+         * for printing.
+         */
+        return await this.orm.call("account.partner.ledger", "get_report_data", this.getFilterArgs());
     }
 }
 PartnerLedger.defaultProps = {
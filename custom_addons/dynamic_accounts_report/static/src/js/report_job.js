@@ -0,0 +1,28 @@
+/** @odoo-module */
+import { _t } from "@web/core/l10n/translation";
+
+/**
+ * Queues the XLSX export of a dynamic report as a report job, so that it is
+ * generated by the report workers instead of the HTTP worker. The user is
+ * notified again once the file can be downloaded from the report jobs.
+ *
+ * @param {Object} orm The orm service of the widget.
+ * @param {Object} notification The notification service of the widget.
+ * @param {String} model The report model exporting the workbook.
+ * @param {String} title The name of the report, used for the file.
+ * @param {Object} datas The data passed to get_xlsx_report.
+ * @param {String} reportAction The xml id of the report action.
+ */
+export async function enqueueXlsxReport(orm, notification, model, title,
+                                        datas, reportAction) {
+    await orm.call("account.report.job", "enqueue_report", [
+        title, model, 'xlsx', {
+            'data': datas,
+            'report_action': reportAction,
+        },
+    ]);
+    notification.add(
+        _t("The export is being generated in the background. You will be notified once it is ready in the report jobs."),
+        { type: 'info' },
+    );
+}